@@ -0,0 +1,300 @@
+"""
+Seeded generator of synthetic ledgers for benchmarks and scale tests.
+
+Writes database/transactions.txt and database/budgets.txt under an output directory,
+in the formats the app reads, so the app can be pointed at it by running from there:
+
+    python -m benchmarks.generate_ledger --rows 1M --seed 7 --out /tmp/ledger-1m
+
+Months are calendar months in UTC, so the output does not depend on the machine's
+timezone: the same rows, seed, years, end month and mix options always produce the same
+bytes. A history ending in the current month stops at the time it is generated rather
+than filling the rest of the month with future rows, so only such a history differs
+from one run to the next.
+"""
+import argparse
+import calendar
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from rich.console import Console
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.utils import BUDGETS_FILE, TRANSACTIONS_FILE
+
+console = Console()
+
+# Rows generated (and written) at a time, so memory stays flat up to 50M rows. Part of
+# the output's definition: the random stream is drawn chunk by chunk.
+CHUNK_ROWS = 250_000
+
+# Categories from the most to the least frequent, each with the median (Rs) and spread
+# (sigma of the log) of its amounts and the descriptions it draws from, most common first.
+EXPENSE_MIX = [
+    ("Food", 250, 0.8, [
+        "Swiggy order", "Zomato order", "Groceries BigBasket", "Chai and snacks", "Lunch at office canteen",
+        "Dinner with friends", "Blinkit groceries", "Fruits and vegetables", "Bakery", "Dominos pizza",
+        "Starbucks coffee", "Milk subscription"
+    ]),
+    ("Transport", 120, 0.9, [
+        "Uber ride", "Ola auto", "Metro card recharge", "Rapido bike", "Petrol", "Bus pass",
+        "Parking", "Train tickets IRCTC", "FASTag recharge", "Flight tickets"
+    ]),
+    ("Bills", 1800, 0.7, [
+        "Electricity bill", "Mobile recharge Jio", "Broadband Airtel", "Rent", "Water bill",
+        "Gas cylinder", "DTH recharge", "Society maintenance", "Credit card interest"
+    ]),
+    ("Shopping", 1200, 1.0, [
+        "Amazon order", "Flipkart order", "Myntra clothes", "Decathlon", "Electronics store",
+        "Ikea furniture", "Books", "Nykaa cosmetics", "Shoes", "Gift for family"
+    ]),
+    ("Entertainment", 500, 0.8, [
+        "Netflix subscription", "Movie tickets PVR", "Spotify premium", "BookMyShow", "Hotstar",
+        "Concert tickets", "Gaming", "Amusement park"
+    ]),
+    ("Health", 800, 1.0, [
+        "Pharmacy", "Doctor consultation", "Gym membership", "Lab tests", "Dental checkup",
+        "Health insurance premium", "Yoga class"
+    ]),
+    ("Other", 300, 1.1, [
+        "ATM withdrawal", "Donation", "Haircut", "Laundry", "Courier", "Stationery", "Bank charges"
+    ])
+]
+INCOME_MIX = [
+    ("Salary", 60000, 0.2, ["Monthly salary", "Salary credit", "Bonus"]),
+    ("Freelance", 15000, 0.6, ["Freelance project", "Consulting invoice", "Design work", "Writing gig"]),
+    ("Investment", 5000, 0.9, ["Mutual fund dividend", "FD interest", "Stock sale", "Savings interest"]),
+    ("Business", 25000, 0.8, ["Shop sales", "Client payment", "Online store payout"]),
+    ("Gift", 2000, 0.7, ["Birthday gift", "Festival gift", "Wedding gift"]),
+    ("Other", 1000, 1.0, ["Cashback", "Refund", "Reimbursement", "Sold old phone"])
+]
+
+# Hours of the (UTC) day between which transactions are entered.
+DAY_START_HOUR = 7
+DAY_END_HOUR = 23
+
+
+def parse_rows(text):
+    """Parses a row count such as 10000, 10K, 2.5M or 50M."""
+    text = str(text).strip().upper().replace("_", "").replace(",", "")
+    scale = {"K": 1_000, "M": 1_000_000}.get(text[-1:], 1)
+    try:
+        rows = int(float(text[:-1] if scale > 1 else text) * scale)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Not a row count: {text!r}")
+    if rows <= 0:
+        raise argparse.ArgumentTypeError("The row count must be positive.")
+    return rows
+
+
+def _zipf_weights(count, skew):
+    """Weights of ranks 1..count falling off as 1 / rank ** skew, summing to 1."""
+    weights = 1.0 / np.arange(1, count + 1) ** skew
+    return weights / weights.sum()
+
+
+def current_month():
+    """The current "YYYY-MM" month in UTC."""
+    return datetime.now(timezone.utc).strftime("%Y-%m")
+
+
+def _month_start(number):
+    """Epoch seconds at which month number (year * 12 + month - 1) starts, in UTC."""
+    return calendar.timegm((number // 12, number % 12 + 1, 1, 0, 0, 0))
+
+
+def _month_span(end_month, years, until=None):
+    """
+    The (start, end) epoch seconds of the years * 12 months ending with end_month, in
+    UTC, with the end brought forward to until when that is earlier.
+    """
+    year, month = map(int, end_month.split("-"))
+    last = year * 12 + month - 1
+    start, end = _month_start(last - (years * 12 - 1)), _month_start(last + 1)
+    return start, end if until is None else min(end, until)
+
+
+class _Mix:
+    """Categories of one transaction type, with their pick weights and description tables."""
+
+    def __init__(self, mix, skew):
+        self.names = [name for name, _, _, _ in mix]
+        self.weights = _zipf_weights(len(mix), skew)
+        self.log_medians = np.log([median * 100 for _, median, _, _ in mix])
+        self.sigmas = np.array([sigma for _, _, sigma, _ in mix])
+        self.descriptions = [descriptions for _, _, _, descriptions in mix]
+        # Merchants are long-tailed too: the first few get most of the rows.
+        self.description_weights = [_zipf_weights(len(descriptions), 1.0) for descriptions in self.descriptions]
+
+    def draw(self, rng, count):
+        """Returns (category codes, amounts in paisa, descriptions) of count transactions."""
+        codes = rng.choice(len(self.names), size=count, p=self.weights)
+        amounts = np.maximum(
+            100,
+            np.exp(rng.normal(self.log_medians[codes], self.sigmas[codes])).round(-2)
+        ).astype(np.int64)
+        descriptions = np.empty(count, dtype=object)
+        for code, choices in enumerate(self.descriptions):
+            rows = np.flatnonzero(codes == code)
+            picks = rng.choice(len(choices), size=len(rows), p=self.description_weights[code])
+            descriptions[rows] = np.array(choices, dtype=object)[picks]
+        return codes, amounts, descriptions
+
+
+def generate_transactions(rows, seed, years, end_month, skew, income_share, backdated_share, reference_share,
+                          until=None):
+    """
+    Yields the ledger lines of a synthetic history in chunks of up to CHUNK_ROWS lines,
+    each chunk one str. Lines are in entry order: timestamps ascend, except for the
+    backdated share, entered up to 30 days after the day they record. No timestamp is at
+    or after until (epoch seconds), if given.
+    """
+    rng = np.random.default_rng(seed)
+    span_start, span_end = _month_span(end_month, years, until)
+    days = (span_end - span_start) / 86400
+    mixes = [_Mix(EXPENSE_MIX, skew), _Mix(INCOME_MIX, skew)]
+
+    for chunk_start in range(0, rows, CHUNK_ROWS):
+        count = min(CHUNK_ROWS, rows - chunk_start)
+        # Each chunk covers its share of the days, so the ledger grows chronologically.
+        first_day = days * chunk_start / rows
+        last_day = days * (chunk_start + count) / rows
+        # The fraction of a day drawn is how far into its entry hours the row falls, so
+        # timestamps ascend with the draws even where two chunks share a day.
+        position = np.sort(rng.uniform(first_day, last_day, count))
+        day = np.floor(position)
+        day_starts = span_start + day * 86400
+        window_start = day_starts + DAY_START_HOUR * 3600
+        # A span cut short by until ends partway through its last day, whose entry hours
+        # end there too (or are the hours since midnight, if until is before they start).
+        window_end = np.minimum(day_starts + DAY_END_HOUR * 3600, span_end)
+        window_start = np.where(window_start < window_end, window_start, day_starts)
+        timestamps = np.floor(window_start + (position - day) * (window_end - window_start))
+        backdated = rng.random(count) < backdated_share
+        timestamps[backdated] -= rng.integers(1, 31, int(backdated.sum())) * 86400
+        timestamps = np.maximum(timestamps, span_start)
+
+        is_income = rng.random(count) < income_share
+        type_names = np.where(is_income, "income", "expense").astype(object)
+        categories = np.empty(count, dtype=object)
+        amounts = np.empty(count, dtype=np.int64)
+        descriptions = np.empty(count, dtype=object)
+        for mix, rows_of_type in zip(mixes, (np.flatnonzero(~is_income), np.flatnonzero(is_income))):
+            codes, mix_amounts, mix_descriptions = mix.draw(rng, len(rows_of_type))
+            categories[rows_of_type] = np.array(mix.names, dtype=object)[codes]
+            amounts[rows_of_type] = mix_amounts
+            descriptions[rows_of_type] = mix_descriptions
+
+        # Payment references make the description vocabulary grow with the ledger.
+        referenced = np.flatnonzero(rng.random(count) < reference_share)
+        references = rng.integers(100000, 1000000, len(referenced))
+        for row, reference in zip(referenced.tolist(), references.tolist()):
+            descriptions[row] = f"{descriptions[row]} ref {reference}"
+
+        yield "".join(
+            f"{timestamp},{trans_type},{category},{description},{amount}\n"
+            for timestamp, trans_type, category, description, amount in zip(
+                timestamps.tolist(), type_names.tolist(), categories.tolist(), descriptions.tolist(), amounts.tolist()
+            )
+        )
+
+
+def generate_budgets(rows, seed, years, end_month, skew, income_share):
+    """
+    Returns the budgets.txt lines of a synthetic history: most expense categories get a
+    budget each month, near what the month is expected to spend on them, and some months
+    revise one afterwards (the later line wins).
+    """
+    # A stream separate from the transactions', so either can change on its own.
+    rng = np.random.default_rng([seed, 1])
+    months = years * 12
+    year, month = map(int, end_month.split("-"))
+    last = year * 12 + month - 1
+    mix = _Mix(EXPENSE_MIX, skew)
+    monthly_rows = rows * (1 - income_share) / months
+    # Mean of a lognormal: median * exp(sigma^2 / 2).
+    expected = monthly_rows * mix.weights * np.exp(mix.log_medians + mix.sigmas ** 2 / 2)
+
+    lines = []
+    for number in range(last - months + 1, last + 1):
+        month_year = f"{number // 12:04d}-{number % 12 + 1:02d}"
+        budgeted = np.flatnonzero(rng.random(len(mix.names)) < 0.8)
+        amounts = (expected[budgeted] * rng.uniform(0.8, 1.3, len(budgeted)) / 50000).round() * 50000
+        for code, amount in zip(budgeted.tolist(), amounts.tolist()):
+            lines.append(f"{month_year},{mix.names[code]},{max(50000, int(amount))}\n")
+        if len(budgeted) and rng.random() < 0.1:
+            code = int(rng.choice(budgeted))
+            lines.append(f"{month_year},{mix.names[code]},{max(50000, int(expected[code] // 50000 * 50000))}\n")
+    return lines
+
+
+def write_ledger(out, rows, seed=42, years=3, end_month=None, skew=1.1, income_share=0.06,
+                 backdated_share=0.02, reference_share=0.3):
+    """
+    Writes a synthetic ledger and its budgets under out/database, replacing any there.
+    end_month ("YYYY-MM") defaults to the current month (UTC); when it is the current
+    month the history stops now. Returns the generation settings and output sizes as a
+    dict.
+    """
+    end_month = end_month or current_month()
+    until = int(time.time()) if end_month == current_month() else None
+    settings = {
+        "rows": rows,
+        "seed": seed,
+        "years": years,
+        "end_month": end_month,
+        "until": until,
+        "skew": skew,
+        "income_share": income_share,
+        "backdated_share": backdated_share,
+        "reference_share": reference_share
+    }
+    transactions_path = os.path.join(out, TRANSACTIONS_FILE)
+    budgets_path = os.path.join(out, BUDGETS_FILE)
+    os.makedirs(os.path.dirname(transactions_path), exist_ok=True)
+
+    with open(transactions_path, "w", encoding="utf-8", newline="") as f:
+        for chunk in generate_transactions(
+            rows, seed, years, end_month, skew, income_share, backdated_share, reference_share, until
+        ):
+            f.write(chunk)
+    with open(budgets_path, "w", encoding="utf-8", newline="") as f:
+        f.writelines(generate_budgets(rows, seed, years, end_month, skew, income_share))
+
+    settings["transactions_bytes"] = os.path.getsize(transactions_path)
+    settings["budgets_bytes"] = os.path.getsize(budgets_path)
+    return settings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a seeded synthetic ledger for benchmarks.")
+    parser.add_argument("--out", required=True, help="Directory to write database/transactions.txt and database/budgets.txt under.")
+    parser.add_argument("--rows", type=parse_rows, default=parse_rows("100K"), help="Transactions to write, e.g. 10K, 1M or 50M (default: 100K).")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42).")
+    parser.add_argument("--years", type=int, default=3, help="Years of history (default: 3).")
+    parser.add_argument("--end-month", help="Last month of the history, YYYY-MM in UTC (default: the current month, up to now).")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of the category mix; 0 is uniform (default: 1.1).")
+    parser.add_argument("--income-share", type=float, default=0.06, help="Share of rows that are income (default: 0.06).")
+    parser.add_argument("--backdated-share", type=float, default=0.02, help="Share of rows entered after their date (default: 0.02).")
+    parser.add_argument("--reference-share", type=float, default=0.3, help="Share of descriptions with a payment reference (default: 0.3).")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    settings = write_ledger(
+        args.out, args.rows, args.seed, args.years, args.end_month, args.skew,
+        args.income_share, args.backdated_share, args.reference_share
+    )
+    console.print(
+        f"[green]Wrote {settings['rows']:,} transactions ({settings['transactions_bytes'] / 1e6:,.1f} MB) "
+        f"over {settings['years']} years to {settings['end_month']} in {time.perf_counter() - started:.1f}s "
+        f"under {args.out}[/green]"
+    )
+
+
+if __name__ == "__main__":
+    main()
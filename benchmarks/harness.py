@@ -0,0 +1,634 @@
+"""
+Benchmark harness: times the app's entry points against a synthetic ledger and records
+their peak memory, writing the results as JSON so runs can be compared.
+
+    python -m benchmarks.harness run --rows 1M --repeat 3
+    python -m benchmarks.harness compare benchmarks/results/old.json benchmarks/results/new.json
+
+Each benchmark runs in its own process, started cold: the first run pays for loading
+the sidecars and filling the in-process caches, later runs show the warm path. Peak
+memory is the process's resident high-water mark, so one benchmark never inherits
+another's. Benchmarks that write to the ledger get a new process and a fresh copy of
+the dataset per run.
+The dataset is generated once per (rows, seed, years, end month) by
+benchmarks.generate_ledger, with its sidecar files built, and reused by later runs.
+"""
+import argparse
+import contextlib
+import fnmatch
+import importlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from itertools import islice
+
+from rich.console import Console
+from rich.table import Table
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Add the project root to the Python path
+sys.path.append(REPO_ROOT)
+
+from benchmarks.generate_ledger import current_month, parse_rows, write_ledger
+
+console = Console()
+
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+DATA_ROOT = os.path.join(tempfile.gettempdir(), "finance-tracker-bench")
+DATASET_FILE = "benchmark_dataset.json"
+
+# Rows of a newly generated import file, per row of the ledger.
+IMPORT_SHARE = 0.1
+
+# Rows a user sees on the first page of List Transactions.
+FIRST_PAGE_ROWS = 50
+
+# Modules a benchmark process imports before measuring anything.
+APP_MODULES = [
+    "database.ledger",
+    "database.query",
+    "database.description_index",
+    "features.transactions.transactions",
+    "features.budgets.budgets",
+    "features.analytics.analytics",
+    "features.smart_assistance.assistance",
+    "features.data_management.data_management",
+    "features.data_management.backup",
+    "features.dashboard.data"
+]
+
+# Name -> (run, setup, writes). setup(data_dir, scratch) runs untimed before every run
+# and returns run's argument (scratch, a directory for output files, by default); writes
+# means run changes the data, so it gets a fresh copy.
+BENCHMARKS = {}
+
+# Settings of the dataset the benchmarks of this process run against.
+_dataset = {}
+
+
+def benchmark(name, setup=None, writes=False):
+    """Registers the decorated function as the benchmark called name."""
+    def register(run):
+        BENCHMARKS[name] = (run, setup, writes)
+        return run
+    return register
+
+
+def _end_month():
+    return _dataset["end_month"]
+
+
+def _drain(transactions):
+    count = 0
+    for _ in transactions:
+        count += 1
+    return count
+
+
+# --- Ledger and budgets -------------------------------------------------------
+
+@benchmark("load_all_transactions")
+def _load_all_transactions(_):
+    from database.utils import load_all_transactions
+    return len(load_all_transactions())
+
+
+@benchmark("load_budgets")
+def _load_budgets(_):
+    from database.utils import load_budgets
+    return len(load_budgets(_end_month()))
+
+
+@benchmark("load_all_budgets")
+def _load_all_budgets(_):
+    from database.utils import load_all_budgets
+    return len(load_all_budgets())
+
+
+@benchmark("view_balance")
+def _view_balance(_):
+    from features.transactions.transactions import view_balance
+    view_balance()
+
+
+def _list_transactions(preset):
+    def run(_):
+        from database.query import parse_query
+        from features.transactions.transactions import FILTER_QUERIES
+        return _drain(parse_query(FILTER_QUERIES[preset]).iter_transactions(newest_first=True))
+    return run
+
+
+for _preset, _name in (("All", "all"), ("Last 7 Days", "last_7_days"), ("Only Expenses", "expenses"), ("Only Income", "income")):
+    benchmark(f"list_transactions.{_name}")(_list_transactions(_preset))
+
+
+@benchmark("list_transactions.first_page")
+def _list_first_page(_):
+    from database.query import parse_query
+    return _drain(islice(parse_query("").iter_transactions(newest_first=True), FIRST_PAGE_ROWS))
+
+
+@benchmark("query.pushdown")
+def _query_pushdown(_):
+    from database.query import parse_query
+    query = f"type:expense category:Food amount>500 date:{_end_month()[:4]}"
+    return _drain(parse_query(query).iter_transactions(newest_first=True))
+
+
+@benchmark("search.description")
+def _search_description(_):
+    from database.description_index import search_transactions
+    count, transactions = search_transactions("netflix OR spot*")
+    _drain(islice(transactions, FIRST_PAGE_ROWS))
+    return count
+
+
+@benchmark("view_budgets.month")
+def _view_month_budgets(_):
+    from features.budgets.budgets import view_month_budgets
+    view_month_budgets(_end_month())
+
+
+@benchmark("view_budgets.year")
+def _view_year_budgets(_):
+    from features.budgets.budgets import view_year_budgets
+    view_year_budgets(_end_month()[:4])
+
+
+# --- Analytics ----------------------------------------------------------------
+
+def _report(name):
+    def run(_):
+        from features.analytics import analytics
+        getattr(analytics, name)()
+    return run
+
+
+for _name in ("spending_analysis", "income_analysis", "savings_analysis", "financial_health_score", "generate_comprehensive_report"):
+    benchmark(f"analytics.{_name}")(_report(_name))
+
+
+@benchmark("analytics.daily_financial_check")
+def _daily_financial_check(_):
+    from features.smart_assistance.assistance import daily_financial_check
+    daily_financial_check()
+
+
+# --- Import and export --------------------------------------------------------
+
+def _export(name):
+    def run(scratch):
+        from database.utils import iter_transactions
+        from features.data_management import data_management
+        export = getattr(data_management, f"export_transactions_{name}")
+        return export(os.path.join(scratch, f"export.{name}"), iter_transactions())
+    return run
+
+
+for _name in ("csv", "json", "ndjson"):
+    benchmark(f"export.{_name}")(_export(_name))
+
+
+def _import_file(name):
+    def setup(data_dir, scratch):
+        return os.path.join(data_dir, f"import.{name}")
+
+    def run(path):
+        from features.data_management import data_management
+        imported, skipped = getattr(data_management, f"import_transactions_{name}")(path)
+        return imported + skipped
+    return setup, run
+
+
+for _name in ("csv", "json"):
+    _setup, _run = _import_file(_name)
+    benchmark(f"import.{_name}", setup=_setup, writes=True)(_run)
+
+
+# --- Backup and restore -------------------------------------------------------
+
+@benchmark("backup.full", writes=True)
+def _backup_full(_):
+    from features.data_management.data_management import create_backup
+    create_backup()
+
+
+@benchmark("backup.incremental", writes=True)
+def _backup_incremental(_):
+    from features.data_management.backup import create_incremental_backup
+    return create_incremental_backup()["id"]
+
+
+def _setup_restore_full(data_dir, scratch):
+    from features.data_management.data_management import create_backup
+    with _quiet():
+        create_backup()
+    return next(name for name in os.listdir(".") if name.startswith("finance_tracker_backup_"))
+
+
+@benchmark("restore.full", setup=_setup_restore_full, writes=True)
+def _restore_full(path):
+    from features.data_management.data_management import restore_from_backup
+    restore_from_backup(path)
+
+
+def _setup_restore_incremental(data_dir, scratch):
+    from features.data_management.backup import create_incremental_backup
+    with _quiet():
+        return create_incremental_backup()["id"]
+
+
+@benchmark("restore.incremental", setup=_setup_restore_incremental, writes=True)
+def _restore_incremental(backup_id):
+    from features.data_management.backup import restore_incremental_backup
+    return restore_incremental_backup(backup_id)
+
+
+@benchmark("rebuild_sidecars", writes=True)
+def _rebuild_sidecars(_):
+    from database.ledger import rebuild_sidecars
+    rebuild_sidecars()
+
+
+# --- Dashboard ----------------------------------------------------------------
+
+@benchmark("dashboard.load")
+def _dashboard_load(_):
+    from features.dashboard.data import load_dashboard_data
+    return len(load_dashboard_data().frame)
+
+
+@benchmark("dashboard.panels")
+def _dashboard_panels(_):
+    from features.dashboard.data import load_dashboard_data
+    data = load_dashboard_data()
+    month_year = _end_month()
+    data.month_totals(month_year)
+    data.spent_by_category(month_year)
+    data.recent_transactions()
+    return len(data.explore(types=("expense",), categories=("Food",), search="swiggy"))
+
+
+# --- Running ------------------------------------------------------------------
+
+@contextlib.contextmanager
+def _quiet():
+    """Discards what the app prints to stdout (its tables and progress) meanwhile."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def _max_rss_mb():
+    """Peak resident memory of this process in MB, where the platform reports it."""
+    try:
+        # Linux carries ru_maxrss over exec, so a child would report the parent's peak;
+        # VmHWM belongs to this process's own address space.
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1e3
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def _copy_dataset(data_dir, scratch):
+    """Copies the dataset's database directory into scratch and returns scratch."""
+    shutil.rmtree(scratch, ignore_errors=True)
+    os.makedirs(scratch)
+    shutil.copytree(os.path.join(data_dir, "database"), os.path.join(scratch, "database"))
+    return scratch
+
+
+def run_child(name, data_dir, runs, trace_memory):
+    """
+    Runs one benchmark runs times in this process, plus once more under tracemalloc with
+    trace_memory, and returns the raw measurements.
+    """
+    run, setup, writes = BENCHMARKS[name]
+    with open(os.path.join(data_dir, DATASET_FILE)) as f:
+        _dataset.update(json.load(f))
+    # Imported up front, so the first run's time and memory are the entry point's own.
+    for module in APP_MODULES:
+        importlib.import_module(module)
+
+    work_root = tempfile.mkdtemp(prefix="run-", dir=data_dir)
+    scratch = os.path.join(work_root, "scratch")
+    measured = {"runs_s": [], "result": None}
+    baseline = None
+    try:
+        for number in range(runs + (1 if trace_memory else 0)):
+            # The app resolves its files relative to the working directory.
+            if writes:
+                os.chdir(_copy_dataset(data_dir, scratch))
+            else:
+                os.makedirs(scratch, exist_ok=True)
+                os.chdir(data_dir)
+            argument = setup(data_dir, scratch) if setup is not None else scratch
+            if baseline is None:
+                baseline = _max_rss_mb()
+            tracing = number == runs
+            if tracing:
+                tracemalloc.start()
+            started = time.perf_counter()
+            with _quiet():
+                result = run(argument)
+            elapsed = time.perf_counter() - started
+            if tracing:
+                measured["traced_peak_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+                tracemalloc.stop()
+            else:
+                measured["runs_s"].append(elapsed)
+            if result is None or isinstance(result, (int, float, str, bool)):
+                measured["result"] = result
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(work_root, ignore_errors=True)
+
+    peak = _max_rss_mb()
+    measured["peak_rss_mb"] = peak
+    measured["rss_growth_mb"] = None if peak is None else peak - baseline
+    return measured
+
+
+def _spawn_child(name, data_dir, runs, trace_memory):
+    """Runs a benchmark in a new process; returns its measurements or raises RuntimeError."""
+    # Closed before the child opens it: Windows will not open a file twice.
+    descriptor, result_path = tempfile.mkstemp(suffix=".json")
+    os.close(descriptor)
+    try:
+        command = [
+            sys.executable, "-m", "benchmarks.harness", "_child", name, data_dir, result_path,
+            "--runs", str(runs)
+        ] + (["--trace-memory"] if trace_memory else [])
+        finished = subprocess.run(command, cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if finished.returncode != 0:
+            lines = finished.stderr.strip().splitlines()
+            raise RuntimeError(lines[-1] if lines else f"exit code {finished.returncode}")
+        with open(result_path) as f:
+            return json.load(f)
+    finally:
+        os.remove(result_path)
+
+
+def measure(name, data_dir, repeat, trace_memory):
+    """
+    Times a benchmark repeat times and returns its results. A read-only benchmark runs
+    in one new process, so its first run is cold and median_s is of the warm runs after
+    it. One that writes gets a new process and a fresh copy of the dataset per run, so
+    every run is cold and median_s is of all of them. The tracemalloc run, if any, also
+    runs cold in its own process.
+    """
+    _, _, writes = BENCHMARKS[name]
+    if writes:
+        children = [_spawn_child(name, data_dir, 1, False) for _ in range(repeat)]
+    else:
+        children = [_spawn_child(name, data_dir, repeat, False)]
+    runs = [elapsed for child in children for elapsed in child["runs_s"]]
+    timed = runs if writes or len(runs) == 1 else runs[1:]
+    peaks = [child["peak_rss_mb"] for child in children if child["peak_rss_mb"] is not None]
+    results = {
+        "first_s": runs[0],
+        "median_s": statistics.median(timed),
+        "min_s": min(timed),
+        "runs_s": runs,
+        "peak_rss_mb": max(peaks) if peaks else None,
+        "rss_growth_mb": max(child["rss_growth_mb"] for child in children) if peaks else None,
+        "result": children[-1]["result"]
+    }
+    if trace_memory:
+        results["traced_peak_mb"] = _spawn_child(name, data_dir, 0, True)["traced_peak_mb"]
+    return results
+
+
+def prepare_dataset(rows, seed, years, end_month, data_dir=None):
+    """
+    Returns (data_dir, settings) of a generated dataset, generating it and building its
+    sidecar files unless data_dir already holds one made with the same settings.
+    """
+    end_month = end_month or current_month()
+    data_dir = os.path.abspath(data_dir or os.path.join(DATA_ROOT, f"{rows}-seed{seed}-{years}y-{end_month}"))
+    manifest_path = os.path.join(data_dir, DATASET_FILE)
+    try:
+        with open(manifest_path) as f:
+            settings = json.load(f)
+        if (settings["rows"], settings["seed"], settings["years"], settings["end_month"]) == (rows, seed, years, end_month):
+            return data_dir, settings
+    except (FileNotFoundError, ValueError, KeyError):
+        pass
+
+    shutil.rmtree(os.path.join(data_dir, "database"), ignore_errors=True)
+    console.print(f"[cyan]Generating {rows:,} transactions under {data_dir}...[/cyan]")
+    started = time.perf_counter()
+    settings = write_ledger(data_dir, rows, seed, years, end_month)
+    # Import files are another history of the same shape, so most of their rows are new.
+    import_rows = max(1000, int(rows * IMPORT_SHARE))
+    import_dir = os.path.join(data_dir, "import")
+    write_ledger(import_dir, import_rows, seed + 1, years, end_month)
+    _write_import_files(os.path.join(import_dir, "database", "transactions.txt"), data_dir)
+    shutil.rmtree(import_dir)
+    settings["import_rows"] = import_rows
+    settings["generate_s"] = time.perf_counter() - started
+
+    # Built once here, so no benchmark pays for (or times) a first-time sidecar build.
+    subprocess.run([sys.executable, "-m", "benchmarks.harness", "_prepare", data_dir], cwd=REPO_ROOT, check=True)
+    with open(manifest_path, "w") as f:
+        json.dump(settings, f, indent=4)
+    return data_dir, settings
+
+
+def _write_import_files(ledger_path, data_dir):
+    """Writes a ledger file out as the CSV and JSON files the importers read."""
+    import csv
+    from database.utils import LEDGER_FIELDS, parse_transaction_dict
+    with open(ledger_path, encoding="utf-8") as source, \
+            open(os.path.join(data_dir, "import.csv"), "w", newline="", encoding="utf-8") as csv_file, \
+            open(os.path.join(data_dir, "import.json"), "w", encoding="utf-8") as json_file:
+        writer = csv.DictWriter(csv_file, fieldnames=LEDGER_FIELDS)
+        writer.writeheader()
+        json_file.write("[")
+        for number, line in enumerate(source):
+            transaction = parse_transaction_dict(line)
+            writer.writerow(transaction)
+            json_file.write(("," if number else "") + "\n" + json.dumps(transaction))
+        json_file.write("\n]")
+
+
+def _environment():
+    from database.utils import durability, storage_format
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "storage_format": storage_format(),
+        "durability": durability()[0]
+    }
+
+
+def run_benchmarks(args):
+    names = [name for name in BENCHMARKS if any(fnmatch.fnmatch(name, pattern) for pattern in args.only)]
+    if not names:
+        console.print(f"[red]No benchmark matches {' '.join(args.only)}. Known: {', '.join(BENCHMARKS)}[/red]")
+        return 2
+
+    data_dir, settings = prepare_dataset(args.rows, args.seed, args.years, args.end_month, args.data_dir)
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "environment": _environment(),
+        "dataset": settings,
+        "repeat": args.repeat,
+        "benchmarks": {}
+    }
+
+    table = Table(title=f"Benchmarks: {settings['rows']:,} transactions")
+    table.add_column("Benchmark", style="cyan", no_wrap=True)
+    table.add_column("First (s)", justify="right")
+    table.add_column("Median (s)", justify="right")
+    table.add_column("Peak RSS (MB)", justify="right")
+    table.add_column("Growth (MB)", justify="right")
+
+    for name in names:
+        with console.status(f"Running {name}..."):
+            try:
+                measured = measure(name, data_dir, args.repeat, args.trace_memory)
+            except RuntimeError as e:
+                results["benchmarks"][name] = {"error": str(e)}
+                table.add_row(name, f"[red]failed: {e}[/red]", "", "", "")
+                continue
+        results["benchmarks"][name] = measured
+        table.add_row(
+            name,
+            f"{measured['first_s']:.3f}",
+            f"{measured['median_s']:.3f}",
+            "" if measured["peak_rss_mb"] is None else f"{measured['peak_rss_mb']:,.0f}",
+            "" if measured["rss_growth_mb"] is None else f"{measured['rss_growth_mb']:,.0f}"
+        )
+
+    console.print(table)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{settings['rows']}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=4)
+    console.print(f"[green]Results written to {output}[/green]")
+    return 1 if any("error" in measured for measured in results["benchmarks"].values()) else 0
+
+
+def compare_results(args):
+    """Prints how each benchmark's time and memory changed from one results file to another."""
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline["dataset"]["rows"] != current["dataset"]["rows"]:
+        console.print("[yellow]The runs used datasets of different sizes.[/yellow]")
+
+    table = Table(title=f"{os.path.basename(args.baseline)} -> {os.path.basename(args.current)}")
+    table.add_column("Benchmark", style="cyan", no_wrap=True)
+    table.add_column(f"{args.metric} (s)", justify="right")
+    table.add_column("Change", justify="right")
+    table.add_column("Peak RSS (MB)", justify="right")
+    table.add_column("Change", justify="right")
+
+    regressions = 0
+    for name, measured in current["benchmarks"].items():
+        before = baseline["benchmarks"].get(name)
+        if before is None or "error" in before or "error" in measured:
+            table.add_row(name, "", "not comparable", "", "")
+            continue
+        cells = [name]
+        for key, unit, floor in ((args.metric, "{:.3f}", args.min_seconds), ("peak_rss_mb", "{:,.0f}", 0)):
+            old, new = before.get(key), measured.get(key)
+            if not old or new is None:
+                cells += ["", ""]
+                continue
+            change = new / old - 1
+            if max(old, new) < floor:
+                # Too quick to time reliably either way.
+                style = "dim"
+            else:
+                style = "red" if change > args.threshold else "green" if change < -args.threshold else "white"
+                regressions += change > args.threshold
+            cells += [f"{unit.format(old)} -> {unit.format(new)}", f"[{style}]{change:+.0%}[/{style}]"]
+        table.add_row(*cells)
+    console.print(table)
+    if regressions:
+        console.print(f"[red]{regressions} measurements grew by more than {args.threshold:.0%}.[/red]")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the finance tracker's entry points.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run benchmarks and write their results as JSON.")
+    run.add_argument("--rows", type=parse_rows, default=parse_rows("100K"), help="Ledger size, e.g. 10K, 1M or 50M (default: 100K).")
+    run.add_argument("--seed", type=int, default=42, help="Random seed of the dataset (default: 42).")
+    run.add_argument("--years", type=int, default=3, help="Years of history (default: 3).")
+    run.add_argument("--end-month", help="Last month of the history, YYYY-MM in UTC (default: the current month, up to now).")
+    run.add_argument("--data-dir", help=f"Where the dataset is generated and kept (default: under {DATA_ROOT}).")
+    run.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark; the first is cold (default: 3).")
+    run.add_argument("--only", nargs="+", default=["*"], metavar="PATTERN", help="Run only benchmarks matching these patterns, e.g. 'analytics.*'.")
+    run.add_argument("--trace-memory", action="store_true", help="Add an untimed cold run measuring the peak of Python allocations.")
+    run.add_argument("--output", help=f"Results file (default: a new file in {RESULTS_DIR}).")
+
+    compare = commands.add_parser("compare", help="Compare two results files.")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--metric", choices=["median_s", "min_s", "first_s"], default="median_s")
+    compare.add_argument("--threshold", type=float, default=0.1, help="Relative growth reported as a regression (default: 0.1).")
+    compare.add_argument("--min-seconds", type=float, default=0.01, help="Times below this are never regressions (default: 0.01).")
+
+    commands.add_parser("list", help="List the benchmarks.")
+
+    # Internal: what the run command starts in a fresh process.
+    child = commands.add_parser("_child")
+    child.add_argument("name")
+    child.add_argument("data_dir")
+    child.add_argument("result_file")
+    child.add_argument("--runs", type=int, default=1)
+    child.add_argument("--trace-memory", action="store_true")
+    prepare = commands.add_parser("_prepare")
+    prepare.add_argument("data_dir")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        return run_benchmarks(args)
+    if args.command == "compare":
+        return compare_results(args)
+    if args.command == "list":
+        for name in BENCHMARKS:
+            console.print(name)
+        return 0
+    if args.command == "_prepare":
+        from database.ledger import rebuild_sidecars
+        os.chdir(args.data_dir)
+        with _quiet():
+            rebuild_sidecars()
+        return 0
+    measured = run_child(args.name, args.data_dir, args.runs, args.trace_memory)
+    with open(args.result_file, "w") as f:
+        json.dump(measured, f)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
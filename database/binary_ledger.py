@@ -0,0 +1,349 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+from database.mapped import map_file, sync_files
+from database.utils import (
+    TYPE_NAMES,
+    CATEGORY_NAMES,
+    BINARY_TRANSACTIONS_FILE,
+    BINARY_STRINGS_FILE
+)
+
+# File layout of transactions.bin:
+#   header (HEADER_SIZE bytes): magic, format version, record size, then the JSON list of
+#   type and category names that the record codes index into, zero-padded.
+#   records (RECORD_SIZE bytes each, little-endian, no padding):
+#     timestamp f8 | amount_paisa i8 | description_offset u8 | description_length u4 | type u1 | category u1
+# Descriptions live in transactions.strings, a heap of UTF-8 bytes addressed by
+# (description_offset, description_length).
+MAGIC = b"PFTL"
+FORMAT_VERSION = 1
+HEADER_SIZE = 4096
+_HEADER = struct.Struct("<4sHHI")
+_RECORD = struct.Struct("<dqQIBB")
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("amount_paisa", "<i8"),
+    ("description_offset", "<u8"),
+    ("description_length", "<u4"),
+    ("type", "u1"),
+    ("category", "u1")
+])
+RECORD_SIZE = RECORD_DTYPE.itemsize
+# Codes are stored in one byte.
+MAX_NAMES = 256
+# Column comparisons of iter_raw's prefilter.
+_COMPARISONS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal
+}
+
+
+def encode_header(type_names, category_names):
+    names = json.dumps({"types": type_names, "categories": category_names}).encode("utf-8")
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, RECORD_SIZE, len(names)) + names
+    if len(header) > HEADER_SIZE:
+        raise ValueError("Too many distinct types or categories for the binary ledger header.")
+    return header.ljust(HEADER_SIZE, b"\0")
+
+
+def decode_header(data):
+    """Returns the (type_names, category_names) stored in a binary ledger header."""
+    magic, version, record_size, names_length = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a binary ledger file.")
+    if version != FORMAT_VERSION or record_size != RECORD_SIZE:
+        raise ValueError(f"Unsupported binary ledger version {version}.")
+    names = json.loads(bytes(data[_HEADER.size:_HEADER.size + names_length]))
+    return names["types"], names["categories"]
+
+
+def _code(names, name):
+    try:
+        return names.index(name)
+    except ValueError:
+        if len(names) >= MAX_NAMES:
+            raise ValueError(f"Too many distinct names for the binary ledger: {name}")
+        names.append(name)
+        return len(names) - 1
+
+
+class BinaryLedgerFormat:
+    """
+    Fixed-width binary ledger: transactions.bin plus the transactions.strings heap.
+    Records are addressed by byte offsets in path, like lines in the text ledger.
+    """
+
+    name = "binary"
+    path = BINARY_TRANSACTIONS_FILE
+    strings_path = BINARY_STRINGS_FILE
+    data_start = HEADER_SIZE
+
+    def __init__(self):
+        self.type_names = list(TYPE_NAMES)
+        self.category_names = list(CATEGORY_NAMES)
+
+    def _load_header(self):
+        try:
+            with open(self.path, "rb") as f:
+                self.type_names, self.category_names = decode_header(f.read(HEADER_SIZE))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def begin(self, data):
+        """Prepares to decode records from data, a buffer holding the whole ledger file."""
+        if len(data) >= HEADER_SIZE:
+            self.type_names, self.category_names = decode_header(data)
+
+    def complete_end(self, data, start, end):
+        """Offset just past the last complete record in data[start:end]."""
+        return start + max(0, end - start) // RECORD_SIZE * RECORD_SIZE
+
+    def record_spans(self, data, start, end):
+        """Yields (record_start, record_end) for each complete record in data[start:end]."""
+        for record_start in range(start, end - RECORD_SIZE + 1, RECORD_SIZE):
+            yield record_start, record_start + RECORD_SIZE
+
+    def decode(self, data, start, end, positions, strings=None):
+        """
+        Decodes selected fields (indexes into LEDGER_FIELDS) of the record data[start:end].
+        The description (position 3) needs the strings heap buffer.
+        """
+        timestamp, amount_paisa, description_offset, description_length, type_code, category_code = (
+            _RECORD.unpack_from(data, start)
+        )
+        values = []
+        for position in positions:
+            if position == 0:
+                values.append(timestamp)
+            elif position == 1:
+                values.append(self.type_names[type_code])
+            elif position == 2:
+                values.append(self.category_names[category_code])
+            elif position == 3:
+                values.append(bytes(strings[description_offset:description_offset + description_length]).decode("utf-8"))
+            else:
+                values.append(amount_paisa)
+        return tuple(values)
+
+    def raw_fields(self, strings=None):
+        """
+        Returns, per field (by LEDGER_FIELDS position), how to read it from a raw record r
+        of iter_raw (the unpacked struct, with names and descriptions still as codes and
+        offsets): (index, convert), the field being convert(r[index]). Descriptions are
+        read from strings, the mapped heap. Call after begin().
+        """
+        def description(span):
+            offset, length = span
+            return bytes(strings[offset:offset + length]).decode()
+
+        return (
+            (0, float),
+            (4, self.type_names.__getitem__),
+            (5, self.category_names.__getitem__),
+            (slice(2, 4), description),
+            (1, int)
+        )
+
+    def iter_raw(self, data, start, end, prefilter=()):
+        """
+        Yields (raw, record_start, record_end) for each complete record in data[start:end],
+        with its fields left undecoded (see raw_fields), so a filter converts only what it checks.
+
+        prefilter (see Query.prefilter) is run over the records' columns with NumPy first,
+        so only records passing every condition are unpacked; the caller still checks them.
+        """
+        unpack_from = _RECORD.unpack_from
+        count = max(0, end - start) // RECORD_SIZE
+        if not prefilter or not count:
+            offsets = range(start, start + count * RECORD_SIZE, RECORD_SIZE)
+        else:
+            records = np.frombuffer(data, dtype=RECORD_DTYPE, count=count, offset=start)
+            mask = np.ones(count, dtype=bool)
+            for field, comparison, value in prefilter:
+                column = records[field]
+                if comparison == "in":
+                    # Names are compared by their codes; types case-insensitively.
+                    if field == "type":
+                        codes = [code for code, name in enumerate(self.type_names) if name.lower() in value]
+                    else:
+                        codes = [code for code, name in enumerate(self.category_names) if name in value]
+                    mask &= np.isin(column, codes)
+                else:
+                    mask &= _COMPARISONS[comparison](column, value)
+            offsets = (start + np.flatnonzero(mask) * RECORD_SIZE).tolist()
+        for record_start in offsets:
+            yield unpack_from(data, record_start), record_start, record_start + RECORD_SIZE
+
+    def descriptions(self, data, base_offset, records):
+        """
+        Returns the descriptions of records [(fields, record_start, record_end), ...] held in
+        data, whose first byte sits at base_offset in the ledger, from the strings heap.
+        """
+        if not records:
+            return []
+        descriptions = []
+        with map_file(self.strings_path) as strings:
+            for _, record_start, _ in records:
+                _, _, description_offset, description_length, _, _ = _RECORD.unpack_from(data, record_start - base_offset)
+                descriptions.append(
+                    bytes(strings[description_offset:description_offset + description_length]).decode("utf-8")
+                )
+        return descriptions
+
+    def _encode(self, transactions, heap_base):
+        records = bytearray()
+        strings = bytearray()
+        for t in transactions:
+            description = str(t['description']).encode("utf-8")
+            records += _RECORD.pack(
+                float(t['timestamp']),
+                int(t['amount_paisa']),
+                heap_base + len(strings),
+                len(description),
+                _code(self.type_names, str(t['type'])),
+                _code(self.category_names, str(t['category']))
+            )
+            strings += description
+        return bytes(records), bytes(strings)
+
+    def append(self, transactions, sync=False):
+        """
+        Appends transaction dicts to the ledger, fsyncing both files if sync is set.
+        Returns (base_offset, data, records): the record bytes written, where they start in
+        the file, and [(fields, record_start, record_end), ...] for each record, with fields
+        as (timestamp, type, category, amount_paisa) and ledger offsets.
+        """
+        exists = self._load_header()
+        names_before = (len(self.type_names), len(self.category_names))
+        with open(self.strings_path, "ab") as f:
+            heap_base = f.tell()
+            records, strings = self._encode(transactions, heap_base)
+            if not records:
+                return None, b"", []
+            # Descriptions go first, so a record never points past the end of the heap.
+            f.write(strings)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+
+        with open(self.path, "r+b" if exists else "wb") as f:
+            if not exists or names_before != (len(self.type_names), len(self.category_names)):
+                f.write(encode_header(self.type_names, self.category_names))
+            f.seek(0, os.SEEK_END)
+            base_offset = f.tell()
+            f.write(records)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        decoded = [
+            ((float(t['timestamp']), str(t['type']), str(t['category']), int(t['amount_paisa'])),
+             base_offset + i * RECORD_SIZE, base_offset + (i + 1) * RECORD_SIZE)
+            for i, t in enumerate(transactions)
+        ]
+        return base_offset, records, decoded
+
+    def sync(self):
+        """Forces everything written to the ledger so far onto disk."""
+        sync_files(self.strings_path, self.path)
+
+    def write_replacement(self, transactions, chunk_size=10000):
+        """
+        Writes a replacement ledger (records and strings heap) from an iterable of
+        transaction dicts next to the live files, and syncs it to disk.
+        install_replacement() swaps it in; discard_replacement() drops it.
+        Returns the count written.
+        """
+        self.type_names = list(TYPE_NAMES)
+        self.category_names = list(CATEGORY_NAMES)
+        count = 0
+        with open(self.path + ".tmp", "wb") as records_file, open(self.strings_path + ".tmp", "wb") as strings_file:
+            records_file.write(b"\0" * HEADER_SIZE)
+            chunk = []
+            for t in transactions:
+                chunk.append(t)
+                if len(chunk) == chunk_size:
+                    count += self._write_chunk(chunk, records_file, strings_file)
+                    chunk = []
+            count += self._write_chunk(chunk, records_file, strings_file)
+            records_file.seek(0)
+            records_file.write(encode_header(self.type_names, self.category_names))
+            for f in (records_file, strings_file):
+                f.flush()
+                os.fsync(f.fileno())
+        return count
+
+    def install_replacement(self):
+        """Renames the replacement written by write_replacement() over the ledger files."""
+        os.replace(self.strings_path + ".tmp", self.strings_path)
+        os.replace(self.path + ".tmp", self.path)
+
+    def discard_replacement(self):
+        """Removes an uninstalled replacement, e.g. after a failed restore."""
+        for path in (self.path + ".tmp", self.strings_path + ".tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+        # write_replacement() started the name tables over; go back to the live ledger's.
+        self.type_names = list(TYPE_NAMES)
+        self.category_names = list(CATEGORY_NAMES)
+        self._load_header()
+
+    def replace(self, transactions, chunk_size=10000):
+        """Replaces the whole ledger with an iterable of transaction dicts. Returns the count written."""
+        count = self.write_replacement(transactions, chunk_size)
+        self.install_replacement()
+        return count
+
+    def _write_chunk(self, chunk, records_file, strings_file):
+        records, strings = self._encode(chunk, strings_file.tell())
+        strings_file.write(strings)
+        records_file.write(records)
+        return len(chunk)
+
+    def iter_fields(self, positions, ranges=None):
+        """
+        Yields a tuple of the selected fields (indexes into LEDGER_FIELDS) for every
+        record in ranges (the whole file by default). Other fields are never decoded.
+        """
+        with map_file(self.path) as data, map_file(self.strings_path) as strings:
+            self.begin(data)
+            for start, end in ranges if ranges is not None else [(HEADER_SIZE, len(data))]:
+                start = max(start, HEADER_SIZE)
+                for record_start, record_end in self.record_spans(data, start, min(end, len(data))):
+                    yield self.decode(data, record_start, record_end, positions, strings)
+
+    def iter_range_records(self, ranges):
+        """Yields (timestamp, type, category, description, amount_paisa) for the records in ranges."""
+        with map_file(self.path) as data, map_file(self.strings_path) as strings:
+            self.begin(data)
+            for start, end in ranges:
+                start = max(start, HEADER_SIZE)
+                for record_start, record_end in self.record_spans(data, start, end):
+                    yield self.decode(data, record_start, record_end, (0, 1, 2, 3, 4), strings)
+
+    def load_columns(self):
+        """
+        Reads the whole ledger as NumPy columns, without parsing individual records.
+        Returns (records, strings, type_names, category_names); records is a structured
+        array of RECORD_DTYPE and strings the raw description heap.
+        """
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return np.empty(0, dtype=RECORD_DTYPE), b"", list(TYPE_NAMES), list(CATEGORY_NAMES)
+        self._load_header()
+        count = max(0, size - HEADER_SIZE) // RECORD_SIZE
+        records = np.fromfile(self.path, dtype=RECORD_DTYPE, count=count, offset=HEADER_SIZE)
+        try:
+            with open(self.strings_path, "rb") as f:
+                strings = f.read()
+        except FileNotFoundError:
+            strings = b""
+        return records, strings, self.type_names, self.category_names
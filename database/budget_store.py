@@ -0,0 +1,116 @@
+import os
+from datetime import datetime
+
+from database import sqlite_store
+from database.cache import IncrementalFileCache, invalidate_caches
+from database.utils import console, storage_format, BUDGETS_FILE
+
+# budgets.txt is an append log of "YYYY-MM,category,amount_paisa" lines in which the last
+# line for a (month, category) wins. Once it holds more than this many lines and over half
+# of them are superseded, set_budget() compacts it.
+BUDGET_COMPACTION_MIN_LINES = 1000
+
+
+def _new_state():
+    return {"months": {}, "lines": 0}
+
+
+def _add_budget_line(state, line):
+    state["lines"] += 1
+    parts = line.strip().split(',')
+    if len(parts) == 3:
+        month_year, category, amount_paisa = parts
+        try:
+            state["months"].setdefault(month_year, {})[category] = int(amount_paisa)
+        except ValueError:
+            pass
+
+
+# The in-memory index: {month_year: {category: amount_paisa}}, kept for the whole process
+# and only fed the lines appended since the last lookup.
+_budgets_cache = IncrementalFileCache(
+    BUDGETS_FILE,
+    new_state=_new_state,
+    consume=_add_budget_line,
+    build=lambda state: state
+)
+
+
+def _index():
+    try:
+        return _budgets_cache.get()
+    except Exception as e:
+        console.print(f"Error loading budgets: {e}")
+        _budgets_cache.invalidate()
+        return _new_state()
+
+
+def load_budgets(month_year=None):
+    """
+    Returns the budgets of a "YYYY-MM" month (the current month by default) as a
+    dictionary: {category: amount_paisa}
+    """
+    if month_year is None:
+        month_year = datetime.now().strftime("%Y-%m")
+    if storage_format() == "sqlite":
+        return sqlite_store.load_budgets(month_year)
+    return dict(_index()["months"].get(month_year, {}))
+
+
+def load_budget_range(start_month, end_month):
+    """
+    Returns the budgets of every month from start_month to end_month ("YYYY-MM", both
+    included) that has any: {month_year: {category: amount_paisa}}, in month order.
+    """
+    if storage_format() == "sqlite":
+        return sqlite_store.load_budget_range(start_month, end_month)
+    months = _index()["months"]
+    return {
+        month_year: dict(months[month_year])
+        for month_year in sorted(months)
+        if start_month <= month_year <= end_month
+    }
+
+
+def load_all_budgets():
+    """Returns the budgets of every month: {month_year: {category: amount_paisa}}"""
+    if storage_format() == "sqlite":
+        return sqlite_store.load_all_budgets()
+    return {month_year: dict(budgets) for month_year, budgets in _index()["months"].items()}
+
+
+def set_budget(month_year, category, amount_paisa):
+    """
+    Sets (or replaces) the budget of a category for a "YYYY-MM" month by appending one
+    line to budgets.txt, compacting the file once it is mostly superseded lines.
+    """
+    if storage_format() == "sqlite":
+        sqlite_store.set_budget(month_year, category, amount_paisa)
+        return
+    with open(BUDGETS_FILE, "a") as f:
+        f.write(f"{month_year},{category},{amount_paisa}\n")
+
+    state = _index()
+    live = sum(len(budgets) for budgets in state["months"].values())
+    if state["lines"] > BUDGET_COMPACTION_MIN_LINES and state["lines"] > 2 * live:
+        compact_budgets()
+
+
+def compact_budgets():
+    """
+    Rewrites budgets.txt with only the live budget of each (month, category), in month
+    order, and swaps it in atomically. Returns the number of lines written.
+    """
+    months = _index()["months"]
+    temp_path = BUDGETS_FILE + ".tmp"
+    count = 0
+    with open(temp_path, "w") as f:
+        for month_year in sorted(months):
+            for category, amount_paisa in months[month_year].items():
+                f.write(f"{month_year},{category},{amount_paisa}\n")
+                count += 1
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, BUDGETS_FILE)
+    invalidate_caches(BUDGETS_FILE)
+    return count
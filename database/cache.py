@@ -0,0 +1,92 @@
+import os
+
+from database.mapped import map_file, iter_line_spans
+
+# Bytes remembered from just before the parsed offset. If they differ on the next
+# refresh, the file was rewritten rather than appended to.
+FINGERPRINT_SIZE = 64
+
+_caches = []
+
+
+class IncrementalFileCache:
+    """
+    Process-wide cache of a parsed, append-only text file.
+
+    The cache remembers how far into the file it has parsed together with the file's
+    inode, size and mtime. On the next get() it only parses the newly appended tail.
+    A full reload happens when the file was truncated, replaced or rewritten in place.
+
+    new_state() creates an empty parse state, consume(state, line) adds one line to it,
+    and build(state) turns the state into the value handed to callers. build() is only
+    called again after the file changed.
+    """
+
+    def __init__(self, path, new_state, consume, build):
+        self.path = path
+        self.new_state = new_state
+        self.consume = consume
+        self.build = build
+        self._reset()
+        _caches.append(self)
+
+    def _reset(self):
+        self.state = self.new_state()
+        self.identity = None
+        self.offset = 0
+        self.fingerprint = b""
+        self.ends_with_newline = True
+        self.value = None
+
+    def invalidate(self):
+        """Drops everything parsed so far; the next get() does a full reload."""
+        self._reset()
+
+    def _is_append(self, stat, data):
+        if self.identity is None:
+            return False
+        inode, device, size, _ = self.identity
+        if (stat.st_ino, stat.st_dev) != (inode, device) or stat.st_size < size:
+            return False
+        if stat.st_size == size or not self.ends_with_newline:
+            # Same size but a new mtime means the file was rewritten in place.
+            return False
+        return data[self.offset - len(self.fingerprint):self.offset] == self.fingerprint
+
+    def get(self):
+        """Returns the built value for the current contents of the file."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self.identity is not None or self.value is None:
+                self._reset()
+                self.value = self.build(self.state)
+            return self.value
+
+        identity = (stat.st_ino, stat.st_dev, stat.st_size, stat.st_mtime_ns)
+        if identity == self.identity and self.value is not None:
+            return self.value
+
+        # The file is memory-mapped and only the new lines are decoded, one at a time.
+        with map_file(self.path) as data:
+            if not self._is_append(stat, data):
+                self._reset()
+            end = min(stat.st_size, len(data))
+            if end > self.offset:
+                for line_start, line_end in iter_line_spans(data, self.offset, end):
+                    self.consume(self.state, data[line_start:line_end].decode("utf-8"))
+                recent = data[max(self.offset, end - FINGERPRINT_SIZE):end]
+                self.fingerprint = (self.fingerprint + recent)[-FINGERPRINT_SIZE:]
+                self.ends_with_newline = data[end - 1:end] == b"\n"
+                self.offset = end
+
+        self.identity = identity
+        self.value = self.build(self.state)
+        return self.value
+
+
+def invalidate_caches(path):
+    """Forces a full reload of every cache over path, e.g. after a restore."""
+    for cache in _caches:
+        if cache.path == path:
+            cache.invalidate()
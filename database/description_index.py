@@ -0,0 +1,278 @@
+import base64
+import re
+import threading
+from bisect import bisect_left
+from contextlib import nullcontext
+from itertools import chain
+
+import numpy as np
+
+from database import sqlite_store
+from database.formats import get_ledger_format
+from database.mapped import map_file
+from database.sidecar import LedgerSidecar
+from database.utils import DESCRIPTION_INDEX_FILE, LEDGER_FIELDS, storage_format
+
+# Postings added since the last merge live in a dict of lists; past this many they are
+# merged into the sorted arrays.
+MERGE_THRESHOLD = 1 << 20
+
+SEARCH_HELP = (
+    "Words are matched whole and all must appear, e.g. netflix or uber eats.\n"
+    "  OR between words matches either side: netflix OR spotify\n"
+    "  A trailing * matches words starting with it: net*"
+)
+
+# Words are runs of letters and digits, as SQLite's unicode61 tokenizer splits them.
+_WORD = re.compile(r"[^\W_]+")
+
+
+def tokenize(text):
+    """Splits text into the lowercase words the description index maps to records."""
+    return _WORD.findall(text.lower())
+
+
+class SearchError(ValueError):
+    """A description search with nothing to search for."""
+
+
+def parse_search(text):
+    """
+    Parses a description search (see SEARCH_HELP) into groups that are ORed together, each
+    a list of (word, is_prefix) that must all match.
+    """
+    groups = [[]]
+    for part in (text or "").split():
+        if part.upper() == "OR":
+            groups.append([])
+            continue
+        if part.upper() == "AND":
+            continue
+        words = tokenize(part)
+        for number, word in enumerate(words):
+            # uber-eats* is uber followed by a word starting with eats.
+            groups[-1].append((word, part.endswith("*") and number == len(words) - 1))
+    groups = [group for group in groups if group]
+    if not groups:
+        raise SearchError("Enter at least one word to search for.")
+    return groups
+
+
+def _fts_match(groups):
+    """The FTS5 MATCH expression of parsed search groups."""
+    return " OR ".join(
+        "(" + " AND ".join(f'"{word}"' + ("*" if prefix else "") for word, prefix in group) + ")"
+        for group in groups
+    )
+
+
+class DescriptionIndex(LedgerSidecar):
+    """
+    Sidecar inverted index of the words in transaction descriptions.
+
+    Every well-formed record is a document, numbered in ledger order; offsets and
+    timestamps give each document's ledger offset and time. The vocabulary is sorted and
+    the postings (document numbers, ascending) of all its words sit in one array sliced
+    by starts, so a word is a binary search and the words sharing a prefix are one
+    contiguous slice. Words of documents added since the last merge are kept in recent.
+    """
+
+    path = DESCRIPTION_INDEX_FILE
+    version = 1
+    description = "description index"
+
+    def clear_data(self):
+        self.vocabulary = []
+        self.starts = np.zeros(1, dtype=np.int64)
+        self.postings = np.empty(0, dtype=np.uint32)
+        self.recent = {}
+        self.recent_count = 0
+        self.offsets = np.empty(0, dtype=np.uint64)
+        self.timestamps = np.empty(0, dtype=np.float64)
+        self.new_offsets = []
+        self.new_timestamps = []
+
+    def __len__(self):
+        return len(self.offsets) + len(self.new_offsets)
+
+    def add_decoded(self, records, data, base_offset, start, consumed_end):
+        # The sidecar fields leave descriptions out, so they are read from the ledger here.
+        if consumed_end <= start:
+            return 0
+        self.add_documents(records, self.format.descriptions(data, base_offset, records))
+        return self.advance(data, base_offset, start, consumed_end)
+
+    def add_documents(self, records, descriptions):
+        """Adds records [(fields, record_start, record_end), ...] with their descriptions."""
+        document = len(self)
+        recent = self.recent
+        for (fields, record_start, _), description in zip(records, descriptions):
+            self.new_offsets.append(record_start)
+            self.new_timestamps.append(fields[0])
+            words = set(tokenize(description))
+            for word in words:
+                postings = recent.get(word)
+                if postings is None:
+                    recent[word] = [document]
+                else:
+                    postings.append(document)
+            self.recent_count += len(words)
+            document += 1
+        if self.recent_count > MERGE_THRESHOLD:
+            self._merge()
+
+    def _merge_documents(self):
+        if self.new_offsets:
+            self.offsets = np.concatenate([self.offsets, np.array(self.new_offsets, dtype=np.uint64)])
+            self.timestamps = np.concatenate([self.timestamps, np.array(self.new_timestamps, dtype=np.float64)])
+            self.new_offsets = []
+            self.new_timestamps = []
+
+    def _merge(self):
+        """Merges the recent postings into the sorted vocabulary and postings arrays."""
+        if not self.recent:
+            return
+        vocabulary = sorted(set(self.vocabulary).union(self.recent))
+        ids = {word: number for number, word in enumerate(vocabulary)}
+        old_words = np.repeat(
+            np.fromiter((ids[word] for word in self.vocabulary), dtype=np.int64, count=len(self.vocabulary)),
+            np.diff(self.starts)
+        )
+        new_words = np.repeat(
+            np.fromiter((ids[word] for word in self.recent), dtype=np.int64, count=len(self.recent)),
+            [len(postings) for postings in self.recent.values()]
+        )
+        words = np.concatenate([old_words, new_words])
+        documents = np.concatenate([
+            self.postings,
+            np.fromiter(chain.from_iterable(self.recent.values()), dtype=np.uint32, count=len(new_words))
+        ])
+        # Stable: every merged document number is below the recent ones, so each word's
+        # postings stay ascending.
+        order = np.argsort(words, kind="stable")
+        self.vocabulary = vocabulary
+        self.postings = documents[order]
+        self.starts = np.searchsorted(words[order], np.arange(len(vocabulary) + 1)).astype(np.int64)
+        self.recent = {}
+        self.recent_count = 0
+
+    def documents_of(self, word, prefix=False):
+        """Returns the ascending document numbers of a word, or of every word it starts."""
+        vocabulary = self.vocabulary
+        low = bisect_left(vocabulary, word)
+        if prefix:
+            high = bisect_left(vocabulary, word + "\U0010ffff", low)
+            recent = [postings for recent_word, postings in self.recent.items() if recent_word.startswith(word)]
+        else:
+            high = low + 1 if low < len(vocabulary) and vocabulary[low] == word else low
+            recent = [self.recent[word]] if word in self.recent else []
+        documents = self.postings[self.starts[low]:self.starts[high]]
+        if recent:
+            documents = np.concatenate([documents, np.fromiter(chain.from_iterable(recent), dtype=np.uint32)])
+        # A word's postings are already ascending; several words' need merging.
+        return np.unique(documents) if prefix else documents
+
+    def search(self, groups):
+        """Returns the ledger offsets of the records matching parsed search groups, newest first."""
+        matches = np.empty(0, dtype=np.uint32)
+        for group in groups:
+            # Rarest word first, so the intersections shrink as early as possible.
+            postings = sorted((self.documents_of(word, prefix) for word, prefix in group), key=len)
+            documents = postings[0]
+            for other in postings[1:]:
+                if not len(documents):
+                    break
+                documents = np.intersect1d(documents, other, assume_unique=True)
+            matches = np.union1d(matches, documents)
+        self._merge_documents()
+        matches = matches.astype(np.int64)
+        # By time, then the last written first.
+        order = np.lexsort((matches, self.timestamps[matches]))[::-1]
+        return self.offsets[matches[order]]
+
+    def data_to_json(self):
+        self._merge_documents()
+        return {
+            "vocabulary": "\n".join(self.vocabulary),
+            "starts": base64.b64encode(self.starts.astype("<i8").tobytes()).decode("ascii"),
+            "postings": base64.b64encode(self.postings.astype("<u4").tobytes()).decode("ascii"),
+            "recent": self.recent,
+            "offsets": base64.b64encode(self.offsets.astype("<u8").tobytes()).decode("ascii"),
+            "timestamps": base64.b64encode(self.timestamps.astype("<f8").tobytes()).decode("ascii")
+        }
+
+    def data_from_json(self, data):
+        self.vocabulary = data["vocabulary"].split("\n") if data["vocabulary"] else []
+        self.starts = np.frombuffer(base64.b64decode(data["starts"]), dtype="<i8").astype(np.int64)
+        self.postings = np.frombuffer(base64.b64decode(data["postings"]), dtype="<u4").astype(np.uint32)
+        self.recent = data["recent"]
+        self.recent_count = sum(len(postings) for postings in self.recent.values())
+        self.offsets = np.frombuffer(base64.b64decode(data["offsets"]), dtype="<u8").astype(np.uint64)
+        self.timestamps = np.frombuffer(base64.b64decode(data["timestamps"]), dtype="<f8").astype(np.float64)
+        self.new_offsets = []
+        self.new_timestamps = []
+        if len(self.starts) != len(self.vocabulary) + 1 or len(self.offsets) != len(self.timestamps):
+            raise ValueError("Description index size mismatch")
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def load_description_index():
+    """
+    Returns the description index, caught up with the ledger. It is read from disk once
+    per process; later calls only add the records appended since, so repeated searches
+    (the CLI menu, the dashboard) cost no reload.
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = DescriptionIndex.load_current()
+        else:
+            # Not saved: the writer saves the index it keeps in step with its own appends,
+            # and any other process catches up from the ledger as this one just did.
+            _index.refresh()
+        return _index
+
+
+def rebuild_description_index():
+    """Rebuilds the description index from scratch and returns it."""
+    global _index
+    with _index_lock:
+        _index = DescriptionIndex.rebuild()
+        return _index
+
+
+def _iter_records(offsets):
+    fmt = get_ledger_format()
+    all_positions = tuple(range(len(LEDGER_FIELDS)))
+    try:
+        with map_file(fmt.path) as data, (
+            map_file(fmt.strings_path) if storage_format() == "binary" else nullcontext()
+        ) as strings:
+            fmt.begin(data)
+            heap = () if strings is None else (strings,)
+            for offset in offsets.tolist():
+                for record_start, record_end in fmt.record_spans(data, offset, len(data)):
+                    fields = fmt.decode(data, record_start, record_end, all_positions, *heap)
+                    if fields is not None:
+                        yield dict(zip(LEDGER_FIELDS, fields))
+                    break
+    except FileNotFoundError:
+        return
+
+
+def search_transactions(text):
+    """
+    Finds the transactions whose descriptions match a search (see SEARCH_HELP) through the
+    full-text index. Returns (count, transactions): the number of matches, and an iterator
+    of them as dicts, newest first, decoded only as they are consumed.
+    Raises SearchError when there is nothing to search for.
+    """
+    groups = parse_search(text)
+    if storage_format() == "sqlite":
+        count, rows = sqlite_store.search_descriptions(_fts_match(groups))
+        return count, (dict(zip(LEDGER_FIELDS, row)) for row in rows)
+    offsets = load_description_index().search(groups)
+    return len(offsets), _iter_records(offsets)
@@ -0,0 +1,234 @@
+import os
+
+from database.binary_ledger import BinaryLedgerFormat
+from database.mapped import map_file, iter_line_spans, sync_files
+from database.utils import (
+    decode_ledger_fields,
+    parse_transaction_dict,
+    parse_transaction_line,
+    storage_format,
+    TRANSACTIONS_FILE
+)
+
+
+# Fields every sidecar receives for a record: timestamp, type, category and amount_paisa.
+# The description is never needed, so it is never decoded.
+SIDECAR_POSITIONS = (0, 1, 2, 4)
+
+
+def format_transaction_line(transaction):
+    """Formats a transaction dict as one line of the transactions file."""
+    return (
+        f"{transaction['timestamp']},{transaction['type']},{transaction['category']},"
+        f"{transaction['description']},{transaction['amount_paisa']}\n"
+    )
+
+
+class TextLedgerFormat:
+    """
+    The comma-separated transactions.txt ledger, one transaction per line:
+    timestamp,type,category,description,amount_paisa
+
+    Every ledger format exposes the same methods, so the sidecar files and the readers in
+    database.ledger work on either format. Records are addressed by byte offsets in path.
+    """
+
+    name = "text"
+    path = TRANSACTIONS_FILE
+    data_start = 0
+
+    def begin(self, data):
+        """Prepares to decode records from data, a buffer holding the whole ledger file."""
+
+    def complete_end(self, data, start, end):
+        """Offset just past the last complete record in data[start:end]."""
+        return max(start, data.rfind(b"\n", start, end) + 1)
+
+    def record_spans(self, data, start, end):
+        """Yields (record_start, record_end) for each record, record_end including its newline."""
+        for line_start, line_end in iter_line_spans(data, start, end):
+            yield line_start, line_end + 1
+
+    def decode(self, data, start, end, positions):
+        """Decodes selected fields (indexes into LEDGER_FIELDS) of the record data[start:end]."""
+        if data[end - 1:end] == b"\n":
+            end -= 1
+        return decode_ledger_fields(data, start, end, positions)
+
+    def raw_fields(self, strings=None):
+        """
+        Returns, per field (by LEDGER_FIELDS position), how to read it from a raw record r
+        of iter_raw (the line's comma-separated bytes): (index, convert), the field being
+        convert(r[index]). A malformed number raises ValueError.
+        """
+        return ((0, float), (1, bytes.decode), (2, bytes.decode), (3, bytes.decode), (4, int))
+
+    def iter_raw(self, data, start, end, prefilter=()):
+        """
+        Yields (raw, record_start, record_end) for each record in data[start:end], with
+        its fields left undecoded (see raw_fields), so a filter converts only what it checks.
+        prefilter (see Query.prefilter) is a hint a format may use to skip records early;
+        lines have to be parsed to be compared, so here it is left to the caller's checks.
+        """
+        for line_start, line_end in iter_line_spans(data, start, end):
+            raw = data[line_start:line_end].split(b",")
+            if len(raw) == 5:
+                yield raw, line_start, line_end + 1
+
+    def descriptions(self, data, base_offset, records):
+        """
+        Returns the descriptions of well-formed records [(fields, record_start, record_end), ...]
+        held in data, whose first byte sits at base_offset in the ledger.
+        """
+        return [
+            data[record_start - base_offset:record_end - base_offset].split(b",")[3].decode("utf-8")
+            for _, record_start, record_end in records
+        ]
+
+    def append(self, transactions, sync=False):
+        """
+        Appends transaction dicts to the ledger in one write, fsyncing it if sync is set.
+        Returns (base_offset, data, records): the bytes written, where they start in the file,
+        and [(fields, record_start, record_end), ...] for the well-formed records among them,
+        with fields as SIDECAR_POSITIONS and ledger offsets.
+        """
+        lines = [format_transaction_line(t) for t in transactions]
+        encoded = [line.encode("utf-8") for line in lines]
+        data = b"".join(encoded)
+        if not data:
+            return None, b"", []
+        with open(self.path, "ab") as f:
+            base_offset = f.tell()
+            f.write(data)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+
+        records = []
+        position = base_offset
+        for t, line, raw in zip(transactions, lines, encoded):
+            timestamp = t['timestamp']
+            amount_paisa = t['amount_paisa']
+            if (
+                type(timestamp) in (float, int) and type(amount_paisa) is int
+                and line.count(",") == 4 and line.find("\n") == len(line) - 1
+            ):
+                # The line reads back as exactly these values, so it is not decoded again.
+                records.append(((float(timestamp), str(t['type']), str(t['category']), amount_paisa),
+                                position, position + len(raw)))
+            else:
+                for record_start, record_end in self.record_spans(raw, 0, len(raw)):
+                    fields = self.decode(raw, record_start, record_end, SIDECAR_POSITIONS)
+                    if fields is not None:
+                        records.append((fields, position + record_start, position + record_end))
+            position += len(raw)
+        return base_offset, data, records
+
+    def sync(self):
+        """Forces everything written to the ledger so far onto disk."""
+        sync_files(self.path)
+
+    def write_replacement(self, transactions):
+        """
+        Writes a replacement ledger from an iterable of transaction dicts next to the live
+        one, and syncs it to disk. install_replacement() swaps it in; discard_replacement()
+        drops it. Returns the count written.
+        """
+        count = 0
+        with open(self.path + ".tmp", "w", encoding="utf-8", newline="\n") as f:
+            for t in transactions:
+                f.write(format_transaction_line(t))
+                count += 1
+            f.flush()
+            os.fsync(f.fileno())
+        return count
+
+    def install_replacement(self):
+        """Atomically renames the replacement written by write_replacement() over the ledger."""
+        os.replace(self.path + ".tmp", self.path)
+
+    def discard_replacement(self):
+        """Removes an uninstalled replacement, e.g. after a failed restore."""
+        if os.path.exists(self.path + ".tmp"):
+            os.remove(self.path + ".tmp")
+
+    def replace(self, transactions):
+        """Replaces the whole ledger with an iterable of transaction dicts. Returns the count written."""
+        count = self.write_replacement(transactions)
+        self.install_replacement()
+        return count
+
+    def iter_fields(self, positions, ranges=None):
+        """
+        Yields a tuple of the selected fields (indexes into LEDGER_FIELDS) for every
+        well-formed record in ranges (the whole file by default). Other fields are never
+        decoded, and malformed lines are skipped silently.
+        """
+        with map_file(self.path) as data:
+            for start, end in ranges if ranges is not None else [(0, len(data))]:
+                for line_start, line_end in iter_line_spans(data, start, min(end, len(data))):
+                    record = decode_ledger_fields(data, line_start, line_end, positions)
+                    if record is not None:
+                        yield record
+
+    def iter_range_records(self, ranges):
+        """Yields (timestamp, type, category, description, amount_paisa) for the records in ranges."""
+        with open(self.path, "rb") as f:
+            for start, end in ranges:
+                f.seek(start)
+                for line in f.read(end - start).decode("utf-8").split("\n")[:-1]:
+                    parsed = parse_transaction_line(line)
+                    if parsed is not None:
+                        yield parsed
+
+
+def get_ledger_format():
+    """Returns the ledger format selected by STORAGE_FORMAT in database/utils.py."""
+    if storage_format() == "binary":
+        return BinaryLedgerFormat()
+    return TextLedgerFormat()
+
+
+def iter_text_transactions():
+    """Yields every well-formed line of transactions.txt as a transaction dict, in file order."""
+    try:
+        with map_file(TRANSACTIONS_FILE) as data:
+            for start, end in iter_line_spans(data):
+                transaction = parse_transaction_dict(data[start:end].decode("utf-8"))
+                if transaction is not None:
+                    yield transaction
+    except FileNotFoundError:
+        return
+
+
+def iter_binary_transactions():
+    """Yields every record of the binary ledger as a transaction dict, in file order."""
+    binary = BinaryLedgerFormat()
+    try:
+        size = os.path.getsize(binary.path)
+    except FileNotFoundError:
+        return
+    for timestamp, trans_type, category, description, amount_paisa in binary.iter_range_records([[0, size]]):
+        yield {
+            "timestamp": timestamp,
+            "type": trans_type,
+            "category": category,
+            "description": description,
+            "amount_paisa": amount_paisa
+        }
+
+
+def convert_text_to_binary():
+    """
+    Writes every well-formed transaction of transactions.txt to the binary ledger,
+    replacing it. The text ledger is left untouched. Returns the number of records written.
+    """
+    return BinaryLedgerFormat().replace(iter_text_transactions())
+
+
+def convert_binary_to_text():
+    """
+    Writes every record of the binary ledger to transactions.txt, replacing it.
+    The binary ledger is left untouched. Returns the number of records written.
+    """
+    return TextLedgerFormat().replace(iter_binary_transactions())
@@ -0,0 +1,79 @@
+import os
+
+from database import sqlite_store
+from database.formats import get_ledger_format
+from database.cache import invalidate_caches
+from database.month_index import load_month_index
+from database.sidecar import rebuild_together
+from database.utils import storage_format, SQLITE_FILE
+from database.writer import append_many, close_writer, SIDECARS
+
+
+def append_transactions(transactions):
+    """
+    Appends transaction dicts to the ledger and keeps the sidecar files
+    (ledger index, monthly rollups) in step. Writes go through the process-wide
+    group-commit writer, so they follow the DURABILITY policy in database/utils.py.
+    """
+    append_many(transactions)
+
+
+def replace_transactions(transactions):
+    """
+    Replaces the whole ledger with an iterable of transaction dicts, e.g. when restoring
+    a backup, and rebuilds the sidecar files. Returns the number of transactions written.
+    """
+    if storage_format() == "sqlite":
+        return sqlite_store.replace_transactions(transactions)
+    # The writer's in-memory sidecars describe the old ledger.
+    close_writer()
+    fmt = get_ledger_format()
+    count = fmt.replace(transactions)
+    invalidate_caches(fmt.path)
+    rebuild_sidecars()
+    return count
+
+
+def rebuild_sidecars():
+    """Rebuilds every sidecar file from scratch, e.g. after the ledger was rewritten."""
+    if storage_format() == "sqlite":
+        # The SQLite store answers month queries itself and keeps no sidecars.
+        return
+    close_writer()
+    rebuild_together(SIDECARS)
+
+
+def ledger_files():
+    """Returns the paths of the files the active storage format keeps transactions in."""
+    if storage_format() == "sqlite":
+        # Commits land in the write-ahead log until SQLite checkpoints them.
+        return [SQLITE_FILE, SQLITE_FILE + "-wal"]
+    fmt = get_ledger_format()
+    return [fmt.path, fmt.strings_path] if storage_format() == "binary" else [fmt.path]
+
+
+def ledger_version():
+    """
+    Returns a value that changes whenever the ledger does: the storage format plus the
+    identity, size and mtime of each ledger file (and, for SQLite, the store's own
+    version). Equal versions mean nothing was written, so anything computed from the
+    ledger can be reused.
+    """
+    version = [storage_format()]
+    for path in ledger_files():
+        try:
+            stat = os.stat(path)
+            version.append((path, stat.st_ino, stat.st_dev, stat.st_size, stat.st_mtime_ns))
+        except FileNotFoundError:
+            version.append((path, None))
+    if storage_format() == "sqlite":
+        version.append(sqlite_store.store_version())
+    return tuple(version)
+
+
+def has_transactions():
+    """Returns True if the ledger holds at least one indexed transaction."""
+    if storage_format() == "sqlite":
+        return sqlite_store.has_transactions()
+    return bool(load_month_index().months)
+
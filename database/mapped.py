@@ -0,0 +1,53 @@
+import mmap
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def map_file(path):
+    """
+    Memory-maps a file read-only and yields the map, or b"" for an empty file.
+
+    The map is backed by the OS page cache, so every process reading the same ledger
+    (the CLI and the Streamlit dashboard) shares one copy of its pages instead of each
+    reading the file into its own buffers.
+    """
+    with open(path, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # mmap refuses empty files.
+            yield b""
+            return
+        with mapped:
+            yield mapped
+
+
+def iter_line_spans(buffer, start=0, end=None):
+    """
+    Yields (line_start, line_end) for each line of buffer[start:end], without the newline.
+    Lines are found with buffer.find, which is a memchr scan on bytes and mmap objects, so
+    no line is copied out of the buffer until a caller slices it.
+    A final line without a trailing newline is included.
+    """
+    if end is None:
+        end = len(buffer)
+    position = start
+    while position < end:
+        newline = buffer.find(b"\n", position, end)
+        if newline == -1:
+            yield position, end
+            return
+        yield position, newline
+        position = newline + 1
+
+
+def sync_files(*paths):
+    """fsyncs each of paths that exists."""
+    for path in paths:
+        try:
+            # Opened for appending: Windows only allows fsync on a handle open for writing.
+            with open(path, "ab") as f:
+                os.fsync(f.fileno())
+        except FileNotFoundError:
+            continue
@@ -0,0 +1,94 @@
+from database.sidecar import LedgerSidecar
+from database.utils import month_bounds, TRANSACTIONS_INDEX_FILE
+
+
+def _merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and merged[-1][1] == start:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+
+class MonthIndex(LedgerSidecar):
+    """
+    Sidecar index mapping each "YYYY-MM" month to the byte ranges of the ledger file
+    that hold its records.
+
+    Ranges are [start, end) byte offsets kept in file order; consecutive lines of the
+    same month are merged into one range.
+    """
+
+    path = TRANSACTIONS_INDEX_FILE
+    version = 3
+    description = "ledger index"
+
+    def clear_data(self):
+        self.months = {}
+
+    def data_to_json(self):
+        return self.months
+
+    def data_from_json(self, data):
+        self.months = data
+
+    def add_fields(self, fields, start, end):
+        ranges = self.months.setdefault(self.month_of(fields[0]), [])
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+
+    def add_batch(self, records):
+        # Consecutive records of the same month extend one range, so the month's range
+        # list is only looked up when the month changes.
+        month_of = self.month_of
+        month = None
+        current = None
+        for fields, start, end in records:
+            record_month = month_of(fields[0])
+            if record_month != month or current is None or current[1] != start:
+                ranges = self.months.setdefault(record_month, [])
+                if ranges and ranges[-1][1] == start:
+                    current = ranges[-1]
+                else:
+                    current = [start, end]
+                    ranges.append(current)
+                month = record_month
+            current[1] = end
+
+    def month_ranges(self, month_year):
+        """Byte ranges holding the records of a "YYYY-MM" month, in file order."""
+        return self.months.get(month_year, [])
+
+    def ranges_of(self, months):
+        """Byte ranges, in file order, holding the records of the given "YYYY-MM" months."""
+        ranges = []
+        for month in months:
+            ranges.extend(self.month_ranges(month))
+        return _merge_ranges(ranges)
+
+    def ranges_between(self, start=None, end=None):
+        """
+        Byte ranges, in file order, holding the records of every month that overlaps
+        start <= timestamp < end (either bound may be None). Records outside the bounds
+        can still occur in these ranges, so callers filter them.
+        """
+        ranges = []
+        for month, month_ranges in self.months.items():
+            month_start, month_end = month_bounds(month)
+            if (start is None or month_end > start) and (end is None or month_start < end):
+                ranges.extend(month_ranges)
+        return _merge_ranges(ranges)
+
+
+def load_month_index():
+    """Loads the ledger index, catching it up with the ledger and saving it if needed."""
+    return MonthIndex.load_current()
+
+
+def rebuild_month_index():
+    """Rebuilds the ledger index from scratch and returns it."""
+    return MonthIndex.rebuild()
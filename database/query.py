@@ -0,0 +1,501 @@
+import operator
+import re
+import shlex
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from functools import partial
+from operator import itemgetter
+
+from database import sqlite_store
+from database.formats import get_ledger_format
+from database.mapped import map_file
+from database.month_index import load_month_index
+from database.rollups import load_rollups
+from database.timebuckets import DAYS, MONTHS, YEARS
+from database.utils import month_bounds, CATEGORY_NAMES, LEDGER_FIELDS, storage_format
+
+# Field names accepted in a query, mapped to their position in LEDGER_FIELDS.
+QUERY_FIELDS = {
+    "date": 0,
+    "type": 1,
+    "category": 2,
+    "cat": 2,
+    "desc": 3,
+    "description": 3,
+    "amount": 4,
+    "amt": 4
+}
+
+# Relative cost of checking a field of a decoded record: numbers are compared directly,
+# names are lowercased, descriptions are lowercased and searched. Checks run cheapest first.
+FIELD_COSTS = {0: 0, 4: 0, 1: 1, 2: 1, 3: 2}
+
+QUERY_HELP = (
+    'Terms are ANDed, e.g. category:Food amount>500 date:2026-01..2026-03 desc~"uber".\n'
+    "  date:2026 | date:2026-01 | date:2026-01-15 | date:2026-01..2026-03 | date:7d | date>=2026-02\n"
+    "  type:expense | category:Food,Transport | category~food\n"
+    '  amount>500 | amount<=99.50 | amount:100..500 (rupees)\n'
+    '  desc~uber | desc="uber eats" | a bare word searches descriptions\n'
+    "  A leading - negates a term, e.g. -category:Bills."
+)
+
+_TERM = re.compile(r"^(-?)([A-Za-z_]+)(>=|<=|:|~|=|>|<)(.*)$", re.DOTALL)
+_LAST_DAYS = re.compile(r"^(\d+)d$")
+_COLUMNS = {position: field for position, field in enumerate(LEDGER_FIELDS)}
+# Amount operators as the comparisons of _MIRRORED.
+_COMPARISONS = {">": ">", ">=": ">=", "<": "<", "<=": "<=", "=": "==", ":": "=="}
+# x > c is c < x, so comparing with a fixed c is partial(operator.lt, c), which runs
+# without a Python frame per call.
+_MIRRORED = {">": operator.lt, ">=": operator.le, "<": operator.gt, "<=": operator.ge, "==": operator.eq}
+# Amounts are stored as int64 paisa (and SQLite integers are 64-bit), so query amounts
+# must fit too.
+_PAISA_RANGE = (-2 ** 63, 2 ** 63 - 1)
+# How Query.predicate reads each field of a decoded record, as the raw_fields of a format.
+_DECODED_FIELDS = ((0, float), (1, str), (2, str), (3, str), (4, int))
+
+
+class QueryError(ValueError):
+    """A query that cannot be parsed; the message says which term and why."""
+
+
+class _Check:
+    """
+    One condition on a field of a record. test is a function of the field's value
+    returning whether it holds; sql is the same condition over {x} (the column) with
+    params, or None when SQLite cannot evaluate it exactly.
+    """
+
+    def __init__(self, position, test, sql=None, params=(), label="", vector=None):
+        self.position = position
+        self.test = test
+        self.sql = sql
+        self.params = tuple(params)
+        self.label = label
+        # (comparison, value) when the check is a plain comparison of a number, which a
+        # format can also run over whole columns (see prefilter).
+        self.vector = vector
+
+    def negated(self, label):
+        test = self.test
+        sql = None if self.sql is None else f"NOT ({self.sql})"
+        return _Check(self.position, lambda x: not test(x), sql, self.params, label)
+
+
+def _period_bounds(text):
+    """Returns the (start, end) epoch seconds of a "YYYY", "YYYY-MM" or "YYYY-MM-DD" period."""
+    buckets = {4: YEARS, 7: MONTHS, 10: DAYS}.get(len(text))
+    try:
+        if buckets is None:
+            raise ValueError
+        return buckets.key_bounds(text)
+    except (ValueError, OverflowError):
+        raise QueryError(f"Invalid date '{text}': use YYYY, YYYY-MM or YYYY-MM-DD.") from None
+
+
+def _date_range(operator, value):
+    """Returns the (start, end) a date term selects; either bound may be None."""
+    if operator in (":", "="):
+        last_days = _LAST_DAYS.match(value)
+        if last_days:
+            try:
+                return (datetime.now() - timedelta(days=int(last_days.group(1)))).timestamp(), None
+            except (ValueError, OverflowError):
+                raise QueryError(f"Invalid date '{value}': that many days back is before year 1.") from None
+        if value == "today":
+            return DAYS.key_bounds(datetime.now().strftime("%Y-%m-%d"))
+        if ".." in value:
+            first, last = value.split("..", 1)
+            if not first and not last:
+                raise QueryError("A date range needs at least one end, e.g. date:2026-01..")
+            return (_period_bounds(first)[0] if first else None), (_period_bounds(last)[1] if last else None)
+        return _period_bounds(value)
+    if operator == "~":
+        raise QueryError("Dates are matched with :, >, >=, < or <=.")
+    start, end = _period_bounds(value)
+    return {">": (end, None), ">=": (start, None), "<": (None, start), "<=": (None, end)}[operator]
+
+
+def _paisa(text):
+    """Converts a rupee amount, e.g. "99.50", to paisa."""
+    try:
+        paisa = Decimal(text) * 100
+    except InvalidOperation:
+        paisa = None
+    if paisa is None or not paisa.is_finite():
+        raise QueryError(f"Invalid amount '{text}': use a number of rupees, e.g. 500 or 99.50.")
+    if not _PAISA_RANGE[0] <= paisa <= _PAISA_RANGE[1]:
+        raise QueryError(f"Invalid amount '{text}': it is too large.")
+    return int(paisa)
+
+
+def _category_names(text):
+    # Known categories match whatever their case; other names are kept as typed, since
+    # imported ledgers can hold categories of their own.
+    known = {name.lower(): name for name in CATEGORY_NAMES}
+    names = [name.strip() for name in text.split(",") if name.strip()]
+    if not names:
+        raise QueryError("category: needs at least one category name.")
+    return frozenset(known.get(name.lower(), name) for name in names)
+
+
+def _type_names(text):
+    names = [name.strip().lower() for name in text.split(",") if name.strip()]
+    if not names:
+        raise QueryError("type: needs at least one of expense, income.")
+    return frozenset(names)
+
+
+def _in_sql(column, values):
+    return f"{column} IN ({', '.join('?' * len(values))})", sorted(values)
+
+
+def _text_check(position, operator, value, label):
+    needle = value.lower()
+    # SQLite's lower() only folds ASCII, so other needles are matched in Python.
+    pushable = needle.isascii()
+    if operator == "=":
+        return _Check(position, lambda x: x.lower() == needle, "lower({x}) = ?" if pushable else None, [needle], label)
+    return _Check(position, lambda x: needle in x.lower(), "instr(lower({x}), ?) > 0" if pushable else None, [needle], label)
+
+
+def _comparison_check(position, comparison, value, label="", vector=False):
+    """A check comparing a number field with value; vector makes it a prefilter condition too."""
+    sql = f"{{x}} {'=' if comparison == '==' else comparison} ?"
+    return _Check(
+        position, partial(_MIRRORED[comparison], value), sql, [value], label,
+        vector=(comparison, value) if vector else None
+    )
+
+
+def _range_check(position, bounds):
+    """One check that both of bounds, one or two (comparison, value), hold, e.g. to negate a range."""
+    values = tuple(value for _, value in bounds)
+    sql = " AND ".join(f"{{x}} {comparison} ?" for comparison, _ in bounds)
+    tests = [partial(_MIRRORED[comparison], value) for comparison, value in bounds]
+    if len(tests) == 1:
+        return _Check(position, tests[0], sql, values)
+    first, second = tests
+    return _Check(position, lambda x: first(x) and second(x), sql, values)
+
+
+def _type_check(types):
+    return _Check(1, lambda x: x.lower() in types, *_in_sql("lower({x})", types))
+
+
+def _category_check(categories):
+    return _Check(2, categories.__contains__, *_in_sql("{x}", categories))
+
+
+class Query:
+    """
+    A parsed transaction query (see QUERY_HELP), parsed once and run against any
+    storage format.
+
+    The planner pushes what storage can answer down to it: the date range and the type
+    and category sets become the bounds of an indexed SQLite query, or pick the months
+    of the month index to read (months whose rollups hold none of the types and
+    categories asked for are skipped without reading them). Every other term becomes
+    one check of a single predicate, ordered so cheap number comparisons run, and fail,
+    before any string is lowercased or searched.
+    """
+
+    def __init__(self, text=""):
+        self.text = text.strip()
+        self.start = None
+        self.end = None
+        self.types = None
+        self.categories = None
+        self.checks = []
+        self._parse()
+
+    def _parse(self):
+        try:
+            tokens = shlex.split(self.text)
+        except ValueError as e:
+            raise QueryError(f"Invalid query: {e}.") from None
+        for token in tokens:
+            self._add_term(token)
+        # Stable: equally cheap checks keep the order they were written in.
+        self.checks.sort(key=lambda check: FIELD_COSTS[check.position])
+
+    def _add_term(self, token):
+        match = _TERM.match(token)
+        if match is None:
+            # A bare word (or quoted phrase) searches descriptions.
+            negate = token.startswith("-") and len(token) > 1
+            word = token[1:] if negate else token
+            self._add_check(_text_check(3, "~", word, f"desc~{word}"), negate, token)
+            return
+
+        negate, name, operator, value = match.groups()
+        negate = bool(negate)
+        if name.lower() not in QUERY_FIELDS:
+            raise QueryError(
+                f"Unknown field '{name}' in '{token}'. Fields: date, type, category, desc, amount "
+                f"(to search descriptions for it, use desc~\"{token}\")."
+            )
+        position = QUERY_FIELDS[name.lower()]
+        if not value:
+            raise QueryError(f"Missing value in '{token}'.")
+
+        if position == 0:
+            start, end = _date_range(operator, value)
+            if negate:
+                bounds = [(comparison, bound) for comparison, bound in ((">=", start), ("<", end)) if bound is not None]
+                self.checks.append(_range_check(0, bounds).negated(token))
+                return
+            if start is not None:
+                self.start = start if self.start is None else max(self.start, start)
+            if end is not None:
+                self.end = end if self.end is None else min(self.end, end)
+        elif position == 1:
+            if operator not in (":", "="):
+                raise QueryError(f"Types are matched with type:expense or type:income, not '{token}'.")
+            types = _type_names(value)
+            if negate:
+                self.checks.append(_type_check(types).negated(token))
+            else:
+                self.types = types if self.types is None else self.types & types
+        elif position == 2:
+            if operator == "~":
+                self._add_check(_text_check(2, "~", value, token), negate, token)
+            elif operator in (":", "="):
+                categories = _category_names(value)
+                if negate:
+                    self.checks.append(_category_check(categories).negated(token))
+                else:
+                    self.categories = categories if self.categories is None else self.categories & categories
+            else:
+                raise QueryError(f"Categories are matched with : or ~, not '{token}'.")
+        elif position == 3:
+            if operator not in (":", "~", "="):
+                raise QueryError(f"Descriptions are matched with ~ (contains) or = (equals), not '{token}'.")
+            self._add_check(_text_check(3, operator, value, token), negate, token)
+        else:
+            if operator == "~":
+                raise QueryError(f"Amounts are matched with :, =, >, >=, < or <=, not '{token}'.")
+            if operator == ":" and ".." in value:
+                low, high = value.split("..", 1)
+                bounds = [(comparison, _paisa(text)) for comparison, text in ((">=", low), ("<=", high)) if text]
+                if not bounds:
+                    raise QueryError("An amount range needs at least one end, e.g. amount:100..")
+                if negate:
+                    self.checks.append(_range_check(4, bounds).negated(token))
+                else:
+                    for comparison, paisa in bounds:
+                        self.checks.append(_comparison_check(4, comparison, paisa, token, vector=True))
+                return
+            check = _comparison_check(4, _COMPARISONS[operator], _paisa(value), token, vector=True)
+            self._add_check(check, negate, token)
+
+    def _add_check(self, check, negate, label):
+        self.checks.append(check.negated(label) if negate else check)
+
+    def _pushed_checks(self):
+        """The pushed-down filters as checks, for scans that are not already bounded by them."""
+        checks = []
+        if self.start is not None:
+            checks.append(_comparison_check(0, ">=", self.start))
+        if self.end is not None:
+            checks.append(_comparison_check(0, "<", self.end))
+        if self.types is not None:
+            checks.append(_type_check(self.types))
+        if self.categories is not None:
+            checks.append(_category_check(self.categories))
+        return checks
+
+    def prefilter(self):
+        """
+        The conditions a format can run over whole columns before any record is checked,
+        as (field, comparison, value) with field from LEDGER_FIELDS and comparison one of
+        <, <=, >, >=, == or "in" (value then being a set of names).
+        """
+        conditions = []
+        if self.start is not None:
+            conditions.append(("timestamp", ">=", self.start))
+        if self.end is not None:
+            conditions.append(("timestamp", "<", self.end))
+        if self.types is not None:
+            conditions.append(("type", "in", self.types))
+        if self.categories is not None:
+            conditions.append(("category", "in", self.categories))
+        for check in self.checks:
+            if check.vector is not None:
+                conditions.append((LEDGER_FIELDS[check.position], *check.vector))
+        return conditions
+
+    def is_empty(self):
+        """True when the query can match nothing, e.g. date:2026..2025."""
+        return (
+            (self.start is not None and self.end is not None and self.start >= self.end)
+            or self.types == frozenset()
+            or self.categories == frozenset()
+        )
+
+    def predicate(self, checks=None, fields=None):
+        """
+        Composes checks (the query's residual checks by default) into one function of a
+        record r, or None if there is nothing to check. By default r is a decoded
+        (timestamp, type, category, description, amount_paisa) tuple; fields can say how
+        to read each field from some other record, as the raw_fields of a ledger format.
+        The checks run in order and the first failing one ends the evaluation, so a field
+        is only converted when checked.
+        """
+        checks = self.checks if checks is None else checks
+        if not checks:
+            return None
+        fields = _DECODED_FIELDS if fields is None else fields
+        tests = [fields[check.position] + (check.test,) for check in checks]
+        # The common one- and two-check queries run as a single function call per record.
+        if len(tests) == 1:
+            ((index, convert, test),) = tests
+            return lambda r: test(convert(r[index]))
+        if len(tests) == 2:
+            (index, convert, test), (index2, convert2, test2) = tests
+            return lambda r: test(convert(r[index])) and test2(convert2(r[index2]))
+
+        def match(r):
+            for index, convert, test in tests:
+                if not test(convert(r[index])):
+                    return False
+            return True
+        return match
+
+    def sql_where(self):
+        """
+        Returns the (sql, params) of the residual checks SQLite can evaluate, and the
+        checks it cannot, which are run in Python on the rows it returns.
+        """
+        clauses = []
+        params = []
+        rest = []
+        for check in self.checks:
+            if check.sql is None:
+                rest.append(check)
+            else:
+                clauses.append(check.sql.format(x=_COLUMNS[check.position]))
+                params.extend(check.params)
+        return (" AND ".join(clauses), params) if clauses else None, rest
+
+    def months(self, index):
+        """
+        The "YYYY-MM" months of the month index that can hold matches: those overlapping
+        the date range, whose rollups list one of the types and categories asked for.
+        """
+        months = []
+        for month in index.months:
+            month_start, month_end = month_bounds(month)
+            if (self.start is None or month_end > self.start) and (self.end is None or month_start < self.end):
+                months.append(month)
+        if self.types is None and self.categories is None:
+            return months
+
+        rollups = load_rollups().months
+        kept = []
+        for month in months:
+            for trans_type, rollup in rollups.get(month, {}).items():
+                if self.types is not None and trans_type not in self.types:
+                    continue
+                if self.categories is not None and self.categories.isdisjoint(rollup["categories"]):
+                    continue
+                kept.append(month)
+                break
+        return kept
+
+    def iter_transactions(self, newest_first=False):
+        """
+        Streams the matching transactions as dicts, in file order or newest first
+        (ties: last written first).
+        """
+        if self.is_empty():
+            return
+        if storage_format() == "sqlite":
+            where, rest = self.sql_where()
+            match = self.predicate(rest)
+            for values in sqlite_store.iter_fields(
+                LEDGER_FIELDS, self.start, self.end, self.types, self.categories, newest_first, where
+            ):
+                if match is None or match(values):
+                    yield dict(zip(LEDGER_FIELDS, values))
+            return
+        yield from self._iter_ledger(newest_first)
+
+    def _iter_ledger(self, newest_first):
+        fmt = get_ledger_format()
+        all_positions = tuple(range(len(LEDGER_FIELDS)))
+        if not newest_first and not self.checks and not self.prefilter():
+            # Nothing to check: every record of the ledger is streamed as it is decoded.
+            try:
+                for fields in fmt.iter_fields(all_positions):
+                    yield dict(zip(LEDGER_FIELDS, fields))
+            except FileNotFoundError:
+                pass
+            return
+
+        index = load_month_index()
+        months = self.months(index)
+        # The pushed-down filters only picked the months, so they are checked too, first.
+        checks = sorted(self._pushed_checks() + self.checks, key=lambda check: FIELD_COSTS[check.position])
+        try:
+            with map_file(fmt.path) as data, (
+                map_file(fmt.strings_path) if storage_format() == "binary" else nullcontext()
+            ) as strings:
+                fmt.begin(data)
+                heap = () if strings is None else (strings,)
+                # Run against the undecoded records, so a record failing the first
+                # check costs one conversion, and only matches are decoded in full.
+                fields = fmt.raw_fields(strings)
+                match = self.predicate(checks, fields)
+                prefilter = self.prefilter()
+                timestamp_index, timestamp_convert = fields[0]
+                # Newest first reads one month at a time from the newest, sorting each.
+                for group in ([month] for month in sorted(months, reverse=True)) if newest_first else [months]:
+                    found = []
+                    for range_start, range_end in index.ranges_of(group):
+                        for raw, record_start, record_end in fmt.iter_raw(
+                            data, range_start, min(range_end, len(data)), prefilter
+                        ):
+                            try:
+                                if match is not None and not match(raw):
+                                    continue
+                                if newest_first:
+                                    found.append((timestamp_convert(raw[timestamp_index]), record_start, record_end))
+                                    continue
+                            except ValueError:
+                                # A malformed number: the record is skipped, as by every reader.
+                                continue
+                            fields = fmt.decode(data, record_start, record_end, all_positions, *heap)
+                            if fields is not None:
+                                yield dict(zip(LEDGER_FIELDS, fields))
+                    found.reverse()
+                    found.sort(key=itemgetter(0), reverse=True)
+                    for _, record_start, record_end in found:
+                        fields = fmt.decode(data, record_start, record_end, all_positions, *heap)
+                        if fields is not None:
+                            yield dict(zip(LEDGER_FIELDS, fields))
+        except FileNotFoundError:
+            return
+
+    def explain(self):
+        """Describes the plan: what is pushed down to storage and the checks run per record."""
+        lines = []
+        start = "-" if self.start is None else datetime.fromtimestamp(self.start).strftime("%Y-%m-%d %H:%M")
+        end = "-" if self.end is None else datetime.fromtimestamp(self.end).strftime("%Y-%m-%d %H:%M")
+        lines.append(f"Date range (pushed down): {start} .. {end}")
+        lines.append(f"Types (pushed down): {'any' if self.types is None else ', '.join(sorted(self.types))}")
+        lines.append(f"Categories (pushed down): {'any' if self.categories is None else ', '.join(sorted(self.categories))}")
+        if storage_format() == "sqlite":
+            where, rest = self.sql_where()
+            lines.append(f"SQL conditions: {where[0] if where else 'none'}")
+            lines.append(f"Checked in Python: {', '.join(check.label for check in rest) or 'none'}")
+        else:
+            index = load_month_index()
+            lines.append(f"Months read: {len(self.months(index))} of {len(index.months)}")
+            lines.append(f"Checks per record, in order: {', '.join(check.label for check in self.checks) or 'none'}")
+        return lines
+
+
+def parse_query(text):
+    """Parses a query string into a Query. Raises QueryError when it is malformed."""
+    return Query(text or "")
@@ -0,0 +1,123 @@
+from database import sqlite_store
+from database.sidecar import LedgerSidecar
+from database.utils import ROLLUPS_FILE, storage_format
+
+
+class MonthlyRollups(LedgerSidecar):
+    """
+    Per-month totals materialized from the ledger.
+
+    months maps "YYYY-MM" to
+    {type: {"total": paisa, "count": n, "categories": {category: paisa}, "days": {"YYYY-MM-DD": paisa}}},
+    with the type lowercased the same way the reports compare it.
+    """
+
+    path = ROLLUPS_FILE
+    version = 3
+    description = "monthly rollups"
+
+    def clear_data(self):
+        self.months = {}
+
+    def data_to_json(self):
+        return self.months
+
+    def data_from_json(self, data):
+        self.months = data
+
+    def add_fields(self, fields, start, end):
+        self.add(*fields)
+
+    def add_batch(self, records):
+        # Sum per (day, type, category) first, then fold the few distinct groups into
+        # the nested rollups, instead of walking them once per record.
+        day_of = self.day_of
+        sums = {}
+        for (timestamp, trans_type, category, amount_paisa), _, _ in records:
+            key = (day_of(timestamp), trans_type, category)
+            group = sums.get(key)
+            if group is None:
+                sums[key] = [amount_paisa, 1]
+            else:
+                group[0] += amount_paisa
+                group[1] += 1
+        for (day, trans_type, category), (amount_paisa, count) in sums.items():
+            month = self.months.setdefault(day[:7], {})
+            rollup = month.setdefault(trans_type.lower(), {"total": 0, "count": 0, "categories": {}, "days": {}})
+            rollup["total"] += amount_paisa
+            rollup["count"] += count
+            rollup["categories"][category] = rollup["categories"].get(category, 0) + amount_paisa
+            rollup["days"][day] = rollup["days"].get(day, 0) + amount_paisa
+
+    def add(self, timestamp, trans_type, category, amount_paisa):
+        day = self.day_of(timestamp)
+        month = self.months.setdefault(day[:7], {})
+        rollup = month.setdefault(trans_type.lower(), {"total": 0, "count": 0, "categories": {}, "days": {}})
+        rollup["total"] += amount_paisa
+        rollup["count"] += 1
+        rollup["categories"][category] = rollup["categories"].get(category, 0) + amount_paisa
+        rollup["days"][day] = rollup["days"].get(day, 0) + amount_paisa
+
+    def has_transactions(self):
+        return bool(self.months)
+
+    def total(self, month_year, trans_type):
+        """Total amount_paisa of a type ("income"/"expense") in a "YYYY-MM" month."""
+        return self.months.get(month_year, {}).get(trans_type, {}).get("total", 0)
+
+    def count(self, month_year, trans_type):
+        """Number of transactions of a type in a "YYYY-MM" month."""
+        return self.months.get(month_year, {}).get(trans_type, {}).get("count", 0)
+
+    def day_total(self, day, trans_type):
+        """Total amount_paisa of a type on a "YYYY-MM-DD" day."""
+        return self.months.get(day[:7], {}).get(trans_type, {}).get("days", {}).get(day, 0)
+
+    def category_totals(self, month_year, trans_type, categories):
+        """
+        Returns a dictionary: {category: amount_paisa} of a type in a "YYYY-MM" month,
+        for the given categories, in order.
+        """
+        totals = self.months.get(month_year, {}).get(trans_type, {}).get("categories", {})
+        return {category: totals.get(category, 0) for category in categories}
+
+
+def load_rollups():
+    """
+    Loads the monthly rollups, catching them up with the ledger and saving them if needed.
+    With SQLite storage the same queries are answered by GROUP BY queries instead.
+    """
+    if storage_format() == "sqlite":
+        return sqlite_store.SQLiteRollups()
+    return MonthlyRollups.load_current()
+
+
+def verify_rollups():
+    """
+    Recomputes the rollups from transactions.txt and compares them with the stored ones.
+    The recomputed rollups are saved. Returns a list of (month, type, field, stored, actual)
+    for every value that had drifted.
+    """
+    if storage_format() == "sqlite":
+        # Nothing is materialized, so nothing can drift.
+        return []
+    stored = load_rollups()
+    actual = MonthlyRollups.rebuild()
+
+    drift = []
+    for month in sorted(set(stored.months) | set(actual.months)):
+        stored_month = stored.months.get(month, {})
+        actual_month = actual.months.get(month, {})
+        for trans_type in sorted(set(stored_month) | set(actual_month)):
+            stored_rollup = stored_month.get(trans_type, {})
+            actual_rollup = actual_month.get(trans_type, {})
+            for field in ("total", "count"):
+                if stored_rollup.get(field, 0) != actual_rollup.get(field, 0):
+                    drift.append((month, trans_type, field, stored_rollup.get(field, 0), actual_rollup.get(field, 0)))
+            for group in ("categories", "days"):
+                stored_values = stored_rollup.get(group, {})
+                actual_values = actual_rollup.get(group, {})
+                for key in sorted(set(stored_values) | set(actual_values)):
+                    if stored_values.get(key, 0) != actual_values.get(key, 0):
+                        drift.append((month, trans_type, key, stored_values.get(key, 0), actual_values.get(key, 0)))
+    return drift
@@ -0,0 +1,226 @@
+import json
+import os
+
+from database.cache import FINGERPRINT_SIZE
+from database.formats import get_ledger_format, SIDECAR_POSITIONS
+from database.mapped import map_file
+from database.timebuckets import DAYS, MONTHS
+from database.utils import console
+
+
+# Bytes of the ledger decoded at a time when several sidecars are rebuilt together.
+REBUILD_BLOCK_SIZE = 4 << 20
+
+
+def decode_records(fmt, data, base_offset, start=0, end=None):
+    """
+    Decodes the complete records of data[start:end] (data[0] sits at base_offset in the
+    ledger) as SIDECAR_POSITIONS fields. Malformed records are left out, just like the
+    loaders skip them. Returns ([(fields, record_start, record_end), ...], consumed_end),
+    with ledger offsets in the list and consumed_end relative to data.
+    """
+    if end is None:
+        end = len(data)
+    consumed_end = fmt.complete_end(data, start, end)
+    decode = fmt.decode
+    records = []
+    for record_start, record_end in fmt.record_spans(data, start, consumed_end):
+        fields = decode(data, record_start, record_end, SIDECAR_POSITIONS)
+        if fields is not None:
+            records.append((fields, base_offset + record_start, base_offset + record_end))
+    return records, consumed_end
+
+
+class LedgerSidecar:
+    """
+    Base class for files derived from the ledger and kept next to it.
+
+    A sidecar remembers how many bytes of the ledger it covers plus a fingerprint of the
+    bytes just before that offset. refresh() uses them to tell appended lines (added
+    incrementally through add_fields) from a truncated or rewritten ledger (full rebuild).
+    The ledger is memory-mapped while catching up, so it is never read into one big buffer.
+    Records are split and decoded by the active ledger format (see database.formats), and
+    a sidecar built for another format is discarded and rebuilt.
+
+    Subclasses set path and version, and implement clear_data, add_fields, data_to_json
+    and data_from_json.
+    """
+
+    path = None
+    version = 1
+    description = "ledger sidecar"
+
+    def __init__(self):
+        self.format = get_ledger_format()
+        self.clear()
+
+    def clear(self):
+        self.offset = 0
+        self.fingerprint = b""
+        self.clear_data()
+
+    def clear_data(self):
+        raise NotImplementedError
+
+    def add_fields(self, fields, start, end):
+        """
+        Adds one well-formed record, decoded as the SIDECAR_POSITIONS fields
+        (timestamp, type, category, amount_paisa), that occupies [start, end) of the ledger.
+        """
+        raise NotImplementedError
+
+    def add_batch(self, records):
+        """Adds [(fields, start, end), ...] as produced by decode_records; subclasses may aggregate."""
+        add_fields = self.add_fields
+        for fields, start, end in records:
+            add_fields(fields, start, end)
+
+    def data_to_json(self):
+        raise NotImplementedError
+
+    def data_from_json(self, data):
+        raise NotImplementedError
+
+    @classmethod
+    def load(cls):
+        sidecar = cls()
+        try:
+            with open(cls.path, "r") as f:
+                data = json.load(f)
+            if data.get("version") == cls.version and data.get("format") == sidecar.format.name:
+                sidecar.data_from_json(data["data"])
+                sidecar.offset = data["offset"]
+                sidecar.fingerprint = bytes.fromhex(data["fingerprint"])
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, KeyError, ValueError) as e:
+            console.print(f"[yellow]Ignoring unreadable {cls.description}: {e}[/yellow]")
+            sidecar.clear()
+        return sidecar
+
+    def save(self):
+        data = {
+            "version": self.version,
+            "format": self.format.name,
+            "offset": self.offset,
+            "fingerprint": self.fingerprint.hex(),
+            "data": self.data_to_json()
+        }
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.path)
+
+    def month_of(self, timestamp):
+        """Returns the "YYYY-MM" month of a timestamp in local time."""
+        return MONTHS.key_of(timestamp)
+
+    def day_of(self, timestamp):
+        """Returns the "YYYY-MM-DD" day of a timestamp in local time."""
+        return DAYS.key_of(timestamp)
+
+    def add_records(self, data, base_offset, start=0, end=None):
+        """
+        Adds the complete records in data[start:end]; data[0] sits at base_offset in the ledger.
+        Returns the number of bytes consumed (up to the end of the last complete record).
+        """
+        records, consumed_end = decode_records(self.format, data, base_offset, start, end)
+        return self.add_decoded(records, data, base_offset, start, consumed_end)
+
+    def add_decoded(self, records, data, base_offset, start, consumed_end):
+        """
+        Adds records already decoded by decode_records from data[start:consumed_end],
+        so several sidecars can share one decoding pass. Returns the number of bytes consumed.
+        """
+        if consumed_end <= start:
+            return 0
+        self.add_batch(records)
+        return self.advance(data, base_offset, start, consumed_end)
+
+    def advance(self, data, base_offset, start, consumed_end):
+        """
+        Marks data[start:consumed_end] as covered once its records were added, moving the
+        offset and fingerprint past it. Returns the number of bytes consumed.
+        """
+        self.offset = base_offset + consumed_end
+        recent = data[max(start, consumed_end - FINGERPRINT_SIZE):consumed_end]
+        self.fingerprint = (self.fingerprint + recent)[-FINGERPRINT_SIZE:]
+        return consumed_end - start
+
+    def refresh(self):
+        """
+        Brings the sidecar up to date with the ledger: adds any appended lines, or
+        rebuilds from scratch if the ledger was truncated or rewritten.
+        Returns True if the sidecar changed.
+        """
+        try:
+            with map_file(self.format.path) as data:
+                return self._refresh_from(data)
+        except FileNotFoundError:
+            return self._refresh_from(b"")
+
+    def _refresh_from(self, data):
+        size = len(data)
+        if size == 0:
+            changed = self.offset != 0
+            self.clear()
+            return changed
+
+        self.format.begin(data)
+        is_append = (
+            self.offset <= size
+            and data[self.offset - len(self.fingerprint):self.offset] == self.fingerprint
+        )
+        if not is_append:
+            self.clear()
+        if self.offset == size:
+            return not is_append
+        consumed = self.add_records(data, 0, max(self.offset, self.format.data_start), size)
+        return consumed > 0 or not is_append
+
+    @classmethod
+    def load_current(cls):
+        """Loads the sidecar, catching it up with the ledger and saving it if needed."""
+        sidecar = cls.load()
+        if sidecar.refresh():
+            sidecar.save()
+        return sidecar
+
+    @classmethod
+    def rebuild(cls):
+        """Rebuilds the sidecar from scratch, saves it and returns it."""
+        sidecar = cls()
+        sidecar.refresh()
+        sidecar.save()
+        return sidecar
+
+
+def rebuild_together(sidecar_classes):
+    """
+    Rebuilds several sidecars from scratch with a single decoding pass over the ledger,
+    block by block, saves them and returns them.
+    """
+    sidecars = [sidecar_class() for sidecar_class in sidecar_classes]
+    fmt = sidecars[0].format if sidecars else get_ledger_format()
+    for sidecar in sidecars:
+        sidecar.format = fmt
+    try:
+        with map_file(fmt.path) as data:
+            if len(data):
+                fmt.begin(data)
+                start = fmt.data_start
+                while start < len(data):
+                    records, consumed_end = decode_records(
+                        fmt, data, 0, start, min(start + REBUILD_BLOCK_SIZE, len(data))
+                    )
+                    if consumed_end <= start:
+                        # No complete record left (a torn tail); the sidecars stop before it.
+                        break
+                    for sidecar in sidecars:
+                        sidecar.add_decoded(records, data, 0, start, consumed_end)
+                    start = consumed_end
+    except FileNotFoundError:
+        pass
+    for sidecar in sidecars:
+        sidecar.save()
+    return sidecars
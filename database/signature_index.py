@@ -0,0 +1,193 @@
+import base64
+
+import numpy as np
+
+from database import sqlite_store
+from database.sidecar import LedgerSidecar
+from database.utils import storage_format, SIGNATURE_INDEX_FILE
+
+# Bloom filter sizing: about 1% false positives at 10 bits and 7 probes per signature.
+BLOOM_BITS_PER_SIGNATURE = 10
+BLOOM_PROBES = 7
+MIN_BLOOM_BITS = 1 << 16
+
+# Signatures added since the last merge live in a set; past this many they are merged
+# into the sorted array.
+MERGE_THRESHOLD = 1 << 16
+
+
+def _mix(values):
+    # The splitmix64 finalizer; uint64 arithmetic wraps around.
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def signature_hashes(timestamps, amounts):
+    """
+    Stable 64-bit hashes of duplicate-check signatures: the timestamp and amount of each
+    transaction. Two signatures hash alike when float(timestamp) and int(amount_paisa)
+    are equal, which is how imports have always compared them.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64).view(np.uint64)
+    amounts = np.asarray(amounts, dtype=np.int64).view(np.uint64)
+    return _mix(_mix(timestamps) ^ amounts)
+
+
+class SignatureIndex(LedgerSidecar):
+    """
+    Sidecar set of the signature hashes of every ledger record, used by imports to find
+    duplicates without reading the ledger.
+
+    Hashes are kept in a sorted NumPy array (plus a set of recent additions), fronted by
+    a Bloom filter that answers most "not present" lookups without a search. A 64-bit
+    hash collision would make a new transaction look like a duplicate; at ledger sizes
+    that is vanishingly unlikely.
+    """
+
+    path = SIGNATURE_INDEX_FILE
+    version = 1
+    description = "signature index"
+
+    def clear_data(self):
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.recent = set()
+        self._new_bloom(MIN_BLOOM_BITS)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.lookups = 0
+        self.bloom_rejections = 0
+        self.hits = 0
+
+    def stats(self):
+        """Returns the signature count, lookups, Bloom filter rejections, hits and misses."""
+        return {
+            "signatures": len(self),
+            "bloom_bits": self.bloom_bits,
+            "lookups": self.lookups,
+            "bloom_rejections": self.bloom_rejections,
+            "hits": self.hits,
+            "misses": self.lookups - self.hits
+        }
+
+    def __len__(self):
+        return len(self.hashes) + len(self.recent)
+
+    def _new_bloom(self, bits):
+        self.bloom_bits = bits
+        self.bloom = np.zeros(bits // 8, dtype=np.uint8)
+
+    def _probes(self, hashes):
+        # Double hashing: probe i of a hash h is (low + i * high) mod bits.
+        low = (hashes & np.uint64(0xFFFFFFFF))[:, None]
+        high = (hashes >> np.uint64(32))[:, None]
+        steps = np.arange(BLOOM_PROBES, dtype=np.uint64)[None, :]
+        return (low + steps * high) % np.uint64(self.bloom_bits)
+
+    def _bloom_add(self, hashes):
+        probes = self._probes(hashes).ravel()
+        np.bitwise_or.at(self.bloom, probes >> np.uint64(3), np.left_shift(1, probes & np.uint64(7)).astype(np.uint8))
+
+    def _bloom_contains(self, hashes):
+        probes = self._probes(hashes)
+        bits = (self.bloom[probes >> np.uint64(3)] >> (probes & np.uint64(7)).astype(np.uint8)) & 1
+        return bits.all(axis=1)
+
+    def _merge(self):
+        if self.recent:
+            recent = np.fromiter(self.recent, dtype=np.uint64, count=len(self.recent))
+            self.hashes = np.union1d(self.hashes, recent)
+            self.recent = set()
+
+    def add_hashes(self, hashes):
+        """Adds signature hashes to the set."""
+        if not len(hashes):
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        self.recent.update(hashes.tolist())
+        if len(self.recent) > MERGE_THRESHOLD:
+            self._merge()
+        if len(self) * BLOOM_BITS_PER_SIGNATURE > self.bloom_bits:
+            # Grow the filter so its false-positive rate stays put, re-adding every hash.
+            self._merge()
+            bits = self.bloom_bits
+            while bits < len(self) * BLOOM_BITS_PER_SIGNATURE * 2:
+                bits *= 2
+            self._new_bloom(bits)
+            self._bloom_add(self.hashes)
+        else:
+            self._bloom_add(hashes)
+
+    def add_fields(self, fields, start, end):
+        self.add_hashes(signature_hashes([fields[0]], [fields[3]]))
+
+    def add_batch(self, records):
+        self.add_hashes(signature_hashes(
+            [fields[0] for fields, _, _ in records], [fields[3] for fields, _, _ in records]
+        ))
+
+    def contains_hashes(self, hashes):
+        """Returns a NumPy bool array telling which signature hashes are in the set."""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        found = self._bloom_contains(hashes) if len(hashes) else np.zeros(0, dtype=bool)
+        self.lookups += len(hashes)
+        self.bloom_rejections += int(len(hashes) - found.sum())
+        # Only what the Bloom filter could not rule out is searched for.
+        candidates = np.flatnonzero(found)
+        if len(candidates):
+            candidate_hashes = hashes[candidates]
+            positions = np.searchsorted(self.hashes, candidate_hashes)
+            in_array = positions < len(self.hashes)
+            in_array[in_array] = self.hashes[positions[in_array]] == candidate_hashes[in_array]
+            recent = self.recent
+            in_recent = np.fromiter((h in recent for h in candidate_hashes.tolist()), dtype=bool, count=len(candidates))
+            found[candidates] = in_array | in_recent
+        self.hits += int(found.sum())
+        return found
+
+    def contains_many(self, signatures):
+        """Tells, for each (timestamp, amount_paisa) signature, whether the ledger holds it."""
+        return self.contains_hashes(self._hashes_of(signatures))
+
+    def add_signatures(self, signatures):
+        """Adds (timestamp, amount_paisa) signatures, e.g. of records about to be imported."""
+        self.add_hashes(self._hashes_of(signatures))
+
+    @staticmethod
+    def _hashes_of(signatures):
+        signatures = list(signatures)
+        return signature_hashes([timestamp for timestamp, _ in signatures], [amount for _, amount in signatures])
+
+    def data_to_json(self):
+        self._merge()
+        return {
+            "hashes": base64.b64encode(self.hashes.astype("<u8").tobytes()).decode("ascii"),
+            "bloom_bits": self.bloom_bits,
+            "bloom": base64.b64encode(self.bloom.tobytes()).decode("ascii")
+        }
+
+    def data_from_json(self, data):
+        self.hashes = np.frombuffer(base64.b64decode(data["hashes"]), dtype="<u8").astype(np.uint64)
+        self.recent = set()
+        self.bloom_bits = data["bloom_bits"]
+        self.bloom = np.frombuffer(base64.b64decode(data["bloom"]), dtype=np.uint8).copy()
+        if len(self.bloom) * 8 != self.bloom_bits:
+            raise ValueError("Bloom filter size mismatch")
+
+
+def load_signature_index():
+    """
+    Loads the duplicate-check index, caught up with the ledger. The SQLite store answers
+    the same queries from its timestamp index instead.
+    """
+    if storage_format() == "sqlite":
+        return sqlite_store.SQLiteSignatureIndex()
+    return SignatureIndex.load_current()
+
+
+def rebuild_signature_index():
+    """Rebuilds the duplicate-check index from scratch and returns it."""
+    return SignatureIndex.rebuild()
@@ -0,0 +1,481 @@
+import os
+import random
+import sqlite3
+import threading
+
+from database.timebuckets import DAYS
+from database.utils import durability, month_bounds, LEDGER_FIELDS, BUDGETS_FILE, SQLITE_FILE
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    type TEXT NOT NULL COLLATE NOCASE,
+    category TEXT NOT NULL,
+    description TEXT NOT NULL,
+    amount_paisa INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transactions_timestamp ON transactions (timestamp);
+CREATE INDEX IF NOT EXISTS transactions_type_timestamp ON transactions (type, timestamp);
+CREATE INDEX IF NOT EXISTS transactions_category_timestamp ON transactions (category, timestamp);
+-- Full-text index of the descriptions, kept in step with inserts by the trigger; rows
+-- are only ever deleted all at once (see replace_transactions).
+CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+    description,
+    content='transactions',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 0'
+);
+CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN
+    INSERT INTO transactions_fts (rowid, description) VALUES (new.id, new.description);
+END;
+CREATE TABLE IF NOT EXISTS budgets (
+    month TEXT NOT NULL,
+    category TEXT NOT NULL,
+    amount_paisa INTEGER NOT NULL,
+    PRIMARY KEY (month, category)
+);
+"""
+
+# The DURABILITY policy (see database/writer.py) mapped onto SQLite's synchronous setting.
+SYNCHRONOUS = {"always": "FULL", "batch": "FULL", "interval_ms": "NORMAL", "never": "OFF"}
+
+TRANSACTION_COLUMNS = ", ".join(LEDGER_FIELDS)
+
+# A restore builds a new database here and renames it over SQLITE_FILE.
+REPLACEMENT_FILE = SQLITE_FILE + ".tmp"
+
+# sqlite3 connections must not be shared between threads (the Streamlit dashboard runs
+# every rerun on its own thread), so each thread keeps its own.
+_local = threading.local()
+
+
+def _file_identity():
+    try:
+        stat = os.stat(SQLITE_FILE)
+    except FileNotFoundError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+def connect():
+    """
+    Returns this thread's connection to the SQLite store, creating the schema if needed.
+    When the database file was replaced since the connection was opened (a restore, in
+    this or another process), the connection still points at the old file, so it is
+    reopened.
+    """
+    connection = getattr(_local, "connection", None)
+    if connection is not None and _local.identity != _file_identity():
+        close()
+        connection = None
+    if connection is None:
+        connection = sqlite3.connect(SQLITE_FILE)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only syncs at checkpoints: a crash can lose the last commits
+        # but never corrupts the file. FULL syncs every commit.
+        connection.execute(f"PRAGMA synchronous={SYNCHRONOUS[durability()[0]]}")
+        has_fts = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'transactions_fts'"
+        ).fetchone() is not None
+        connection.executescript(SCHEMA)
+        if not has_fts:
+            # A store created before the full-text index: index the rows it already holds.
+            with connection:
+                connection.execute("INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')")
+        _local.connection = connection
+        _local.identity = _file_identity()
+    return connection
+
+
+def _stamp_generation(connection):
+    # Random rather than counted, so a store built from scratch never repeats the
+    # generation of the one it replaces.
+    connection.execute(f"PRAGMA user_version = {random.randrange(1, 1 << 31)}")
+
+
+def store_generation():
+    """
+    Returns a value that changes whenever the stored transactions are rewritten rather
+    than appended to: the database file's identity plus the generation every rewrite
+    stamps into it. Row ids start again from 1 after a rewrite, so ids alone cannot tell.
+    """
+    generation = connect().execute("PRAGMA user_version").fetchone()[0]
+    return _local.identity, generation
+
+
+def store_version():
+    """
+    Returns a value that changes with every commit of transactions: the store generation
+    plus the id of the last stored transaction. Unlike the database files' size and mtime
+    it cannot miss a commit: a checkpointed WAL is rewritten in place, so a commit can
+    leave its size as it was, and its mtime only moves once per filesystem clock tick.
+    """
+    last_id = connect().execute("SELECT MAX(id) FROM transactions").fetchone()[0]
+    return store_generation() + (last_id,)
+
+
+def close():
+    """Closes this thread's connection, e.g. before the database file is replaced."""
+    connection = getattr(_local, "connection", None)
+    if connection is not None:
+        connection.close()
+        _local.connection = None
+
+
+def snapshot(path):
+    """Writes a consistent copy of the whole store (WAL included) to path with SQLite's backup API."""
+    target = sqlite3.connect(path)
+    try:
+        connect().backup(target)
+    finally:
+        target.close()
+
+
+def _transaction_rows(transactions):
+    for t in transactions:
+        yield (
+            float(t['timestamp']),
+            str(t['type']),
+            str(t['category']),
+            str(t['description']),
+            int(t['amount_paisa'])
+        )
+
+
+def append_transactions(transactions):
+    """Inserts transaction dicts in a single SQLite transaction."""
+    connection = connect()
+    with connection:
+        connection.executemany(
+            f"INSERT INTO transactions ({TRANSACTION_COLUMNS}) VALUES (?, ?, ?, ?, ?)",
+            _transaction_rows(transactions)
+        )
+
+
+def replace_transactions(transactions):
+    """Replaces every stored transaction with an iterable of transaction dicts. Returns the count written."""
+    connection = connect()
+    with connection:
+        connection.execute("DELETE FROM transactions")
+        connection.execute("INSERT INTO transactions_fts (transactions_fts) VALUES ('delete-all')")
+        _stamp_generation(connection)
+        cursor = connection.executemany(
+            f"INSERT INTO transactions ({TRANSACTION_COLUMNS}) VALUES (?, ?, ?, ?, ?)",
+            _transaction_rows(transactions)
+        )
+    return cursor.rowcount
+
+
+def iter_transaction_rows(start=None, end=None, trans_type=None):
+    """
+    Yields (timestamp, type, category, description, amount_paisa) in insertion order,
+    optionally limited to start <= timestamp < end and one type (case-insensitive).
+    The filters are evaluated by SQLite on the indexes.
+    """
+    types = None if trans_type is None else [trans_type]
+    return iter_fields(LEDGER_FIELDS, start, end, types)
+
+
+def iter_fields(fields, start=None, end=None, types=None, categories=None, newest_first=False, where=None):
+    """
+    Yields a tuple of the requested columns (names from LEDGER_FIELDS) in insertion order
+    (or newest first: by timestamp, then last inserted, descending) for the transactions
+    with start <= timestamp < end, a type in types (case-insensitive) and a category in
+    categories. Every bound left as None is not applied. where is an optional
+    (sql, params) pair of further conditions, ANDed onto the others.
+    """
+    conditions = []
+    params = []
+    if start is not None:
+        conditions.append("timestamp >= ?")
+        params.append(start)
+    if end is not None:
+        conditions.append("timestamp < ?")
+        params.append(end)
+    for column, values in (("type", types), ("category", categories)):
+        if values is not None:
+            values = list(values)
+            conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    if where is not None:
+        conditions.append(where[0])
+        params.extend(where[1])
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    # Walked backwards, the timestamp index already yields this order, so rows stream
+    # without sorting the table first.
+    order = "timestamp DESC, id DESC" if newest_first else "id"
+    yield from connect().execute(
+        f"SELECT {', '.join(fields)} FROM transactions{where} ORDER BY {order}", params
+    )
+
+
+def search_descriptions(match):
+    """
+    Runs an FTS5 MATCH expression over the descriptions. Returns (count, rows): the number
+    of matching transactions, and a cursor over their LEDGER_FIELDS tuples, newest first.
+    """
+    connection = connect()
+    count = connection.execute(
+        "SELECT COUNT(*) FROM transactions_fts WHERE transactions_fts MATCH ?", (match,)
+    ).fetchone()[0]
+    columns = ", ".join(f"t.{field}" for field in LEDGER_FIELDS)
+    rows = connection.execute(
+        f"SELECT {columns} FROM transactions_fts f JOIN transactions t ON t.id = f.rowid "
+        "WHERE transactions_fts MATCH ? ORDER BY t.timestamp DESC, t.id DESC",
+        (match,)
+    )
+    return count, rows
+
+
+def count_rows_through(last_id):
+    """Returns how many stored transactions have an id up to last_id."""
+    return connect().execute("SELECT COUNT(*) FROM transactions WHERE id <= ?", (last_id,)).fetchone()[0]
+
+
+def has_transactions():
+    """Returns True if at least one transaction is stored."""
+    return connect().execute("SELECT EXISTS (SELECT 1 FROM transactions)").fetchone()[0] == 1
+
+
+def load_budgets(month_year):
+    """Returns the budgets of a "YYYY-MM" month as a dictionary: {category: amount_paisa}"""
+    rows = connect().execute(
+        "SELECT category, amount_paisa FROM budgets WHERE month = ? ORDER BY rowid", (month_year,)
+    )
+    return dict(rows)
+
+
+def set_budget(month_year, category, amount_paisa):
+    """Sets (or replaces) the budget of a category for a "YYYY-MM" month."""
+    connection = connect()
+    with connection:
+        connection.execute(
+            "INSERT INTO budgets (month, category, amount_paisa) VALUES (?, ?, ?) "
+            "ON CONFLICT (month, category) DO UPDATE SET amount_paisa = excluded.amount_paisa",
+            (month_year, category, amount_paisa)
+        )
+
+
+def load_all_budgets():
+    """Returns every stored budget as a dictionary: {month_year: {category: amount_paisa}}"""
+    budgets = {}
+    for month_year, category, amount_paisa in connect().execute(
+        "SELECT month, category, amount_paisa FROM budgets ORDER BY rowid"
+    ):
+        budgets.setdefault(month_year, {})[category] = amount_paisa
+    return budgets
+
+
+def load_budget_range(start_month, end_month):
+    """
+    Returns the budgets of the months from start_month to end_month ("YYYY-MM", both
+    included): {month_year: {category: amount_paisa}}, in month order.
+    """
+    budgets = {}
+    for month_year, category, amount_paisa in connect().execute(
+        "SELECT month, category, amount_paisa FROM budgets WHERE month BETWEEN ? AND ? ORDER BY month, rowid",
+        (start_month, end_month)
+    ):
+        budgets.setdefault(month_year, {})[category] = amount_paisa
+    return budgets
+
+
+def write_replacement(transactions, budget_rows=()):
+    """
+    Builds a replacement database next to the live one from an iterable of transaction
+    dicts and (month, category, amount_paisa) budget rows. install_replacement() swaps it
+    in; discard_replacement() drops it. Returns the transaction count written.
+    """
+    discard_replacement()
+    connection = sqlite3.connect(REPLACEMENT_FILE)
+    try:
+        connection.executescript(SCHEMA)
+        with connection:
+            cursor = connection.executemany(
+                f"INSERT INTO transactions ({TRANSACTION_COLUMNS}) VALUES (?, ?, ?, ?, ?)",
+                _transaction_rows(transactions)
+            )
+            count = cursor.rowcount
+            _stamp_generation(connection)
+        add_replacement_budgets(budget_rows, connection)
+    finally:
+        connection.close()
+    return count
+
+
+def add_replacement_budgets(budget_rows, connection=None):
+    """Adds (month, category, amount_paisa) rows to the replacement database; a later row wins."""
+    close_after = connection is None
+    if connection is None:
+        connection = sqlite3.connect(REPLACEMENT_FILE)
+    try:
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO budgets (month, category, amount_paisa) VALUES (?, ?, ?)",
+                [(month_year, category, int(amount)) for month_year, category, amount in budget_rows]
+            )
+    finally:
+        if close_after:
+            connection.close()
+
+
+def install_replacement():
+    """
+    Atomically renames the replacement database over the live one. This thread's
+    connection is closed first, and the old database's WAL is dropped so it cannot be
+    replayed into the new file.
+    """
+    close()
+    for stale_path in (SQLITE_FILE + "-wal", SQLITE_FILE + "-shm"):
+        if os.path.exists(stale_path):
+            os.remove(stale_path)
+    os.replace(REPLACEMENT_FILE, SQLITE_FILE)
+
+
+def discard_replacement():
+    """Removes an uninstalled replacement database."""
+    for path in (REPLACEMENT_FILE, REPLACEMENT_FILE + "-journal"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class SQLiteRollups:
+    """
+    Month aggregates answered by GROUP BY queries on the SQLite store.
+
+    Offers the same queries as MonthlyRollups, so reports work on either. Each (month, type)
+    is one indexed range query on (type, timestamp), grouped by category; its result is
+    kept for the lifetime of this object, so one report costs one query per type.
+    """
+
+    def __init__(self):
+        self._summaries = {}
+
+    def has_transactions(self):
+        return has_transactions()
+
+    def _summary(self, month_year, trans_type):
+        key = (month_year, trans_type)
+        if key not in self._summaries:
+            start, end = month_bounds(month_year)
+            rows = connect().execute(
+                "SELECT category, SUM(amount_paisa), COUNT(*) FROM transactions "
+                "WHERE type = ? AND timestamp >= ? AND timestamp < ? GROUP BY category",
+                (trans_type, start, end)
+            ).fetchall()
+            self._summaries[key] = {category: (total, count) for category, total, count in rows}
+        return self._summaries[key]
+
+    def total(self, month_year, trans_type):
+        """Total amount_paisa of a type ("income"/"expense") in a "YYYY-MM" month."""
+        return sum(total for total, _ in self._summary(month_year, trans_type).values())
+
+    def count(self, month_year, trans_type):
+        """Number of transactions of a type in a "YYYY-MM" month."""
+        return sum(count for _, count in self._summary(month_year, trans_type).values())
+
+    def day_total(self, day, trans_type):
+        """Total amount_paisa of a type on a "YYYY-MM-DD" day."""
+        row = connect().execute(
+            "SELECT COALESCE(SUM(amount_paisa), 0) FROM transactions "
+            "WHERE type = ? AND timestamp >= ? AND timestamp < ?",
+            (trans_type, *DAYS.key_bounds(day))
+        ).fetchone()
+        return row[0]
+
+    def category_totals(self, month_year, trans_type, categories):
+        """
+        Returns a dictionary: {category: amount_paisa} of a type in a "YYYY-MM" month,
+        for the given categories, in order.
+        """
+        summary = self._summary(month_year, trans_type)
+        return {category: summary.get(category, (0, 0))[0] for category in categories}
+
+
+class SQLiteSignatureIndex:
+    """
+    Duplicate checks answered by the SQLite store's timestamp index.
+
+    Offers the same queries as SignatureIndex, so imports work on either. Signatures added
+    with add_signatures (records about to be imported) are kept in memory.
+    """
+
+    # SQLite's default limit on host parameters is 999 before version 3.32.
+    LOOKUP_BATCH = 500
+
+    def __init__(self):
+        self.added = set()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.lookups = 0
+        self.hits = 0
+
+    def stats(self):
+        return {
+            "signatures": None,
+            "bloom_bits": 0,
+            "lookups": self.lookups,
+            "bloom_rejections": 0,
+            "hits": self.hits,
+            "misses": self.lookups - self.hits
+        }
+
+    def contains_many(self, signatures):
+        """Tells, for each (timestamp, amount_paisa) signature, whether it is stored."""
+        signatures = [(float(timestamp), int(amount)) for timestamp, amount in signatures]
+        stored = set()
+        connection = connect()
+        for i in range(0, len(signatures), self.LOOKUP_BATCH):
+            timestamps = sorted({timestamp for timestamp, _ in signatures[i:i + self.LOOKUP_BATCH]})
+            stored.update(connection.execute(
+                f"SELECT timestamp, amount_paisa FROM transactions "
+                f"WHERE timestamp IN ({', '.join('?' * len(timestamps))})",
+                timestamps
+            ))
+        found = [signature in stored or signature in self.added for signature in signatures]
+        self.lookups += len(found)
+        self.hits += sum(found)
+        return found
+
+    def add_signatures(self, signatures):
+        self.added.update((float(timestamp), int(amount)) for timestamp, amount in signatures)
+
+
+def _iter_text_budgets():
+    try:
+        with open(BUDGETS_FILE, "r") as f:
+            for line in f:
+                parts = line.strip().split(',')
+                if len(parts) == 3:
+                    month_year, category, amount_paisa = parts
+                    try:
+                        yield month_year, category, int(amount_paisa)
+                    except ValueError:
+                        continue
+    except FileNotFoundError:
+        return
+
+
+def migrate_from_text():
+    """
+    One-shot migration of transactions.txt and budgets.txt (every month) into the SQLite
+    store, replacing whatever it held. The text files are left untouched.
+    Returns (transactions_migrated, budgets_migrated).
+    """
+    # Imported here: database.formats imports the binary ledger and NumPy, which the
+    # SQLite store does not otherwise need.
+    from database.formats import iter_text_transactions
+
+    transaction_count = replace_transactions(iter_text_transactions())
+    budgets = list(_iter_text_budgets())
+    connection = connect()
+    with connection:
+        connection.execute("DELETE FROM budgets")
+        # A later line for the same month and category wins, as in load_budgets.
+        connection.executemany(
+            "INSERT OR REPLACE INTO budgets (month, category, amount_paisa) VALUES (?, ?, ?)", budgets
+        )
+    budget_count = connection.execute("SELECT COUNT(*) FROM budgets").fetchone()[0]
+    return transaction_count, budget_count
@@ -0,0 +1,218 @@
+from array import array
+
+import numpy as np
+
+from database.cache import IncrementalFileCache
+from database import sqlite_store
+from database.binary_ledger import BinaryLedgerFormat
+from database.utils import (
+    parse_transaction_line,
+    console,
+    month_bounds,
+    TYPE_NAMES,
+    CATEGORY_NAMES,
+    storage_format,
+    TRANSACTIONS_FILE
+)
+
+
+class TransactionTable:
+    """
+    Columnar view of the transactions ledger.
+
+    Every transaction is one index into a set of parallel arrays:
+    - timestamps: float64 epoch seconds, as stored in every ledger format
+    - amounts: int64 amount in paisa
+    - type_codes / category_codes: int16 indexes into type_names / category_names
+    Descriptions are kept out of the numeric columns in a single UTF-8 string pool,
+    addressed by description_offsets (n + 1 entries).
+    """
+
+    def __init__(self, timestamps, amounts, type_codes, category_codes,
+                 description_pool, description_offsets, type_names, category_names):
+        self.timestamps = timestamps
+        self.amounts = amounts
+        self.type_codes = type_codes
+        self.category_codes = category_codes
+        self.description_pool = description_pool
+        self.description_offsets = description_offsets
+        self.type_names = type_names
+        self.category_names = category_names
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def description(self, index):
+        """Decodes the description of a single transaction."""
+        start = self.description_offsets[index]
+        end = self.description_offsets[index + 1]
+        return self.description_pool[start:end].decode("utf-8")
+
+    def row(self, index):
+        """Returns a single transaction as the dict shape used by load_all_transactions."""
+        return {
+            "timestamp": float(self.timestamps[index]),
+            "type": self.type_names[self.type_codes[index]],
+            "category": self.category_names[self.category_codes[index]],
+            "description": self.description(index),
+            "amount_paisa": int(self.amounts[index])
+        }
+
+    def rows(self):
+        """Returns every transaction as a dict, in ledger order."""
+        pool = self.description_pool
+        offsets = self.description_offsets.tolist()
+        type_names = self.type_names
+        category_names = self.category_names
+        return [
+            {
+                "timestamp": timestamp,
+                "type": type_names[type_code],
+                "category": category_names[category_code],
+                "description": pool[offsets[index]:offsets[index + 1]].decode("utf-8"),
+                "amount_paisa": amount_paisa
+            }
+            for index, (timestamp, type_code, category_code, amount_paisa) in enumerate(zip(
+                self.timestamps.tolist(), self.type_codes.tolist(),
+                self.category_codes.tolist(), self.amounts.tolist()
+            ))
+        ]
+
+    def type_mask(self, trans_type):
+        """Boolean mask of rows whose type matches trans_type (case-insensitive)."""
+        codes = [code for code, name in enumerate(self.type_names) if name.lower() == trans_type]
+        return np.isin(self.type_codes, codes)
+
+    def range_mask(self, start, end):
+        """Boolean mask of rows with start <= timestamp < end."""
+        return (self.timestamps >= start) & (self.timestamps < end)
+
+    def month_mask(self, month_year):
+        """Boolean mask of rows that fall in a "YYYY-MM" month (local time)."""
+        return self.range_mask(*month_bounds(month_year))
+
+    def total(self, mask):
+        """Sum of amount_paisa over the masked rows."""
+        return int(self.amounts[mask].sum())
+
+    def category_totals(self, mask, categories):
+        """
+        Sums amount_paisa per category over the masked rows.
+        Returns a dictionary: {category: amount_paisa} for the given categories, in order.
+        """
+        # np.add.at keeps the sums in int64; bincount weights would go through float64.
+        totals = np.zeros(len(self.category_names), dtype=np.int64)
+        np.add.at(totals, self.category_codes[mask], self.amounts[mask])
+        codes = {name: code for code, name in enumerate(self.category_names)}
+        return {
+            category: int(totals[codes[category]]) if category in codes else 0
+            for category in categories
+        }
+
+
+class TransactionTableBuilder:
+    """Accumulates parsed transactions into compact arrays and builds a TransactionTable."""
+
+    def __init__(self):
+        self.timestamps = array("d")
+        self.amounts = array("q")
+        self.type_codes = array("h")
+        self.category_codes = array("h")
+        self.description_pool = bytearray()
+        self.description_offsets = array("q", [0])
+        self.type_names = list(TYPE_NAMES)
+        self.category_names = list(CATEGORY_NAMES)
+        self._type_index = {name: code for code, name in enumerate(self.type_names)}
+        self._category_index = {name: code for code, name in enumerate(self.category_names)}
+
+    def _code(self, index, names, name):
+        code = index.get(name)
+        if code is None:
+            code = len(names)
+            names.append(name)
+            index[name] = code
+        return code
+
+    def append(self, timestamp, trans_type, category, description, amount_paisa):
+        self.timestamps.append(timestamp)
+        self.amounts.append(amount_paisa)
+        self.type_codes.append(self._code(self._type_index, self.type_names, trans_type))
+        self.category_codes.append(self._code(self._category_index, self.category_names, category))
+        self.description_pool += description.encode("utf-8")
+        self.description_offsets.append(len(self.description_pool))
+
+    def append_line(self, line):
+        parsed = parse_transaction_line(line)
+        if parsed is not None:
+            self.append(*parsed)
+
+    def build(self):
+        # The builder may keep growing after build(), so the table gets its own copies.
+        return TransactionTable(
+            timestamps=np.frombuffer(self.timestamps, dtype=np.float64).copy(),
+            amounts=np.frombuffer(self.amounts, dtype=np.int64).copy(),
+            type_codes=np.frombuffer(self.type_codes, dtype=np.int16).copy(),
+            category_codes=np.frombuffer(self.category_codes, dtype=np.int16).copy(),
+            description_pool=bytes(self.description_pool),
+            description_offsets=np.frombuffer(self.description_offsets, dtype=np.int64).copy(),
+            type_names=list(self.type_names),
+            category_names=list(self.category_names)
+        )
+
+
+_table_cache = IncrementalFileCache(
+    TRANSACTIONS_FILE,
+    new_state=TransactionTableBuilder,
+    consume=TransactionTableBuilder.append_line,
+    build=TransactionTableBuilder.build
+)
+
+
+def _load_binary_table():
+    records, strings, type_names, category_names = BinaryLedgerFormat().load_columns()
+    offsets = records["description_offset"].astype(np.int64)
+    lengths = records["description_length"].astype(np.int64)
+    end = int(offsets[-1] + lengths[-1]) if len(records) else 0
+    description_offsets = np.append(offsets, end)
+    if len(records) and (offsets[0] != 0 or not np.array_equal(offsets[1:], offsets[:-1] + lengths[:-1])):
+        # Descriptions are not stored back to back (e.g. a failed append left bytes behind),
+        # so build a contiguous pool.
+        descriptions = [strings[o:o + n] for o, n in zip(offsets.tolist(), lengths.tolist())]
+        description_offsets = np.zeros(len(records) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=description_offsets[1:])
+        strings = b"".join(descriptions)
+    else:
+        strings = bytes(strings[:end])
+    return TransactionTable(
+        timestamps=records["timestamp"].astype(np.float64),
+        amounts=records["amount_paisa"].astype(np.int64),
+        type_codes=records["type"].astype(np.int16),
+        category_codes=records["category"].astype(np.int16),
+        description_pool=strings,
+        description_offsets=description_offsets,
+        type_names=list(type_names),
+        category_names=list(category_names)
+    )
+
+
+def load_transaction_table():
+    """
+    Loads the whole ledger into a TransactionTable. For the text ledger the table is
+    cached for the whole process and only re-parses appended lines; the binary ledger
+    is read straight into the columns.
+    """
+    try:
+        if storage_format() == "binary":
+            return _load_binary_table()
+        if storage_format() == "sqlite":
+            builder = TransactionTableBuilder()
+            for record in sqlite_store.iter_transaction_rows():
+                builder.append(*record)
+            return builder.build()
+        return _table_cache.get()
+    except FileNotFoundError:
+        return TransactionTableBuilder().build()
+    except Exception as e:
+        console.print(f"[red]Error loading transactions: {e}[/red]")
+        _table_cache.invalidate()
+        return TransactionTableBuilder().build()
@@ -0,0 +1,132 @@
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+
+class TimeBuckets:
+    """
+    Local-time calendar buckets ("day", "month" or "year") with precomputed boundaries.
+
+    The epoch second at which each bucket starts is computed once from its local wall-clock
+    start, so DST shifts and historical UTC offset changes land exactly where the platform's
+    time zone rules put them. Classifying a timestamp is then a binary search over those
+    boundaries, and gives the same key as datetime.fromtimestamp(t).strftime(...) without
+    building a datetime per row. The boundaries grow on demand to cover every timestamp seen.
+    """
+
+    FORMATS = {"day": "%Y-%m-%d", "month": "%Y-%m", "year": "%Y"}
+
+    def __init__(self, unit):
+        self.unit = unit
+        self.format = self.FORMATS[unit]
+        # starts[i] is the first epoch second of the bucket named keys[i]; the last bucket
+        # ends at end. Boundaries are whole seconds, since UTC offsets are.
+        self.starts = []
+        self.keys = []
+        self.end = None
+        self._first_wall = None
+        self._end_wall = None
+        self._starts_array = None
+        self._last = (0, 0, None)
+
+    def _floor(self, moment):
+        if self.unit == "day":
+            return datetime(moment.year, moment.month, moment.day)
+        if self.unit == "month":
+            return datetime(moment.year, moment.month, 1)
+        return datetime(moment.year, 1, 1)
+
+    def _following(self, wall):
+        # Wall-clock arithmetic: the next bucket starts at local midnight, however many
+        # seconds away that is.
+        if self.unit == "day":
+            return wall + timedelta(days=1)
+        if self.unit == "month":
+            if wall.month == 12:
+                return wall.replace(year=wall.year + 1, month=1)
+            return wall.replace(month=wall.month + 1)
+        return wall.replace(year=wall.year + 1)
+
+    def _buckets(self, first_wall, end_wall):
+        starts = []
+        keys = []
+        wall = first_wall
+        while wall < end_wall:
+            starts.append(int(wall.timestamp()))
+            keys.append(wall.strftime(self.format))
+            wall = self._following(wall)
+        return starts, keys
+
+    def _cover(self, timestamp):
+        """Extends the boundaries so the bucket holding timestamp is known."""
+        if self.starts and self.starts[0] <= timestamp < self.end:
+            return
+        wall = self._floor(datetime.fromtimestamp(timestamp))
+        if not self.starts:
+            self._first_wall = wall
+            self._end_wall = wall
+        if wall < self._first_wall:
+            starts, keys = self._buckets(wall, self._first_wall)
+            self.starts = starts + self.starts
+            self.keys = keys + self.keys
+            self._first_wall = wall
+        elif wall >= self._end_wall:
+            end_wall = self._following(wall)
+            starts, keys = self._buckets(self._end_wall, end_wall)
+            self.starts += starts
+            self.keys += keys
+            self._end_wall = end_wall
+            self.end = int(end_wall.timestamp())
+        self._starts_array = None
+
+    def bucket(self, timestamp):
+        """Returns (start, end, key) of the bucket holding an epoch timestamp."""
+        start, end, key = self._last
+        if start <= timestamp < end:
+            # Consecutive rows usually share a bucket.
+            return self._last
+        self._cover(timestamp)
+        index = bisect_right(self.starts, timestamp) - 1
+        end = self.starts[index + 1] if index + 1 < len(self.starts) else self.end
+        self._last = (self.starts[index], end, self.keys[index])
+        return self._last
+
+    def key_of(self, timestamp):
+        """Returns the bucket key ("YYYY-MM-DD", "YYYY-MM" or "YYYY") of an epoch timestamp."""
+        return self.bucket(timestamp)[2]
+
+    def key_bounds(self, key):
+        """
+        Returns the (start, end) epoch seconds of the bucket named key.
+        A timestamp t belongs to it when start <= t < end.
+        """
+        wall = datetime.strptime(key, self.format)
+        return int(wall.timestamp()), int(self._following(wall).timestamp())
+
+    def indexes_of(self, timestamps):
+        """
+        Vectorized classification of a NumPy array of timestamps.
+        Returns an int array of indexes into keys (valid until the boundaries next grow).
+        """
+        import numpy as np
+
+        timestamps = np.asarray(timestamps)
+        if len(timestamps) == 0:
+            return np.zeros(0, dtype=np.intp)
+        self._cover(float(timestamps.min()))
+        self._cover(float(timestamps.max()))
+        if self._starts_array is None:
+            self._starts_array = np.asarray(self.starts, dtype=np.float64)
+        return np.searchsorted(self._starts_array, timestamps, side="right") - 1
+
+    def keys_of(self, timestamps):
+        """Vectorized key_of: returns a NumPy array of bucket keys for an array of timestamps."""
+        import numpy as np
+
+        indexes = self.indexes_of(timestamps)
+        return np.asarray(self.keys, dtype=object)[indexes]
+
+
+# Shared kernels; their boundaries are reused by every caller in the process.
+DAYS = TimeBuckets("day")
+MONTHS = TimeBuckets("month")
+YEARS = TimeBuckets("year")
@@ -1,61 +1,197 @@
 from rich.console import Console
-from datetime import datetime
+from database.timebuckets import MONTHS, YEARS
 
 # Transaction categories
 EXPENSE_CATEGORIES = ["Food", "Transport", "Shopping", "Bills", "Entertainment", "Health", "Other"]
 INCOME_CATEGORIES = ["Salary", "Freelance", "Business", "Investment", "Gift", "Other"]
 
+# Code 0/1 are always expense/income, and the first category codes always follow
+# EXPENSE_CATEGORIES then INCOME_CATEGORIES ("Other" is shared by both).
+# Unknown names found in the ledger are appended after these.
+TYPE_NAMES = ["expense", "income"]
+CATEGORY_NAMES = list(dict.fromkeys(EXPENSE_CATEGORIES + INCOME_CATEGORIES))
+
+# Ledger storage format: "text" (transactions.txt), "binary" (transactions.bin plus
+# a description heap) or "sqlite" (transactions and budgets in finance.db).
+# Use Data Management > Convert Ledger Format or Migrate to SQLite before switching.
+STORAGE_FORMAT = "text"
+
+# When appended transactions are fsynced: "always" (every write), "batch" (once per
+# group commit), "interval_ms" (at most every DURABILITY_INTERVAL_MS) or "never".
+DURABILITY = "batch"
+DURABILITY_INTERVAL_MS = 100
+
 TRANSACTIONS_FILE = "database/transactions.txt"
+BINARY_TRANSACTIONS_FILE = "database/transactions.bin"
+BINARY_STRINGS_FILE = "database/transactions.strings"
 BUDGETS_FILE = "database/budgets.txt"
+TRANSACTIONS_INDEX_FILE = "database/transactions_index.json"
+ROLLUPS_FILE = "database/rollups.json"
+SIGNATURE_INDEX_FILE = "database/signature_index.json"
+DESCRIPTION_INDEX_FILE = "database/description_index.json"
+SQLITE_FILE = "database/finance.db"
+BACKUP_REPOSITORY = "backups"
+
+# Field order of a line in the transactions file
+LEDGER_FIELDS = ("timestamp", "type", "category", "description", "amount_paisa")
 
 console = Console()
 
-def load_all_transactions():
-    """Loads all transactions from the transactions file."""
-    transactions = []
+# Modules read the settings above through these at call time rather than copying them at
+# import, so a change to database.utils (e.g. from a test) reaches every one of them.
+def storage_format():
+    """Returns the active ledger storage format: "text", "binary" or "sqlite"."""
+    return STORAGE_FORMAT
+
+def durability():
+    """Returns the (policy, interval_ms) pair appended transactions are fsynced by."""
+    return DURABILITY, DURABILITY_INTERVAL_MS
+
+def parse_transaction_line(line):
+    """
+    Parses one line of the transactions file.
+    Returns a (timestamp, type, category, description, amount_paisa) tuple,
+    or None if the line is malformed.
+    """
+    parts = line.strip().split(',')
+    if len(parts) == 5:
+        try:
+            timestamp, trans_type, category, description, amount_paisa_str = parts
+            return float(timestamp), trans_type, category, description, int(amount_paisa_str)
+        except ValueError as e:
+            console.print(f"[red]Skipping malformed transaction line: {line.strip()} - {e}[/red]")
+    else:
+        console.print(f"[red]Skipping malformed transaction line (incorrect number of parts): {line.strip()}[/red]")
+    return None
+
+def decode_ledger_fields(buffer, start, end, positions):
+    """
+    Decodes selected fields of the ledger line buffer[start:end]; fields not listed in
+    positions (indexes into LEDGER_FIELDS) are never converted.
+    Returns a tuple of the decoded fields, or None if the line is malformed.
+    """
+    # One C-level split of the line is cheaper than locating each comma from Python.
+    parts = buffer[start:end].split(b",")
+    if len(parts) != 5:
+        return None
+
+    values = []
     try:
-        with open(TRANSACTIONS_FILE, "r") as f:
-            for line in f:
-                parts = line.strip().split(',')
-                if len(parts) == 5:
-                    try:
-                        timestamp, trans_type, category, description, amount_paisa_str = parts
-                        transactions.append({
-                            "timestamp": float(timestamp),
-                            "type": trans_type,
-                            "category": category,
-                            "description": description,
-                            "amount_paisa": int(amount_paisa_str)
-                        })
-                    except ValueError as e:
-                        console.print(f"[red]Skipping malformed transaction line: {line.strip()} - {e}[/red]")
-                else:
-                    console.print(f"[red]Skipping malformed transaction line (incorrect number of parts): {line.strip()}[/red]")
-    except FileNotFoundError:
-        # This is not an error, it just means no transactions have been recorded yet.
-        pass
-    except Exception as e:
-        console.print(f"[red]Error loading transactions: {e}[/red]")
-    return transactions
+        for position in positions:
+            raw = parts[position]
+            if position == 0:
+                values.append(float(raw))
+            elif position == 4:
+                values.append(int(raw))
+            else:
+                values.append(raw.decode("utf-8"))
+    except ValueError:
+        return None
+    return tuple(values)
 
-def load_budgets():
+def month_bounds(month_year):
     """
-    Loads budgets from budgets.txt for the current month.
-    Returns a dictionary: {category: amount_paisa}
+    Returns the (start, end) epoch seconds of a "YYYY-MM" month in local time.
+    A timestamp t belongs to the month when start <= t < end.
     """
-    budgets = {}
-    current_month_year = datetime.now().strftime("%Y-%m")
+    return MONTHS.key_bounds(month_year)
+
+def year_bounds(year):
+    """Returns the (start, end) epoch seconds of a "YYYY" year in local time."""
+    return YEARS.key_bounds(str(year))
+
+def iter_transactions(start=None, end=None, types=None, categories=None, fields=None):
+    """
+    Streams transactions from the ledger as dicts, in file order.
+
+    Only transactions with start <= timestamp < end, a type in types (case-insensitive)
+    and a category in categories are yielded; any filter left as None is not applied.
+    fields picks the keys of each dict (all of LEDGER_FIELDS by default), and fields that
+    neither the filters nor the caller need are never decoded. Records failing a filter
+    are dropped before a dict is built.
+
+    With a start or end, only the ledger byte ranges the month index lists for the
+    overlapping months are read; the SQLite store runs the filters as one indexed query.
+    """
+    fields = LEDGER_FIELDS if fields is None else tuple(fields)
+    if types is not None:
+        types = {trans_type.lower() for trans_type in types}
+    if categories is not None:
+        categories = set(categories)
+
+    if STORAGE_FORMAT == "sqlite":
+        # Imported here: these modules import this one.
+        from database import sqlite_store
+        for values in sqlite_store.iter_fields(fields, start, end, types, categories):
+            yield dict(zip(fields, values))
+        return
+
+    from database.formats import get_ledger_format
+    from database.month_index import load_month_index
+
+    positions = [LEDGER_FIELDS.index(field) for field in fields]
+    for position, needed in ((0, start is not None or end is not None), (1, types is not None), (2, categories is not None)):
+        if needed and position not in positions:
+            positions.append(position)
+    timestamp_at, type_at, category_at = (
+        positions.index(position) if position in positions else None for position in (0, 1, 2)
+    )
+    ranges = None
+    if start is not None or end is not None:
+        ranges = load_month_index().ranges_between(start, end)
+
     try:
-        with open(BUDGETS_FILE, "r") as f:
-            for line in f:
-                parts = line.strip().split(',')
-                if len(parts) == 3:
-                    month_year, category, amount_paisa = parts
-                    if month_year == current_month_year:
-                        budgets[category] = int(amount_paisa)
-        return budgets
+        for record in get_ledger_format().iter_fields(positions, ranges):
+            if start is not None and record[timestamp_at] < start:
+                continue
+            if end is not None and record[timestamp_at] >= end:
+                continue
+            if types is not None and record[type_at].lower() not in types:
+                continue
+            if categories is not None and record[category_at] not in categories:
+                continue
+            yield dict(zip(fields, record))
     except FileNotFoundError:
-        return {}
-    except Exception as e:
-        console.print(f"Error loading budgets: {e}")
-        return {}
+        return
+
+def parse_transaction_dict(line):
+    """Parses one line of the transactions file into a transaction dict, or None if malformed."""
+    parsed = parse_transaction_line(line)
+    if parsed is None:
+        return None
+    timestamp, trans_type, category, description, amount_paisa = parsed
+    return {
+        "timestamp": timestamp,
+        "type": trans_type,
+        "category": category,
+        "description": description,
+        "amount_paisa": amount_paisa
+    }
+
+def load_all_transactions():
+    """
+    Loads all transactions from the ledger as dicts, in ledger order.
+    The ledger is read into a columnar TransactionTable (see database.table); for the text
+    ledger that table is cached for the whole process, so repeat calls only parse lines
+    appended since the previous call.
+    """
+    # Imported here: database.table imports this module.
+    from database.table import load_transaction_table
+    return load_transaction_table().rows()
+
+def load_all_budgets():
+    """
+    Loads the budgets of every month from budgets.txt (or the SQLite store).
+    Returns a dictionary: {month_year: {category: amount_paisa}}
+    """
+    # Imported here: database.budget_store imports this module.
+    from database import budget_store
+    return budget_store.load_all_budgets()
+
+def load_budgets(month_year=None):
+    """
+    Loads the budgets of a "YYYY-MM" month (the current month by default) from
+    budgets.txt (or the SQLite store). Returns a dictionary: {category: amount_paisa}
+    """
+    from database import budget_store
+    return budget_store.load_budgets(month_year)
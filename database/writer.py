@@ -0,0 +1,238 @@
+import atexit
+import os
+import threading
+import time
+
+from database import sqlite_store
+from database.formats import get_ledger_format
+from database.description_index import DescriptionIndex
+from database.month_index import MonthIndex
+from database.rollups import MonthlyRollups
+from database.signature_index import SignatureIndex
+from database.utils import durability as durability_setting, storage_format
+
+# Files derived from the ledger that are updated as part of every commit.
+SIDECARS = [MonthIndex, MonthlyRollups, SignatureIndex, DescriptionIndex]
+
+# The sidecars catch up from the ledger on their own, so saving them after every commit
+# is not needed for correctness; the writer saves them at most this often (and on flush).
+SIDECAR_SAVE_INTERVAL = 1.0
+
+DURABILITY_POLICIES = ("always", "batch", "interval_ms", "never")
+
+
+class _Ticket:
+    """One append_many() call waiting to be committed."""
+
+    __slots__ = ("records", "done", "error")
+
+    def __init__(self, records):
+        self.records = records
+        self.done = False
+        self.error = None
+
+
+class LedgerWriter:
+    """
+    Group-commit writer for the ledger.
+
+    append_many() calls that arrive while a commit is in progress are queued, and the next
+    commit writes all of them with a single buffered write. The durability policy decides
+    when the ledger is fsynced:
+    - "always": every append_many() call is its own commit and is fsynced before it returns.
+    - "batch": queued calls share one commit and one fsync; each returns once it is on disk.
+    - "interval_ms": commits are fsynced at most once every interval_ms milliseconds, so a
+      power failure can lose that window of writes. Calls return without waiting for it.
+    - "never": fsync is left to the operating system.
+    The SQLite store applies the same policy through its synchronous pragma instead.
+    """
+
+    def __init__(self, durability=None, interval_ms=None):
+        # Unset arguments come from DURABILITY and DURABILITY_INTERVAL_MS in database/utils.py.
+        default_durability, default_interval_ms = durability_setting()
+        durability = default_durability if durability is None else durability
+        interval_ms = default_interval_ms if interval_ms is None else interval_ms
+        if durability not in DURABILITY_POLICIES:
+            raise ValueError(f"Unknown durability policy: {durability}")
+        self.durability = durability
+        self.interval = interval_ms / 1000
+        self._condition = threading.Condition()
+        self._pending = []
+        self._committing = False
+        self._sidecars = None
+        self._last_sync = time.monotonic()
+        self._last_save = time.monotonic()
+        self._unsynced = False
+        self._timer = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.commits = 0
+        self.records = 0
+        self.fsyncs = 0
+        self.commit_seconds = 0.0
+        self.max_commit_seconds = 0.0
+
+    def stats(self):
+        """Returns the commit count, records written, fsyncs, throughput and commit latency."""
+        return {
+            "commits": self.commits,
+            "records": self.records,
+            "fsyncs": self.fsyncs,
+            "records_per_second": self.records / self.commit_seconds if self.commit_seconds else 0.0,
+            "average_commit_ms": self.commit_seconds / self.commits * 1000 if self.commits else 0.0,
+            "max_commit_ms": self.max_commit_seconds * 1000
+        }
+
+    def append_many(self, records):
+        """
+        Appends transaction dicts to the ledger as part of a group commit and keeps the
+        ledger index and monthly rollups in step. Returns once the records are written
+        (and fsynced, for the "always" and "batch" policies).
+        """
+        ticket = _Ticket(list(records))
+        if not ticket.records:
+            return
+        with self._condition:
+            self._pending.append(ticket)
+            while not ticket.done and self._committing:
+                self._condition.wait()
+            if ticket.done:
+                # Another caller committed these records along with its own.
+                if ticket.error is not None:
+                    raise ticket.error
+                return
+            # Lead the next commit.
+            self._committing = True
+            if self.durability == "always":
+                self._pending.remove(ticket)
+                taken = [ticket]
+            else:
+                taken, self._pending = self._pending, []
+
+        error = None
+        try:
+            self._commit([record for t in taken for record in t.records])
+        except Exception as e:
+            error = e
+        with self._condition:
+            for t in taken:
+                t.done = True
+                t.error = error
+            self._committing = False
+            self._condition.notify_all()
+        if error is not None:
+            raise error
+
+    def _commit(self, records):
+        started = time.perf_counter()
+        if storage_format() == "sqlite":
+            sqlite_store.append_transactions(records)
+        else:
+            self._commit_to_ledger(records)
+        elapsed = time.perf_counter() - started
+        self.commits += 1
+        self.records += len(records)
+        self.commit_seconds += elapsed
+        self.max_commit_seconds = max(self.max_commit_seconds, elapsed)
+
+    def _commit_to_ledger(self, records):
+        fmt = get_ledger_format()
+        if self._sidecars is None:
+            self._sidecars = [sidecar_class.load() for sidecar_class in SIDECARS]
+            size = None
+        else:
+            try:
+                size = os.path.getsize(fmt.path)
+            except FileNotFoundError:
+                size = None
+        for sidecar in self._sidecars:
+            # Sidecars this writer kept up to date only need a catch-up when something else
+            # changed the ledger; the ledger's size tells cheaply.
+            if size is None or sidecar.offset != max(size, fmt.data_start) or sidecar.format.name != fmt.name:
+                sidecar.refresh()
+
+        sync = self.durability in ("always", "batch")
+        if self.durability == "interval_ms":
+            sync = time.monotonic() - self._last_sync >= self.interval
+        base_offset, data, decoded = fmt.append(records, sync=sync)
+        if sync:
+            self.fsyncs += 1
+            self._last_sync = time.monotonic()
+            self._unsynced = False
+        elif data:
+            self._unsynced = True
+            if self.durability == "interval_ms" and self._timer is None:
+                # Make sure this commit reaches the disk within the interval even if no
+                # further commit comes along to fsync it.
+                self._timer = threading.Timer(self.interval, self._sync_if_needed)
+                self._timer.daemon = True
+                self._timer.start()
+        if not data:
+            return
+
+        # The format hands back the new records' fields, shared by every sidecar.
+        for sidecar in self._sidecars:
+            if base_offset == max(sidecar.offset, fmt.data_start):
+                # The format that wrote the records knows any type or category names they added.
+                sidecar.format = fmt
+                sidecar.add_decoded(decoded, data, base_offset, 0, len(data))
+            else:
+                # The ledger did not end on a record boundary the sidecar knows about; catch up from disk.
+                sidecar.refresh()
+        if time.monotonic() - self._last_save >= SIDECAR_SAVE_INTERVAL:
+            self._save_sidecars()
+
+    def _save_sidecars(self):
+        for sidecar in self._sidecars or []:
+            sidecar.save()
+        self._last_save = time.monotonic()
+
+    def _sync_if_needed(self):
+        with self._condition:
+            while self._committing:
+                self._condition.wait()
+            self._timer = None
+            if self._unsynced and self.durability != "never":
+                get_ledger_format().sync()
+                self.fsyncs += 1
+                self._last_sync = time.monotonic()
+            self._unsynced = False
+
+    def flush(self):
+        """fsyncs anything not yet on disk (unless the policy is "never") and saves the sidecars."""
+        self._sync_if_needed()
+        with self._condition:
+            while self._committing:
+                self._condition.wait()
+            self._save_sidecars()
+
+    def close(self):
+        """Flushes the writer and forgets its sidecars; the next commit reloads them from disk."""
+        self.flush()
+        self._sidecars = None
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """Returns the process-wide LedgerWriter, configured from DURABILITY in database/utils.py."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = LedgerWriter()
+            atexit.register(_writer.close)
+        return _writer
+
+
+def close_writer():
+    """Closes the process-wide writer, e.g. before the ledger is rewritten by something else."""
+    if _writer is not None:
+        _writer.close()
+
+
+def append_many(records):
+    """Appends transaction dicts to the ledger through the process-wide group-commit writer."""
+    get_writer().append_many(records)
@@ -3,42 +3,29 @@ from datetime import datetime, timedelta
 from rich.console import Console
 from rich.table import Table
 from rich.text import Text
-from database.utils import load_all_transactions, load_budgets, EXPENSE_CATEGORIES, INCOME_CATEGORIES
+from .report import build_report_context
 
 console = Console()
 
-def spending_analysis():
+def spending_analysis(context=None):
     """
     Analyzes and displays spending patterns for the current month.
+    Pass a ReportContext to reuse aggregates already computed for another section.
     """
     console.print(Text("\n--- Spending Analysis ---", style="bold blue"))
 
-    transactions = load_all_transactions()
-    if not transactions:
+    if context is None:
+        context = build_report_context()
+    if not context.has_transactions:
         console.print("[yellow]No transactions recorded yet.[/yellow]")
         return
 
-    current_month_year = datetime.now().strftime("%Y-%m")
-    
-    current_month_expenses = [
-        t for t in transactions 
-        if t['type'].lower() == 'expense' and 
-           datetime.fromtimestamp(t['timestamp']).strftime('%Y-%m') == current_month_year
-    ]
-
-    if not current_month_expenses:
+    if not context.expense_count:
         console.print("[yellow]No expenses recorded for the current month.[/yellow]")
         return
 
-    # Calculate spending breakdown by category
-    spending_by_category = {cat: 0 for cat in EXPENSE_CATEGORIES}
-    total_expense = 0
-    for expense in current_month_expenses:
-        category = expense['category']
-        amount = expense['amount_paisa']
-        if category in spending_by_category:
-            spending_by_category[category] += amount
-        total_expense += amount
+    spending_by_category = context.spending_by_category
+    total_expense = context.total_expense
 
     # Display spending breakdown in a table
     table = Table(title=f"Spending Breakdown for {datetime.now().strftime('%B %Y')}")
@@ -78,38 +65,25 @@ def spending_analysis():
         bar = "█" * bar_length
         console.print(f"{category:<15} {bar} {percentage:.1f}%")
 
-def income_analysis():
+def income_analysis(context=None):
     """
     Analyzes and displays income patterns for the current month.
+    Pass a ReportContext to reuse aggregates already computed for another section.
     """
     console.print(Text("\n--- Income Analysis ---", style="bold green"))
 
-    transactions = load_all_transactions()
-    if not transactions:
+    if context is None:
+        context = build_report_context()
+    if not context.has_transactions:
         console.print("[yellow]No transactions recorded yet.[/yellow]")
         return
 
-    current_month_year = datetime.now().strftime("%Y-%m")
-    
-    current_month_income = [
-        t for t in transactions 
-        if t['type'].lower() == 'income' and 
-           datetime.fromtimestamp(t['timestamp']).strftime('%Y-%m') == current_month_year
-    ]
-
-    if not current_month_income:
+    if not context.income_count:
         console.print("[yellow]No income recorded for the current month.[/yellow]")
         return
 
-    # Calculate income breakdown by source
-    income_by_source = {cat: 0 for cat in INCOME_CATEGORIES}
-    total_income = 0
-    for income in current_month_income:
-        category = income['category']
-        amount = income['amount_paisa']
-        if category in income_by_source:
-            income_by_source[category] += amount
-        total_income += amount
+    income_by_source = context.income_by_source
+    total_income = context.total_income
 
     # Display income breakdown in a table
     table = Table(title=f"Income Breakdown for {datetime.now().strftime('%B %Y')}")
@@ -128,31 +102,23 @@ def income_analysis():
     console.print(Text("\n--- Total Income ---", style="bold green"))
     console.print(f"Total Income this month: [green]{total_income / 100:.2f} Rs[/green]")
 
-def savings_analysis():
+def savings_analysis(context=None):
     """
     Analyzes and displays savings for the current month.
+    Pass a ReportContext to reuse aggregates already computed for another section.
     """
     console.print(Text("\n--- Savings Analysis ---", style="bold yellow"))
 
-    transactions = load_all_transactions()
-    if not transactions:
+    if context is None:
+        context = build_report_context()
+    if not context.has_transactions:
         console.print("[yellow]No transactions recorded yet.[/yellow]")
         return
 
-    current_month_year = datetime.now().strftime("%Y-%m")
-    
-    total_income = 0
-    total_expense = 0
-
-    for t in transactions:
-        if datetime.fromtimestamp(t['timestamp']).strftime('%Y-%m') == current_month_year:
-            if t['type'].lower() == 'income':
-                total_income += t['amount_paisa']
-            elif t['type'].lower() == 'expense':
-                total_expense += t['amount_paisa']
-
-    monthly_savings = total_income - total_expense
-    savings_rate = (monthly_savings / total_income) * 100 if total_income > 0 else 0
+    total_income = context.total_income
+    total_expense = context.total_expense
+    monthly_savings = context.savings
+    savings_rate = context.savings_rate
 
     savings_style = "green" if monthly_savings >= 0 else "red"
 
@@ -161,29 +127,21 @@ def savings_analysis():
     console.print(f"Monthly Savings: [{savings_style}]{monthly_savings / 100:.2f} Rs[/{savings_style}]")
     console.print(f"Savings Rate: [{savings_style}]{savings_rate:.2f}%[/{savings_style}]")
 
-def financial_health_score():
+def financial_health_score(context=None):
     """
     Calculates and displays a financial health score.
+    Pass a ReportContext to reuse aggregates already computed for another section.
     """
     console.print(Text("\n--- Financial Health Score ---", style="bold magenta"))
 
-    transactions = load_all_transactions()
-    budgets = load_budgets()
-
-    current_month_year = datetime.now().strftime("%Y-%m")
-    
-    total_income = 0
-    total_expense = 0
+    if context is None:
+        context = build_report_context()
 
-    for t in transactions:
-        if datetime.fromtimestamp(t['timestamp']).strftime('%Y-%m') == current_month_year:
-            if t['type'].lower() == 'income':
-                total_income += t['amount_paisa']
-            elif t['type'].lower() == 'expense':
-                total_expense += t['amount_paisa']
+    total_income = context.total_income
+    total_expense = context.total_expense
 
     # 1. Savings Rate Score (30 points)
-    savings_rate = ((total_income - total_expense) / total_income) * 100 if total_income > 0 else 0
+    savings_rate = context.savings_rate
     if savings_rate > 20:
         savings_score = 30
     elif savings_rate > 10:
@@ -194,10 +152,10 @@ def financial_health_score():
         savings_score = 0
 
     # 2. Budget Adherence Score (25 points)
-    total_budget = sum(budgets.values())
+    total_budget = context.total_budget
     budget_adherence_score = 0
     if total_budget > 0:
-        utilization = (total_expense / total_budget) * 100
+        utilization = context.total_utilization
         if utilization < 90:
             budget_adherence_score = 25
         elif utilization <= 100:
@@ -234,12 +192,14 @@ def financial_health_score():
 def generate_comprehensive_report():
     """
     Generates a comprehensive financial report for the current month.
+    The data is loaded once and every section renders from the same ReportContext.
     """
     console.print(Text("\n--- Comprehensive Financial Report ---", style="bold magenta"))
-    spending_analysis()
-    income_analysis()
-    savings_analysis()
-    financial_health_score()
+    context = build_report_context()
+    spending_analysis(context)
+    income_analysis(context)
+    savings_analysis(context)
+    financial_health_score(context)
 
 def show_analytics_menu():
     """
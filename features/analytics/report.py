@@ -0,0 +1,59 @@
+from datetime import date, datetime
+
+from database.utils import load_budgets, EXPENSE_CATEGORIES, INCOME_CATEGORIES
+from database.rollups import load_rollups
+
+
+class ReportContext:
+    """
+    Aggregates shared by every report section for one month.
+
+    Everything here is computed in one pass over the month's rollups plus a single read
+    of the budgets, so a report made of several sections costs one load instead of one
+    full ledger scan per section.
+    """
+
+    def __init__(self, month_year, rollups, budgets):
+        self.month_year = month_year
+        self.has_transactions = rollups.has_transactions()
+        self.budgets = budgets
+
+        # Spending
+        self.expense_count = rollups.count(month_year, 'expense')
+        self.spending_by_category = rollups.category_totals(month_year, 'expense', EXPENSE_CATEGORIES)
+        self.total_expense = rollups.total(month_year, 'expense')
+
+        # Income
+        self.income_count = rollups.count(month_year, 'income')
+        self.income_by_source = rollups.category_totals(month_year, 'income', INCOME_CATEGORIES)
+        self.total_income = rollups.total(month_year, 'income')
+
+        # Savings
+        self.savings = self.total_income - self.total_expense
+        self.savings_rate = (self.savings / self.total_income) * 100 if self.total_income > 0 else 0
+
+        # Budgets
+        self.total_budget = sum(budgets.values())
+        self.budget_spent = rollups.category_totals(month_year, 'expense', budgets)
+        self.budget_utilization = {
+            category: (self.budget_spent[category] / amount) * 100 if amount > 0 else 0
+            for category, amount in budgets.items()
+        }
+        self.total_utilization = (self.total_expense / self.total_budget) * 100 if self.total_budget > 0 else 0
+
+        # Today (zero unless the report is for the current month)
+        today = date.today()
+        self.today_expense = (
+            rollups.day_total(today.strftime("%Y-%m-%d"), 'expense')
+            if month_year == today.strftime("%Y-%m") else 0
+        )
+
+
+def build_report_context(month_year=None):
+    """
+    Builds the ReportContext for a "YYYY-MM" month (the current month by default),
+    loading the rollups and the budgets exactly once.
+    """
+    if month_year is None:
+        month_year = datetime.now().strftime("%Y-%m")
+    return ReportContext(month_year, rollups=load_rollups(), budgets=load_budgets(month_year))
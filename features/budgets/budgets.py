@@ -4,32 +4,21 @@ from rich.console import Console
 from rich.table import Table
 from rich.text import Text
 from rich.progress import ProgressBar
-from database.utils import (
-    load_all_transactions,
-    load_budgets,
-    EXPENSE_CATEGORIES,
-    BUDGETS_FILE
-)
+from database.utils import EXPENSE_CATEGORIES
+from database import budget_store
+from database.rollups import load_rollups
 
 # Initialize Rich console
 console = Console()
 
-def _get_current_month_expenses():
+def _get_month_expenses(month_year, rollups=None):
     """
-    Reads transactions for the current month and aggregates expenses by category.
+    Aggregates a "YYYY-MM" month's expenses by category, from the monthly rollups.
     Returns a dictionary: {category: spent_amount_paisa}
     """
-    expenses = {cat: 0 for cat in EXPENSE_CATEGORIES}
-    current_month_year = datetime.now().strftime("%Y-%m")
-    
-    all_transactions = load_all_transactions()
-
-    for t in all_transactions:
-        transaction_date = datetime.fromtimestamp(t['timestamp'])
-        if transaction_date.strftime("%Y-%m") == current_month_year and t['type'].lower() == "expense":
-            if t['category'] in expenses:
-                expenses[t['category']] += t['amount_paisa']
-    return expenses
+    if rollups is None:
+        rollups = load_rollups()
+    return rollups.category_totals(month_year, "expense", EXPENSE_CATEGORIES)
 
 
 def set_budget():
@@ -65,48 +54,62 @@ def set_budget():
 
     current_month = datetime.now().strftime("%Y-%m") # YYYY-MM format
 
-    # Save to budgets.txt
     try:
-        # Check if budget for this category and month already exists to update it
-        existing_budgets = []
-        updated = False
-        try:
-            with open(BUDGETS_FILE, "r") as f:
-                for line in f:
-                    parts = line.strip().split(',')
-                    if len(parts) == 3:
-                        m_y, cat, _ = parts
-                        if m_y == current_month and cat == category:
-                            existing_budgets.append(f"{current_month},{category},{amount_paisa}\n")
-                            updated = True
-                        else:
-                            existing_budgets.append(line)
-                    else:
-                        existing_budgets.append(line) # Keep malformed lines
-        except FileNotFoundError:
-            pass # File will be created
-
-        with open(BUDGETS_FILE, "w") as f:
-            if updated:
-                f.writelines(existing_budgets)
-            else:
-                f.writelines(existing_budgets) # Write existing lines back
-                f.write(f"{current_month},{category},{amount_paisa}\n") # Add new budget
-
+        budget_store.set_budget(current_month, category, amount_paisa)
         console.print(Text(f"Budget of Rs {amount:.2f} set for {category} for {current_month}.", style="green"))
     except IOError as e:
         console.print(Text(f"Error saving budget: {e}", style="red"))
 
 
+def _ask_month(prompt):
+    """Asks for a "YYYY-MM" month until a valid one is entered. Returns None if cancelled."""
+    while True:
+        month_year = questionary.text(prompt, default=datetime.now().strftime("%Y-%m")).ask()
+        if not month_year:
+            return None
+        try:
+            datetime.strptime(month_year, "%Y-%m")
+            return month_year
+        except ValueError:
+            console.print(Text("Invalid month. Please use the YYYY-MM format.", style="red"))
+
+
 def view_budgets():
     """
-    Displays current month's budgets and spending against them.
+    Asks which period to review (the current month, any past month or a whole year)
+    and displays its budgets and spending against them.
+    """
+    period = questionary.select(
+        "Which budgets would you like to view?",
+        choices=["Current Month", "Specific Month", "Specific Year"]
+    ).ask()
+
+    if period == "Current Month":
+        view_month_budgets()
+    elif period == "Specific Month":
+        month_year = _ask_month("Enter the month (YYYY-MM):")
+        if month_year:
+            view_month_budgets(month_year)
+    elif period == "Specific Year":
+        year = questionary.text("Enter the year (YYYY):", default=str(datetime.now().year)).ask()
+        if year and year.isdigit() and len(year) == 4:
+            view_year_budgets(year)
+        elif year:
+            console.print(Text("Invalid year. Please use the YYYY format.", style="red"))
+
+
+def view_month_budgets(month_year=None):
+    """
+    Displays a "YYYY-MM" month's budgets (the current month by default) and spending
+    against them.
     """
     console.print(Text("\n--- Monthly Budget Overview ---", style="bold blue"))
 
-    current_month_budgets = load_budgets()
-    current_month_expenses = _get_current_month_expenses()
-    current_month_year = datetime.now().strftime("%B %Y")
+    if month_year is None:
+        month_year = datetime.now().strftime("%Y-%m")
+    current_month_budgets = budget_store.load_budgets(month_year)
+    current_month_expenses = _get_month_expenses(month_year)
+    current_month_year = datetime.strptime(month_year, "%Y-%m").strftime("%B %Y")
 
     table = Table(title=f"Budget vs. Spending ({current_month_year})")
     table.add_column("Category", style="cyan", justify="left")
@@ -191,7 +194,61 @@ def view_budgets():
         console.print(Text("Consider adjusting your spending in these areas.", style="yellow"))
 
     if total_budget_paisa == 0:
-        console.print(Text("\nNo budgets set for the current month. Use 'Set Budget' to get started!", style="italic yellow"))
+        console.print(Text(f"\nNo budgets set for {current_month_year}. Use 'Set Budget' to get started!", style="italic yellow"))
+
+
+def view_year_budgets(year):
+    """
+    Displays the total budget and spending of every month of a "YYYY" year, from the
+    budget index and the monthly rollups (the ledger is not scanned).
+    """
+    console.print(Text(f"\n--- Budget Overview for {year} ---", style="bold blue"))
+
+    year_budgets = budget_store.load_budget_range(f"{year}-01", f"{year}-12")
+    rollups = load_rollups()
+
+    table = Table(title=f"Budget vs. Spending by Month ({year})")
+    table.add_column("Month", style="cyan", justify="left")
+    table.add_column("Budget (Rs)", style="magenta", justify="right")
+    table.add_column("Spent (Rs)", style="red", justify="right")
+    table.add_column("Remaining (Rs)", style="green", justify="right")
+    table.add_column("Utilization (%)", justify="right")
+    table.add_column("Over Budget", justify="left")
+
+    total_budget_paisa = 0
+    total_spent_paisa = 0
+    for month in range(1, 13):
+        month_year = f"{year}-{month:02d}"
+        budgets = year_budgets.get(month_year, {})
+        expenses = _get_month_expenses(month_year, rollups)
+        budget_paisa = sum(budgets.get(category, 0) for category in EXPENSE_CATEGORIES)
+        spent_paisa = sum(expenses.values())
+        if budget_paisa == 0 and spent_paisa == 0:
+            continue
+
+        utilization = f"{(spent_paisa / budget_paisa) * 100:.1f}%" if budget_paisa > 0 else "-"
+        over = [
+            category for category in EXPENSE_CATEGORIES
+            if budgets.get(category, 0) > 0 and expenses[category] > budgets[category]
+        ]
+        total_budget_paisa += budget_paisa
+        total_spent_paisa += spent_paisa
+        table.add_row(
+            datetime.strptime(month_year, "%Y-%m").strftime("%B"),
+            f"{budget_paisa / 100:.2f}",
+            f"{spent_paisa / 100:.2f}",
+            f"{(budget_paisa - spent_paisa) / 100:.2f}",
+            utilization,
+            Text(", ".join(over), style="red")
+        )
+
+    if total_budget_paisa == 0 and total_spent_paisa == 0:
+        console.print(Text(f"No budgets or expenses recorded for {year}.", style="italic yellow"))
+        return
+
+    console.print(table)
+    console.print(f"Total Budget: [magenta]{total_budget_paisa / 100:.2f}[/magenta] Rs")
+    console.print(f"Total Spent: [red]{total_spent_paisa / 100:.2f}[/red] Rs")
 
 
 if __name__ == '__main__':
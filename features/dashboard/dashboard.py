@@ -1,4 +1,5 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import sys
@@ -7,34 +8,84 @@ import os
 # Add the project root to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from database.utils import load_all_transactions, load_budgets
-
-def run():
-    st.set_page_config(layout="wide", page_title="Financial Dashboard")
-
-    st.title("Personal Finance Dashboard")
-
-    # Load data
-    transactions = load_all_transactions()
-    budgets = load_budgets()
-
-    if not transactions:
+from database.description_index import SearchError, SEARCH_HELP
+from features.analytics.report import build_report_context
+from features.dashboard.data import load_dashboard_data, page_of, search_frame
+from features.dashboard.watcher import get_ledger_watcher
+
+# Page sizes offered by the transaction explorer.
+PAGE_SIZES = [25, 50, 100, 250]
+
+# Seconds between checks of the live panels for changes found by the ledger watcher.
+LIVE_REFRESH_SECONDS = 0.5
+
+def _styled_transactions(df):
+    """
+    Formats transactions for display, one whole column at a time: dates as YYYY-MM-DD,
+    amounts in rupees, income rows green and expense rows red.
+    """
+    display = df[['date', 'type', 'category', 'description', 'amount']].copy()
+    display['date'] = display['date'].dt.strftime('%Y-%m-%d')
+    colors = np.where(display['type'].astype(str).str.lower() == 'income', 'color: green', 'color: red')
+    styles = pd.DataFrame(
+        np.repeat(colors[:, np.newaxis], len(display.columns), axis=1),
+        index=display.index,
+        columns=display.columns
+    )
+    return display.style.format({"amount": "₹{:,.2f}"}).apply(lambda _: styles, axis=None)
+
+def _budget_frame(budgets, spent_by_category):
+    """Builds the budget status table, computing every column for all categories at once."""
+    budget = pd.Series(budgets, dtype="int64") / 100
+    spent = pd.Series(spent_by_category, dtype="int64").reindex(budget.index, fill_value=0) / 100
+    utilization = (spent / budget * 100).where(budget > 0, 0)
+    return pd.DataFrame({
+        "Category": budget.index,
+        "Budget": budget.to_numpy(),
+        "Spent": spent.to_numpy(),
+        "Remaining": (budget - spent).to_numpy(),
+        "Utilization": utilization.to_numpy(),
+        "Status": np.select([utilization >= 100, utilization >= 70], ["🔴 Over", "🟡 Warning"], "🟢 OK")
+    })
+
+def _live_panels_state():
+    """
+    Returns what the live panels show. It is only recomputed after the ledger watcher saw
+    the ledger or the budgets change, so refreshes of an idle ledger read nothing.
+    """
+    generation = get_ledger_watcher().generation
+    current_month_year = datetime.now().strftime("%Y-%m")
+    state = st.session_state.get("live_panels")
+    if state is None or state["generation"] != generation or state["month"] != current_month_year:
+        data = load_dashboard_data()
+        # The month's totals and budget spending come from the rollups, as in the reports.
+        report = build_report_context(current_month_year)
+        state = {
+            "generation": generation,
+            "month": current_month_year,
+            "empty": data.frame.empty,
+            "totals": {"income": report.total_income, "expense": report.total_expense},
+            "budget_df": _budget_frame(report.budgets, report.budget_spent) if report.budgets else None,
+            "recent": _styled_transactions(data.recent_transactions(10))
+        }
+        st.session_state["live_panels"] = state
+    return state
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def live_panels():
+    """
+    The month's balance, budget status and recent transactions. Streamlit reruns only
+    this fragment on a timer, so new CLI entries appear in place without rerunning the page.
+    """
+    state = _live_panels_state()
+
+    if state["empty"]:
         st.warning("No transactions found. Add some transactions in the CLI to see the dashboard.")
         return
 
-    # Convert to DataFrame
-    df = pd.DataFrame(transactions)
-    df['date'] = pd.to_datetime(df['timestamp'], unit='s')
-    df['amount'] = df['amount_paisa'] / 100
-
-    # Filter for current month
-    current_month = datetime.now().month
-    current_year = datetime.now().year
-    df_current_month = df[(df['date'].dt.month == current_month) & (df['date'].dt.year == current_year)]
-
     # --- Balance Section ---
-    total_income = df_current_month[df_current_month['type'] == 'income']['amount'].sum()
-    total_expenses = df_current_month[df_current_month['type'] == 'expense']['amount'].sum()
+    total_income = state["totals"]["income"] / 100
+    total_expenses = state["totals"]["expense"] / 100
     balance = total_income - total_expenses
 
     st.markdown("### Current Month's Financial Overview")
@@ -48,58 +99,75 @@ def run():
     # --- Budget Status Section ---
     st.markdown("### Budget Status")
 
-    if not budgets:
+    if state["budget_df"] is None:
         st.info("No budgets set for the current month.")
     else:
-        # Calculate spent amount for each category
-        spent_by_category = df_current_month[df_current_month['type'] == 'expense'].groupby('category')['amount'].sum().to_dict()
-
-        budget_data = []
-        for category, budget_paisa in budgets.items():
-            budget_amount = budget_paisa / 100
-            spent_amount = spent_by_category.get(category, 0)
-            remaining = budget_amount - spent_amount
-            utilization = (spent_amount / budget_amount * 100) if budget_amount > 0 else 0
-            budget_data.append({
-                "Category": category,
-                "Budget": budget_amount,
-                "Spent": spent_amount,
-                "Remaining": remaining,
-                "Utilization": utilization
-            })
-        
-        if budget_data:
-            budget_df = pd.DataFrame(budget_data)
-            
-            for index, row in budget_df.iterrows():
-                st.markdown(f"**{row['Category']}**")
-                st.markdown(f"₹{row['Spent']:,.2f} / ₹{row['Budget']:,.2f}")
-                
-                progress_color = 'green'
-                if row['Utilization'] >= 100:
-                    progress_color = 'red'
-                elif row['Utilization'] >= 70:
-                    progress_color = 'orange'
-                
-                st.progress(int(row['Utilization']))
-        else:
-            st.info("No budget data to display.")
-
+        st.dataframe(
+            state["budget_df"],
+            column_config={
+                "Budget": st.column_config.NumberColumn(format="₹%.2f"),
+                "Spent": st.column_config.NumberColumn(format="₹%.2f"),
+                "Remaining": st.column_config.NumberColumn(format="₹%.2f"),
+                # Over-budget categories show a full bar with the real percentage.
+                "Utilization": st.column_config.ProgressColumn(format="%.1f%%", min_value=0, max_value=100)
+            },
+            hide_index=True,
+            use_container_width=True
+        )
 
     st.markdown("---")
 
     # --- Recent Transactions Table ---
     st.markdown("### Recent Transactions")
-    df_recent = df.sort_values(by='date', ascending=False).head(10)
-    
-    # Format for display
-    df_recent_display = df_recent[['date', 'type', 'category', 'description', 'amount']].copy()
-    df_recent_display['date'] = df_recent_display['date'].dt.strftime('%Y-%m-%d')
-    df_recent_display['amount'] = df_recent_display.apply(lambda row: f"₹{row['amount']:,.2f}", axis=1)
-    
-    st.dataframe(df_recent_display.style.apply(
-        lambda row: ['color: green' if row.type == 'income' else 'color: red' for v in row], axis=1
-    ), use_container_width=True)
+    st.dataframe(state["recent"], use_container_width=True, hide_index=True)
+
+def run():
+    st.set_page_config(layout="wide", page_title="Financial Dashboard")
+
+    st.title("Personal Finance Dashboard")
+
+    live_panels()
+
+    # Load data: the frame and its aggregates are shared by every rerun and session
+    # until the ledger changes.
+    data = load_dashboard_data()
+    if data.frame.empty:
+        return
+
+    st.markdown("---")
+
+    # --- Transaction Explorer ---
+    st.markdown("### Transaction Explorer")
+    filter_col1, filter_col2, filter_col3 = st.columns(3)
+    types = filter_col1.multiselect("Type", options=list(data.frame['type'].cat.categories))
+    categories = filter_col2.multiselect("Category", options=list(data.frame['category'].cat.categories))
+    search = filter_col3.text_input("Description contains")
+    matches = data.explore(types, categories, search)
+
+    page_col1, page_col2 = st.columns(2)
+    page_size = page_col1.selectbox("Rows per page", PAGE_SIZES, index=1)
+    page_count = max(1, -(-len(matches) // page_size))
+    page = page_col2.number_input(f"Page (of {page_count:,})", min_value=1, max_value=page_count, value=1, step=1)
+
+    st.caption(f"{len(matches):,} of {len(data.frame):,} transactions")
+    # Only the selected page is formatted and sent to the browser.
+    st.dataframe(_styled_transactions(page_of(matches, int(page), page_size)), use_container_width=True, hide_index=True)
+
+    st.markdown("---")
+
+    # --- Description Search ---
+    st.markdown("### Description Search")
+    search_col1, search_col2 = st.columns([3, 1])
+    words = search_col1.text_input("Search descriptions", help=SEARCH_HELP)
+    limit = search_col2.selectbox("Show newest", PAGE_SIZES, index=1)
+    if words.strip():
+        try:
+            count, found = search_frame(words, limit)
+        except SearchError as e:
+            st.warning(str(e))
+        else:
+            st.caption(f"{count:,} matching transactions, newest {min(count, limit):,} shown")
+            st.dataframe(_styled_transactions(found), use_container_width=True, hide_index=True)
 
 if __name__ == "__main__":
     run()
@@ -0,0 +1,395 @@
+import csv
+import io
+import threading
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from database import sqlite_store
+from database.binary_ledger import RECORD_DTYPE
+from database.cache import FINGERPRINT_SIZE
+from database.description_index import search_transactions
+from database.formats import get_ledger_format
+from database.ledger import ledger_version
+from database.mapped import map_file
+from database.utils import month_bounds, LEDGER_FIELDS, storage_format
+
+# Column types of the dashboard frame. type and category repeat a handful of names, so
+# they are categorical: one small integer code per row instead of one string object.
+LEDGER_DTYPES = {
+    "timestamp": "float64",
+    "type": "category",
+    "category": "category",
+    "description": str,
+    "amount_paisa": "int64"
+}
+CATEGORICAL_COLUMNS = ("type", "category")
+
+# Rows fetched from the SQLite store at a time.
+SQLITE_CHUNK_SIZE = 100000
+
+# Aggregates and filtered views remembered per snapshot; the oldest is dropped beyond this.
+SNAPSHOT_MEMO_SIZE = 64
+
+def _finish_frame(df):
+    """Adds the derived date (datetime64) and amount (rupees) columns to a typed ledger frame."""
+    df = df.reset_index(drop=True)
+    df['date'] = pd.to_datetime(df['timestamp'], unit='s')
+    df['amount'] = df['amount_paisa'] / 100
+    return df
+
+
+def empty_frame():
+    """Returns a dashboard frame with no rows and the usual column types."""
+    df = pd.DataFrame({field: pd.Series(dtype=dtype) for field, dtype in LEDGER_DTYPES.items()})
+    return _finish_frame(df)
+
+
+def _drop_malformed(df):
+    """
+    Keeps the rows of a frame read with timestamp and amount_paisa as text whose values
+    parse, and converts those columns. Values go through float() and int() exactly as in
+    parse_transaction_line, so "nan" or "1_000" are kept or dropped just as the CLI does.
+    """
+    valid = np.zeros(len(df), dtype=bool)
+    timestamps = np.zeros(len(df), dtype=np.float64)
+    amounts = np.zeros(len(df), dtype=np.int64)
+    for row, (timestamp, amount_paisa) in enumerate(zip(df['timestamp'].tolist(), df['amount_paisa'].tolist())):
+        try:
+            timestamps[row] = float(timestamp)
+            amounts[row] = int(amount_paisa)
+        except (ValueError, OverflowError):
+            # OverflowError: an amount int() reads but int64 cannot hold.
+            continue
+        valid[row] = True
+    df = df[valid].astype({"type": "category", "category": "category"})
+    for column in CATEGORICAL_COLUMNS:
+        df[column] = df[column].cat.remove_unused_categories()
+    df['timestamp'] = timestamps[valid]
+    df['amount_paisa'] = amounts[valid]
+    return df
+
+
+def _read_text_arrow(buffer):
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    names = pa.dictionary(pa.int32(), pa.string())
+    column_types = {
+        "timestamp": pa.float64(),
+        "type": names,
+        "category": names,
+        "description": pa.string(),
+        "amount_paisa": pa.int64()
+    }
+
+    def read(types):
+        return pa_csv.read_csv(
+            pa.BufferReader(buffer),
+            read_options=pa_csv.ReadOptions(column_names=list(LEDGER_FIELDS)),
+            # Fields are split on every comma, exactly like parse_transaction_line, and
+            # lines without five fields are skipped.
+            parse_options=pa_csv.ParseOptions(quote_char=False, invalid_row_handler=lambda row: "skip"),
+            # No value reads as null: an empty timestamp or amount fails to convert, and
+            # "nan" is a timestamp, as it is to float().
+            convert_options=pa_csv.ConvertOptions(column_types=types, null_values=[])
+        )
+
+    try:
+        table = read(column_types)
+    except pa.ArrowInvalid:
+        # Some line has a timestamp or amount that does not parse.
+        return _drop_malformed(read({**column_types, "timestamp": pa.string(), "amount_paisa": pa.string()}).to_pandas())
+    return table.to_pandas()
+
+
+def _read_text_c(buffer):
+    options = dict(
+        header=None, names=list(LEDGER_FIELDS), index_col=False, engine="c",
+        # Fields are split on every comma, exactly like parse_transaction_line, and
+        # lines without five fields are skipped.
+        quoting=csv.QUOTE_NONE, on_bad_lines="skip", na_filter=False,
+        # Timestamps must come out exactly as float() reads them.
+        float_precision="round_trip"
+    )
+    try:
+        return pd.read_csv(io.BytesIO(buffer), dtype=LEDGER_DTYPES, **options)
+    except (ValueError, OverflowError):
+        # Some line has a timestamp or amount that does not parse, or does not fit int64.
+        return _drop_malformed(pd.read_csv(
+            io.BytesIO(buffer), dtype={**LEDGER_DTYPES, "timestamp": str, "amount_paisa": str}, **options
+        ))
+
+
+def read_text_frame(data, start, end):
+    """
+    Reads the complete lines data[start:end] of the text ledger into a typed frame with
+    the pyarrow CSV reader, or the pandas C parser when pyarrow is not installed. Lines
+    the CLI would skip (not five fields, or a timestamp or amount that does not parse)
+    are left out here too.
+    """
+    if end <= start:
+        return empty_frame()
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return _finish_frame(_read_text_c(data[start:end]))
+    return _finish_frame(_read_text_arrow(data[start:end]))
+
+
+def read_binary_frame(fmt, data, strings, start, end):
+    """
+    Reads the complete records data[start:end] of the binary ledger into a typed frame.
+    The numeric columns are taken from the records as whole arrays; only descriptions are
+    decoded one at a time, from the strings heap.
+    """
+    count = max(0, end - start) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return empty_frame()
+    records = np.frombuffer(data[start:start + count * RECORD_DTYPE.itemsize], dtype=RECORD_DTYPE)
+    descriptions = [
+        bytes(strings[offset:offset + length]).decode("utf-8")
+        for offset, length in zip(records['description_offset'].tolist(), records['description_length'].tolist())
+    ]
+    df = pd.DataFrame({
+        "timestamp": records['timestamp'],
+        "type": pd.Categorical.from_codes(records['type'], categories=fmt.type_names),
+        "category": pd.Categorical.from_codes(records['category'], categories=fmt.category_names),
+        "description": pd.Series(descriptions, dtype=str),
+        "amount_paisa": records['amount_paisa']
+    })
+    return _finish_frame(df)
+
+
+def read_sqlite_frame(last_id=0):
+    """
+    Reads the transactions inserted after the one with id last_id from the SQLite store
+    into a typed frame. Returns (frame, id of the last transaction read).
+    """
+    # Fetched in chunks, so only one chunk of rows is ever held as Python tuples.
+    chunks = list(pd.read_sql_query(
+        f"SELECT id, {', '.join(LEDGER_FIELDS)} FROM transactions WHERE id > ? ORDER BY id",
+        sqlite_store.connect(), params=(last_id,), dtype={"id": "int64", **LEDGER_DTYPES},
+        chunksize=SQLITE_CHUNK_SIZE
+    ))
+    if chunks and len(chunks[-1]):
+        last_id = int(chunks[-1]['id'].iloc[-1])
+    return concat_frames([_finish_frame(chunk.drop(columns='id')) for chunk in chunks]), last_id
+
+
+def load_ledger_frame():
+    """
+    Reads the whole ledger straight into a typed DataFrame (type and category categorical,
+    amount_paisa int64, date datetime64), without building a dict per transaction.
+    """
+    if storage_format() == "sqlite":
+        return read_sqlite_frame()[0]
+    fmt = get_ledger_format()
+    try:
+        with map_file(fmt.path) as data:
+            fmt.begin(data)
+            end = fmt.complete_end(data, fmt.data_start, len(data))
+            if storage_format() == "binary":
+                with map_file(fmt.strings_path) as strings:
+                    return read_binary_frame(fmt, data, strings, fmt.data_start, end)
+            return read_text_frame(data, fmt.data_start, end)
+    except FileNotFoundError:
+        return empty_frame()
+
+
+def concat_frames(frames):
+    """Concatenates typed ledger frames, keeping the categorical columns categorical."""
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return empty_frame()
+    if len(frames) == 1:
+        return frames[0]
+    frames = [frame.copy(deep=False) for frame in frames]
+    for column in CATEGORICAL_COLUMNS:
+        # Categories only ever get added, so existing codes never need rewriting.
+        categories = frames[0][column].cat.categories
+        for frame in frames[1:]:
+            categories = categories.append(frame[column].cat.categories.difference(categories))
+        for frame in frames:
+            if len(frame[column].cat.categories) != len(categories):
+                frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+class DashboardSnapshot:
+    """
+    The ledger as a DataFrame at one ledger version, plus aggregates derived from it.
+    A snapshot never changes once built, so every session can share it, and each
+    aggregate is computed the first time it is asked for and reused afterwards.
+    """
+
+    def __init__(self, version, frame):
+        self.version = version
+        self.frame = frame
+        self._memo = {}
+
+    def _memoize(self, key, compute):
+        try:
+            return self._memo[key]
+        except KeyError:
+            value = self._memo[key] = compute()
+            if len(self._memo) > SNAPSHOT_MEMO_SIZE:
+                del self._memo[next(iter(self._memo))]
+            return value
+
+    def month_frame(self, month_year):
+        """Returns the transactions of a "YYYY-MM" month (local time)."""
+        def compute():
+            start, end = month_bounds(month_year)
+            timestamps = self.frame['timestamp']
+            return self.frame[(timestamps >= start) & (timestamps < end)]
+        return self._memoize(("month", month_year), compute)
+
+    def recent_transactions(self, count=10):
+        """Returns the count most recent transactions, newest first."""
+        def compute():
+            # A partial selection of the top rows, instead of sorting the whole frame.
+            return self.frame.nlargest(count, 'timestamp')
+        return self._memoize(("recent", count), compute)
+
+    def newest_first(self):
+        """Returns every transaction, newest first."""
+        def compute():
+            return self.frame.sort_values(by='timestamp', ascending=False, kind='stable')
+        return self._memoize(("newest_first",), compute)
+
+    def explore(self, types=(), categories=(), search=""):
+        """
+        Returns the transactions, newest first, with a type in types, a category in
+        categories and search in the description (case-insensitive). An empty filter
+        matches everything.
+        """
+        search = search.strip()
+        key = ("explore", tuple(sorted(types)), tuple(sorted(categories)), search.lower())
+
+        def compute():
+            df = self.newest_first()
+            mask = np.ones(len(df), dtype=bool)
+            if types:
+                mask &= df['type'].isin(types).to_numpy()
+            if categories:
+                mask &= df['category'].isin(categories).to_numpy()
+            if search:
+                mask &= df['description'].str.contains(search, case=False, regex=False).to_numpy(dtype=bool, na_value=False)
+            return df if mask.all() else df[mask]
+        return self._memoize(key, compute)
+
+
+def search_frame(text, limit):
+    """
+    Runs a description search (see database.description_index.SEARCH_HELP) through the
+    full-text index. Returns (count, frame): the number of matches and a dashboard frame of
+    the newest limit of them, newest first. Only those rows are decoded from the ledger.
+    """
+    count, transactions = search_transactions(text)
+    rows = [[t[field] for field in LEDGER_FIELDS] for t in islice(transactions, limit)]
+    if not rows:
+        return count, empty_frame()
+    df = pd.DataFrame(rows, columns=list(LEDGER_FIELDS)).astype(LEDGER_DTYPES)
+    return count, _finish_frame(df)
+
+
+def page_of(frame, page, page_size):
+    """Returns rows of the 1-based page of frame, so only one page ever leaves the server."""
+    start = (page - 1) * page_size
+    return frame.iloc[start:start + page_size]
+
+
+class DashboardCache:
+    """
+    Process-wide cache of the dashboard's DataFrame, keyed on the ledger version
+    (see database.ledger.ledger_version). While the version is unchanged every rerun and
+    every session gets the same snapshot. When the CLI appends, only the new records are
+    read and added; a truncated, rewritten or replaced ledger is read again in full.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.format_name = None
+        # Text and binary ledgers: bytes read so far and the bytes just before that offset.
+        # SQLite: the id of the last transaction read and the store generation it is from.
+        self.offset = 0
+        self.fingerprint = b""
+        self.last_id = 0
+        self.store_generation = None
+        self.snapshot = DashboardSnapshot(None, empty_frame())
+
+    def get(self):
+        """Returns the DashboardSnapshot of the current ledger, reading only what changed."""
+        with self._lock:
+            version = ledger_version()
+            if version != self.snapshot.version:
+                format_name = storage_format()
+                if self.format_name != format_name:
+                    self._reset()
+                    self.format_name = format_name
+                frame = self.snapshot.frame
+                if format_name == "sqlite":
+                    tail, rewritten = self._read_sqlite_tail(len(frame))
+                else:
+                    tail, rewritten = self._read_file_tail()
+                frame = tail if rewritten else concat_frames([frame, tail])
+                self.snapshot = DashboardSnapshot(version, frame)
+            return self.snapshot
+
+    def _read_file_tail(self):
+        """Returns (new_records_frame, rewritten) for the text or binary ledger."""
+        fmt = get_ledger_format()
+        try:
+            with map_file(fmt.path) as data:
+                fmt.begin(data)
+                is_append = (
+                    self.offset <= len(data)
+                    and data[self.offset - len(self.fingerprint):self.offset] == self.fingerprint
+                )
+                if not is_append:
+                    self.offset = 0
+                    self.fingerprint = b""
+                start = max(self.offset, fmt.data_start)
+                end = fmt.complete_end(data, start, len(data))
+                if storage_format() == "binary":
+                    with map_file(fmt.strings_path) as strings:
+                        tail = read_binary_frame(fmt, data, strings, start, end)
+                else:
+                    tail = read_text_frame(data, start, end)
+                recent = data[max(start, end - FINGERPRINT_SIZE):end]
+        except FileNotFoundError:
+            self.offset = 0
+            self.fingerprint = b""
+            return empty_frame(), True
+        if end > start:
+            self.offset = end
+            self.fingerprint = (self.fingerprint + recent)[-FINGERPRINT_SIZE:]
+        return tail, not is_append
+
+    def _read_sqlite_tail(self, row_count):
+        """Returns (new_records_frame, rewritten) for the SQLite store."""
+        # A restore or migration renumbers the rows from 1, possibly in a new file, so
+        # the row count alone can match a rewritten table; the store generation cannot.
+        generation = sqlite_store.store_generation()
+        is_append = (
+            generation == self.store_generation
+            and sqlite_store.count_rows_through(self.last_id) == row_count
+        )
+        self.store_generation = generation
+        if not is_append:
+            self.last_id = 0
+        tail, self.last_id = read_sqlite_frame(self.last_id)
+        return tail, not is_append
+
+
+_dashboard_cache = DashboardCache()
+
+
+def load_dashboard_data():
+    """Returns the shared DashboardSnapshot of the current ledger."""
+    return _dashboard_cache.get()
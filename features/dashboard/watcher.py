@@ -0,0 +1,88 @@
+import os
+import threading
+
+from database.ledger import ledger_version
+from database.utils import console, BUDGETS_FILE
+from features.dashboard.data import load_dashboard_data
+
+# Seconds between checks of the watched files. A check is a few os.stat calls, so an
+# idle ledger costs next to nothing.
+WATCH_INTERVAL = 0.2
+
+
+def _budgets_version():
+    try:
+        stat = os.stat(BUDGETS_FILE)
+        return stat.st_ino, stat.st_dev, stat.st_size, stat.st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+class LedgerWatcher:
+    """
+    Background thread watching the ledger files and budgets.txt.
+
+    When either changes, the watcher catches the shared dashboard cache up with the
+    ledger (so only the appended records are read, once, for every session) and bumps
+    generation. The dashboard compares generations to decide whether anything needs
+    recomputing; while nothing changes, no ledger data is read at all.
+    """
+
+    def __init__(self, interval=WATCH_INTERVAL):
+        self.interval = interval
+        self.generation = 0
+        self._versions = None
+        self._condition = threading.Condition()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ledger-watcher", daemon=True)
+        self._thread.start()
+
+    def _check(self):
+        versions = (ledger_version(), _budgets_version())
+        if versions == self._versions:
+            return
+        load_dashboard_data()
+        with self._condition:
+            self._versions = versions
+            self.generation += 1
+            self._condition.notify_all()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self._check()
+            except Exception as e:
+                # A half-replaced file (e.g. during a restore) is picked up on the next check.
+                console.print(f"[yellow]Ledger watcher: {e}[/yellow]")
+            self._stopped.wait(self.interval)
+
+    def stop(self):
+        """Stops the watching thread and waits for it to finish its current check."""
+        self._stopped.set()
+        self._thread.join()
+
+    def wait_for_change(self, generation, timeout=None):
+        """
+        Blocks until the generation moves past the given one, or timeout seconds pass.
+        Returns the current generation.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.generation != generation, timeout)
+            return self.generation
+
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def get_ledger_watcher():
+    """
+    Returns the process-wide LedgerWatcher, starting it on first use. It does not wait for
+    the first check: until that has run the generation is 0, and callers read the ledger
+    themselves as for any other new generation.
+    """
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = LedgerWatcher()
+        return _watcher
@@ -0,0 +1,224 @@
+import hashlib
+import json
+import os
+import time
+import zlib
+from datetime import datetime
+
+from rich.console import Console
+
+from database import sqlite_store
+from database.cache import invalidate_caches
+from database.ledger import rebuild_sidecars
+from database.writer import close_writer
+from database.utils import (
+    storage_format,
+    TRANSACTIONS_FILE,
+    BINARY_TRANSACTIONS_FILE,
+    BINARY_STRINGS_FILE,
+    BUDGETS_FILE,
+    SQLITE_FILE,
+    BACKUP_REPOSITORY
+)
+
+console = Console()
+
+# The ledger is append-only, so fixed-size chunks starting at offset 0 stay identical
+# from one backup to the next; only the last, growing chunk and new ones are stored again.
+CHUNK_SIZE = 1 << 20
+
+# The files holding the data of each storage format. Sidecars are derived from them and
+# are rebuilt after a restore instead of being backed up.
+BACKUP_FILES = {
+    "text": [TRANSACTIONS_FILE, BUDGETS_FILE],
+    "binary": [BINARY_TRANSACTIONS_FILE, BINARY_STRINGS_FILE, BUDGETS_FILE],
+    "sqlite": [SQLITE_FILE]
+}
+
+
+def _chunk_path(repository, digest):
+    return os.path.join(repository, "chunks", digest[:2], digest)
+
+
+def _manifest_path(repository, backup_id):
+    return os.path.join(repository, "manifests", f"{backup_id}.json")
+
+
+def _write_atomically(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def _store_file(repository, source_path, stats):
+    """
+    Splits a file into chunks, stores the chunks the repository does not hold yet
+    (zlib-compressed, named by the SHA-256 of their content) and returns the file's
+    manifest entry: {"size": bytes, "chunks": [digest, ...]}.
+    """
+    chunks = []
+    size = 0
+    try:
+        with open(source_path, "rb") as f:
+            while True:
+                data = f.read(CHUNK_SIZE)
+                if not data:
+                    break
+                digest = hashlib.sha256(data).hexdigest()
+                path = _chunk_path(repository, digest)
+                if not os.path.exists(path):
+                    compressed = zlib.compress(data, 6)
+                    _write_atomically(path, compressed)
+                    stats["new_chunks"] += 1
+                    stats["bytes_added"] += len(compressed)
+                chunks.append(digest)
+                size += len(data)
+    except FileNotFoundError:
+        pass
+    stats["chunks"] += len(chunks)
+    stats["bytes_scanned"] += size
+    return {"size": size, "chunks": chunks}
+
+
+def create_incremental_backup(repository=BACKUP_REPOSITORY):
+    """
+    Backs up the active storage format's files into a content-addressed repository:
+    only chunks not stored by an earlier backup are written, plus a small manifest.
+    Returns the manifest.
+    """
+    started = time.perf_counter()
+    # Anything the writer still holds in memory belongs in the backup.
+    close_writer()
+
+    created = datetime.now()
+    backup_id = created.strftime("%Y-%m-%dT%H-%M-%S")
+    suffix = 1
+    while os.path.exists(_manifest_path(repository, backup_id)):
+        suffix += 1
+        backup_id = f"{created.strftime('%Y-%m-%dT%H-%M-%S')}-{suffix}"
+
+    stats = {"chunks": 0, "new_chunks": 0, "bytes_scanned": 0, "bytes_added": 0}
+    files = {}
+    for path in BACKUP_FILES[storage_format()]:
+        if path == SQLITE_FILE:
+            # The database file changes in place and has a WAL beside it, so a consistent
+            # snapshot is chunked instead of the live file.
+            snapshot_path = os.path.join(repository, "sqlite_snapshot.tmp")
+            os.makedirs(repository, exist_ok=True)
+            sqlite_store.snapshot(snapshot_path)
+            try:
+                files[path] = _store_file(repository, snapshot_path, stats)
+            finally:
+                os.remove(snapshot_path)
+        else:
+            files[path] = _store_file(repository, path, stats)
+
+    manifest = {
+        "id": backup_id,
+        "created": created.timestamp(),
+        "storage_format": storage_format(),
+        "chunk_size": CHUNK_SIZE,
+        "files": files
+    }
+    _write_atomically(_manifest_path(repository, backup_id), json.dumps(manifest, indent=4).encode())
+
+    elapsed = time.perf_counter() - started
+    console.print(f"[green]Created incremental backup {backup_id} in {repository}[/green]")
+    console.print(
+        f"  • {stats['bytes_scanned'] / 1e6:,.1f} MB in {stats['chunks']} chunks scanned, "
+        f"{stats['new_chunks']} new chunks stored ({stats['bytes_added'] / 1e6:,.2f} MB added) "
+        f"in {elapsed:.2f}s"
+    )
+    return manifest
+
+
+def list_backups(repository=BACKUP_REPOSITORY):
+    """Returns the manifests of every incremental backup in the repository, oldest first."""
+    manifests = []
+    try:
+        names = sorted(os.listdir(os.path.join(repository, "manifests")))
+    except FileNotFoundError:
+        return manifests
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(repository, "manifests", name), "r") as f:
+                manifests.append(json.load(f))
+        except (OSError, json.JSONDecodeError) as e:
+            console.print(f"[yellow]Ignoring unreadable backup manifest {name}: {e}[/yellow]")
+    return sorted(manifests, key=lambda manifest: manifest["created"])
+
+
+def _read_chunk(repository, digest):
+    with open(_chunk_path(repository, digest), "rb") as f:
+        data = zlib.decompress(f.read())
+    if hashlib.sha256(data).hexdigest() != digest:
+        raise ValueError(f"Backup chunk {digest} is corrupted")
+    return data
+
+
+def restore_incremental_backup(backup_id, repository=BACKUP_REPOSITORY):
+    """
+    Restores the files of one incremental backup, overwriting the current data, and
+    rebuilds the sidecar files. Every chunk is checked before anything is replaced.
+    Returns True on success.
+    """
+    try:
+        with open(_manifest_path(repository, backup_id), "r") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        console.print(f"[red]Backup not found: {backup_id}[/red]")
+        return False
+
+    missing = [
+        digest
+        for entry in manifest["files"].values()
+        for digest in entry["chunks"]
+        if not os.path.exists(_chunk_path(repository, digest))
+    ]
+    if missing:
+        console.print(f"[red]Backup {backup_id} is incomplete: {len(missing)} chunks are missing.[/red]")
+        return False
+
+    try:
+        # Rebuild every file next to its target first, so a bad chunk leaves the data untouched.
+        restored = []
+        for path, entry in manifest["files"].items():
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            temp_path = path + ".restore"
+            with open(temp_path, "wb") as f:
+                for digest in entry["chunks"]:
+                    f.write(_read_chunk(repository, digest))
+            restored.append((temp_path, path))
+    except (OSError, ValueError, zlib.error) as e:
+        for path in manifest["files"]:
+            if os.path.exists(path + ".restore"):
+                os.remove(path + ".restore")
+        console.print(f"[red]Error restoring backup {backup_id}: {e}[/red]")
+        return False
+
+    # Nothing may keep writing to (or hold open) the files being replaced. Closed only
+    # now, since closing the SQLite connection checkpoints its WAL into the live file.
+    close_writer()
+    sqlite_store.close()
+    for temp_path, path in restored:
+        if path == SQLITE_FILE:
+            # A WAL left from the old database must not be replayed into the restored one.
+            for stale_path in (SQLITE_FILE + "-wal", SQLITE_FILE + "-shm"):
+                if os.path.exists(stale_path):
+                    os.remove(stale_path)
+        os.replace(temp_path, path)
+        invalidate_caches(path)
+
+    if manifest["storage_format"] == storage_format():
+        rebuild_sidecars()
+    else:
+        console.print(
+            f"[yellow]Backup {backup_id} was taken with the {manifest['storage_format']} storage format; "
+            f"set STORAGE_FORMAT in database/utils.py to use it.[/yellow]"
+        )
+    console.print(f"[green]Successfully restored backup {backup_id}[/green]")
+    return True
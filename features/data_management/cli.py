@@ -1,11 +1,27 @@
+import os
 import questionary
 from rich.console import Console
 from datetime import datetime
+from itertools import chain
 
-from database.utils import load_all_transactions
+from database.utils import iter_transactions, month_bounds, year_bounds, storage_format, SQLITE_FILE
+from database.formats import convert_text_to_binary, convert_binary_to_text, TextLedgerFormat
+from database.binary_ledger import BinaryLedgerFormat
+from database.sqlite_store import migrate_from_text
+from database.ledger import rebuild_sidecars
+from database.writer import get_writer
+from database.month_index import rebuild_month_index
+from database.signature_index import rebuild_signature_index
+from database.description_index import rebuild_description_index
+from database.rollups import verify_rollups
+from features.transactions.transactions import ask_query
+from .backup import create_incremental_backup, list_backups, restore_incremental_backup
 from .data_management import (
+    available_compressions,
     export_transactions_csv,
     export_transactions_json,
+    export_transactions_ndjson,
+    COMPRESSION_SUFFIXES,
     import_transactions_csv,
     import_transactions_json,
     create_backup,
@@ -24,6 +40,14 @@ def show_data_management_menu():
                 "Import Transactions",
                 "Create Full Backup",
                 "Restore from Backup",
+                "Create Incremental Backup",
+                "Restore Incremental Backup",
+                "Rebuild Ledger Index",
+                "Rebuild Duplicate Index",
+                "Rebuild Search Index",
+                "Verify Rollups",
+                "Convert Ledger Format",
+                "Migrate to SQLite",
                 "Back to Main Menu"
             ]
         ).ask()
@@ -36,6 +60,22 @@ def show_data_management_menu():
             create_backup()
         elif choice == "Restore from Backup":
             handle_restore()
+        elif choice == "Create Incremental Backup":
+            create_incremental_backup()
+        elif choice == "Restore Incremental Backup":
+            handle_restore_incremental()
+        elif choice == "Rebuild Ledger Index":
+            handle_rebuild_index()
+        elif choice == "Rebuild Duplicate Index":
+            handle_rebuild_signature_index()
+        elif choice == "Rebuild Search Index":
+            handle_rebuild_description_index()
+        elif choice == "Verify Rollups":
+            handle_verify_rollups()
+        elif choice == "Convert Ledger Format":
+            handle_convert_format()
+        elif choice == "Migrate to SQLite":
+            handle_migrate_sqlite()
         elif choice == "Back to Main Menu":
             break
         else:
@@ -47,56 +87,68 @@ def handle_export():
     """Handles the logic for exporting transactions."""
     export_format = questionary.select(
         "Select export format:",
-        choices=["CSV", "JSON"]
+        choices=["CSV", "JSON", "JSON (compact)", "NDJSON"]
     ).ask()
 
+    compression = questionary.select(
+        "Select compression:",
+        choices=["None"] + available_compressions()
+    ).ask()
+    compression = None if compression == "None" else compression
+
     export_range = questionary.select(
         "Select data range to export:",
-        choices=["All Time", "Current Month", "Specific Year"]
+        choices=["All Time", "Current Month", "Specific Year", "Query"]
     ).ask()
 
-    transactions = load_all_transactions()
-    transactions_to_export = []
-
+    # The date range (or the query's filters) is pushed down into the read, so records
+    # outside it are never decoded, and the export streams rows straight from the ledger
+    # to the file.
     if export_range == "All Time":
-        transactions_to_export = transactions
+        transactions_to_export = iter_transactions()
     elif export_range == "Current Month":
         current_month_year = datetime.now().strftime("%Y-%m")
-        transactions_to_export = [
-            t for t in transactions 
-            if datetime.fromtimestamp(t['timestamp']).strftime("%Y-%m") == current_month_year
-        ]
+        transactions_to_export = iter_transactions(*month_bounds(current_month_year))
     elif export_range == "Specific Year":
         year = questionary.text("Enter the year (YYYY):").ask()
         try:
             int(year) # Validate
-            transactions_to_export = [
-                t for t in transactions
-                if datetime.fromtimestamp(t['timestamp']).strftime("%Y") == year
-            ]
+            transactions_to_export = iter_transactions(*year_bounds(year))
         except (ValueError, TypeError):
             console.print("[red]Invalid year format.[/red]")
             return
+    elif export_range == "Query":
+        query = ask_query("Enter a query for the transactions to export:")
+        if query is None:
+            return
+        transactions_to_export = query.iter_transactions()
+    else:
+        return
 
-    if not transactions_to_export:
+    first = next(transactions_to_export, None)
+    if first is None:
         console.print("[yellow]No transactions found for the selected range.[/yellow]")
         return
-    
+    transactions_to_export = chain([first], transactions_to_export)
+
     timestamp = datetime.now().strftime("%Y-%m-%d")
     file_path = f"transactions_export_{timestamp}"
+    suffix = COMPRESSION_SUFFIXES.get(compression, "")
 
     if export_format == "CSV":
-        file_path += ".csv"
-        export_transactions_csv(file_path, transactions_to_export)
+        export_transactions_csv(file_path + ".csv" + suffix, transactions_to_export, compression)
     elif export_format == "JSON":
-        file_path += ".json"
-        export_transactions_json(file_path, transactions_to_export)
+        export_transactions_json(file_path + ".json" + suffix, transactions_to_export, compression=compression)
+    elif export_format == "JSON (compact)":
+        export_transactions_json(file_path + ".json" + suffix, transactions_to_export, compact=True, compression=compression)
+    elif export_format == "NDJSON":
+        export_transactions_ndjson(file_path + ".ndjson" + suffix, transactions_to_export, compression)
 
 def handle_import():
     """Handles the logic for importing transactions."""
     import_format = questionary.select(
         "Select import format:",
-        choices=["CSV", "JSON"]
+        choices=["CSV", "JSON", "NDJSON"]
     ).ask()
 
     file_path = questionary.text("Enter the full path to the import file:").ask()
@@ -107,14 +159,24 @@ def handle_import():
     imported_count = 0
     skipped_count = 0
 
+    writer = get_writer()
+    writer.reset_stats()
     if import_format == "CSV":
         imported_count, skipped_count = import_transactions_csv(file_path)
-    elif import_format == "JSON":
+    elif import_format in ("JSON", "NDJSON"):
+        # A JSON file that is not an array is read as NDJSON.
         imported_count, skipped_count = import_transactions_json(file_path)
         
     console.print(f"\nImport Summary:")
     console.print(f"  • [green]Successfully imported: {imported_count} transactions[/green]")
     console.print(f"  • [yellow]Skipped (duplicates or malformed): {skipped_count} transactions[/yellow]")
+    stats = writer.stats()
+    if stats["commits"]:
+        console.print(
+            f"  • Write throughput: {stats['records_per_second']:,.0f} transactions/s, "
+            f"commit latency {stats['average_commit_ms']:.2f} ms avg / {stats['max_commit_ms']:.2f} ms max "
+            f"({stats['commits']} commits, {stats['fsyncs']} fsyncs, durability: {writer.durability})"
+        )
 
 def handle_restore():
     """Handles the logic for restoring from a backup."""
@@ -130,3 +192,111 @@ def handle_restore():
         restore_from_backup(file_path)
     else:
         console.print("[yellow]Restore operation cancelled.[/yellow]")
+
+def handle_restore_incremental():
+    """Handles picking an incremental backup point and restoring it."""
+    backups = list_backups()
+    if not backups:
+        console.print("[yellow]No incremental backups found.[/yellow]")
+        return
+
+    choices = [
+        f"{manifest['id']} ({manifest['storage_format']}, "
+        f"{sum(entry['size'] for entry in manifest['files'].values()) / 1e6:,.1f} MB)"
+        for manifest in reversed(backups)
+    ]
+    choice = questionary.select("Select the backup point to restore:", choices=choices).ask()
+    if choice is None:
+        return
+    backup_id = choice.split(" ", 1)[0]
+
+    if questionary.confirm(
+        "WARNING: This will overwrite all existing data. Are you sure you want to continue?",
+        default=False
+    ).ask():
+        restore_incremental_backup(backup_id)
+    else:
+        console.print("[yellow]Restore operation cancelled.[/yellow]")
+
+def handle_rebuild_index():
+    """Rebuilds the month index of the transactions file from scratch."""
+    if storage_format() == "sqlite":
+        console.print("[yellow]The SQLite store keeps its own indexes; there is no ledger index to rebuild.[/yellow]")
+        return
+    index = rebuild_month_index()
+    console.print(f"[green]Ledger index rebuilt: {len(index.months)} months indexed.[/green]")
+
+def handle_rebuild_signature_index():
+    """Rebuilds the duplicate-check signature index used by imports from scratch."""
+    if storage_format() == "sqlite":
+        console.print("[yellow]The SQLite store checks duplicates on its own indexes; there is no signature index to rebuild.[/yellow]")
+        return
+    index = rebuild_signature_index()
+    console.print(
+        f"[green]Duplicate index rebuilt: {len(index):,} signatures, "
+        f"{index.bloom_bits // 8 / 1024:,.0f} KiB Bloom filter.[/green]"
+    )
+
+def handle_rebuild_description_index():
+    """Rebuilds the full-text index of transaction descriptions from scratch."""
+    if storage_format() == "sqlite":
+        console.print("[yellow]The SQLite store keeps its own full-text index; there is no search index to rebuild.[/yellow]")
+        return
+    index = rebuild_description_index()
+    console.print(
+        f"[green]Search index rebuilt: {len(index):,} transactions, {len(index.vocabulary):,} distinct words.[/green]"
+    )
+
+def handle_verify_rollups():
+    """Recomputes the monthly rollups from the ledger and reports any drift."""
+    drift = verify_rollups()
+    if not drift:
+        console.print("[green]Monthly rollups match the ledger.[/green]")
+        return
+
+    console.print(f"[yellow]Found {len(drift)} drifted rollup values (now rebuilt):[/yellow]")
+    for month, trans_type, field, stored, actual in drift:
+        console.print(f"  • {month} {trans_type} {field}: stored {stored}, actual {actual}")
+
+
+def _file_size(*paths):
+    return sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+
+def handle_convert_format():
+    """Converts the ledger between the text and binary storage formats."""
+    direction = questionary.select(
+        "Convert ledger:",
+        choices=["Text -> Binary", "Binary -> Text"]
+    ).ask()
+
+    text_paths = [TextLedgerFormat.path]
+    binary_paths = [BinaryLedgerFormat.path, BinaryLedgerFormat.strings_path]
+    if direction == "Text -> Binary":
+        count = convert_text_to_binary()
+        source_size, target_size, target = _file_size(*text_paths), _file_size(*binary_paths), "binary"
+    elif direction == "Binary -> Text":
+        count = convert_binary_to_text()
+        source_size, target_size, target = _file_size(*binary_paths), _file_size(*text_paths), "text"
+    else:
+        return
+
+    if target == storage_format():
+        # The active ledger was replaced, so the index and rollups are rebuilt from it.
+        rebuild_sidecars()
+    console.print(f"[green]Converted {count} transactions ({source_size:,} bytes -> {target_size:,} bytes).[/green]")
+    if target != storage_format():
+        console.print(f"[yellow]Set STORAGE_FORMAT = \"{target}\" in database/utils.py to use the {target} ledger.[/yellow]")
+
+def handle_migrate_sqlite():
+    """Copies transactions.txt and budgets.txt into the SQLite store."""
+    if not questionary.confirm(
+        "This replaces everything in the SQLite store with the text files. Continue?",
+        default=False
+    ).ask():
+        console.print("[yellow]Migration cancelled.[/yellow]")
+        return
+
+    transaction_count, budget_count = migrate_from_text()
+    console.print(f"[green]Migrated {transaction_count} transactions and {budget_count} budgets to {SQLITE_FILE}.[/green]")
+    if storage_format() != "sqlite":
+        console.print("[yellow]Set STORAGE_FORMAT = \"sqlite\" in database/utils.py to use the SQLite store.[/yellow]")
@@ -1,16 +1,65 @@
 import csv
+import gzip
 import json
+import os
+import sys
+import time
 from datetime import datetime
 from rich.console import Console
 
-from database.utils import load_all_transactions, load_budgets, TRANSACTIONS_FILE, BUDGETS_FILE
+from database import sqlite_store
+from database.cache import invalidate_caches
+from database.formats import get_ledger_format
+from database.utils import load_all_transactions, load_all_budgets, load_budgets, storage_format, BUDGETS_FILE
+from database.ledger import rebuild_sidecars
+from database.writer import close_writer
+from .importer import import_file, iter_csv_records, iter_json_records, JsonStream
 
 console = Console()
 
-def export_transactions_csv(file_path, transactions):
-    """Exports a list of transactions to a CSV file."""
+# Shared encoders: json.dumps with non-default options builds a new encoder per call.
+_COMPACT_JSON = json.JSONEncoder(separators=(',', ':'))
+_INDENTED_JSON = json.JSONEncoder(indent=4)
+
+# Streaming compressions offered for exports, with the file suffix each adds.
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+def available_compressions():
+    """Returns the export compressions usable here; zstd needs Python 3.14+ or the zstandard package."""
+    compressions = ["gzip"]
     try:
-        with open(file_path, 'w', newline='') as f:
+        from compression import zstd  # noqa: F401
+        compressions.append("zstd")
+    except ImportError:
+        try:
+            import zstandard  # noqa: F401
+            compressions.append("zstd")
+        except ImportError:
+            pass
+    return compressions
+
+def _open_export(file_path, compression=None):
+    """Opens an export file for writing text, compressing the stream as it is written."""
+    if compression is None:
+        return open(file_path, 'w', newline='')
+    if compression == "gzip":
+        return gzip.open(file_path, 'wt', compresslevel=6, encoding='utf-8', newline='')
+    if compression == "zstd":
+        try:
+            from compression import zstd
+        except ImportError:
+            import zstandard as zstd
+        return zstd.open(file_path, 'wt', encoding='utf-8', newline='')
+    raise ValueError(f"Unknown compression: {compression}")
+
+def export_transactions_csv(file_path, transactions, compression=None):
+    """
+    Exports transactions to a CSV file, writing one row at a time, so any iterable
+    (e.g. iter_transactions()) is streamed. Returns the number of rows written.
+    """
+    count = 0
+    try:
+        with _open_export(file_path, compression) as f:
             writer = csv.writer(f)
             # Write header
             writer.writerow(['timestamp', 'type', 'category', 'description', 'amount_paisa'])
@@ -23,27 +72,60 @@ def export_transactions_csv(file_path, transactions):
                     t['description'],
                     t['amount_paisa']
                 ])
-        console.print(f"[green]Successfully exported transactions to {file_path}[/green]")
-    except IOError as e:
+                count += 1
+        console.print(f"[green]Successfully exported {count} transactions to {file_path}[/green]")
+    except (IOError, ImportError) as e:
         console.print(f"[red]Error exporting to CSV: {e}[/red]")
+    return count
 
-def export_transactions_json(file_path, transactions):
-    """Exports a list of transactions to a JSON file."""
+def export_transactions_json(file_path, transactions, compact=False, compression=None):
+    """
+    Exports transactions to a JSON array, writing one element at a time, so any iterable
+    is streamed. The default layout matches json.dump(..., indent=4); compact=True writes
+    the array without whitespace. Returns the number of transactions written.
+    """
+    count = 0
     try:
-        with open(file_path, 'w') as f:
-            json.dump(transactions, f, indent=4)
-        console.print(f"[green]Successfully exported transactions to {file_path}[/green]")
-    except IOError as e:
+        with _open_export(file_path, compression) as f:
+            separator = "[" if compact else "[\n    "
+            for t in transactions:
+                if compact:
+                    f.write(separator + _COMPACT_JSON.encode(t))
+                    separator = ","
+                else:
+                    # Element lines are indented one level, as json.dump(..., indent=4) would.
+                    f.write(separator + _INDENTED_JSON.encode(t).replace("\n", "\n    "))
+                    separator = ",\n    "
+                count += 1
+            if count == 0:
+                f.write("[]")
+            else:
+                f.write("]" if compact else "\n]")
+        console.print(f"[green]Successfully exported {count} transactions to {file_path}[/green]")
+    except (IOError, ImportError) as e:
         console.print(f"[red]Error exporting to JSON: {e}[/red]")
+    return count
+
+def export_transactions_ndjson(file_path, transactions, compression=None):
+    """
+    Exports transactions as NDJSON, one compact JSON object per line, streaming any
+    iterable. Returns the number of transactions written.
+    """
+    count = 0
+    try:
+        with _open_export(file_path, compression) as f:
+            for t in transactions:
+                f.write(_COMPACT_JSON.encode(t) + "\n")
+                count += 1
+        console.print(f"[green]Successfully exported {count} transactions to {file_path}[/green]")
+    except (IOError, ImportError) as e:
+        console.print(f"[red]Error exporting to NDJSON: {e}[/red]")
+    return count
 
 def import_transactions_csv(file_path):
-    """Imports transactions from a CSV file, skipping duplicates."""
+    """Imports transactions from a CSV file in streamed chunks, skipping duplicates."""
     try:
-        with open(file_path, 'r') as f:
-            reader = csv.DictReader(f)
-            transactions_to_add = list(reader)
-        
-        return _add_imported_transactions(transactions_to_add)
+        return import_file(file_path, iter_csv_records)
     except FileNotFoundError:
         console.print(f"[red]File not found: {file_path}[/red]")
         return 0, 0
@@ -52,12 +134,12 @@ def import_transactions_csv(file_path):
         return 0, 0
 
 def import_transactions_json(file_path):
-    """Imports transactions from a JSON file, skipping duplicates."""
+    """
+    Imports transactions from a JSON array or NDJSON (one object per line) file in
+    streamed chunks, skipping duplicates.
+    """
     try:
-        with open(file_path, 'r') as f:
-            transactions_to_add = json.load(f)
-
-        return _add_imported_transactions(transactions_to_add)
+        return import_file(file_path, iter_json_records)
     except FileNotFoundError:
         console.print(f"[red]File not found: {file_path}[/red]")
         return 0, 0
@@ -68,43 +150,6 @@ def import_transactions_json(file_path):
         console.print(f"[red]Error importing from JSON: {e}[/red]")
         return 0, 0
 
-def _add_imported_transactions(new_transactions):
-    """
-    Adds new transactions to the database, checking for duplicates.
-    A duplicate is defined as a transaction with the same timestamp and amount.
-    """
-    existing_transactions = load_all_transactions()
-    existing_signatures = {
-        (str(t['timestamp']), str(t['amount_paisa'])) for t in existing_transactions
-    }
-
-    imported_count = 0
-    skipped_count = 0
-
-    with open(TRANSACTIONS_FILE, "a") as f:
-        for t in new_transactions:
-            try:
-                # Ensure values are in the correct format
-                timestamp = float(t['timestamp'])
-                amount_paisa = int(t['amount_paisa'])
-                
-                # Create a signature to check for duplicates
-                signature = (str(timestamp), str(amount_paisa))
-                
-                if signature not in existing_signatures:
-                    f.write(
-                        f"{timestamp},{t['type']},{t['category']},{t['description']},{amount_paisa}\n"
-                    )
-                    existing_signatures.add(signature)
-                    imported_count += 1
-                else:
-                    skipped_count += 1
-            except (KeyError, ValueError) as e:
-                console.print(f"[yellow]Skipping malformed record: {t} - {e}[/yellow]")
-                skipped_count += 1
-
-    return imported_count, skipped_count
-
 def create_backup():
     """Creates a full backup of transactions and budgets."""
     transactions = load_all_transactions()
@@ -112,7 +157,9 @@ def create_backup():
 
     backup_data = {
         "transactions": transactions,
-        "budgets": budgets
+        "budgets": budgets,
+        # Every month's budgets; "budgets" (the current month) stays for older versions.
+        "monthly_budgets": load_all_budgets()
     }
 
     timestamp = datetime.now().strftime("%Y-%m-%d")
@@ -125,30 +172,125 @@ def create_backup():
     except IOError as e:
         console.print(f"[red]Error creating backup: {e}[/red]")
 
-def restore_from_backup(file_path):
-    """Restores transactions and budgets from a backup file, overwriting existing data."""
-    try:
-        with open(file_path, 'r') as f:
-            backup_data = json.load(f)
+def _validated_transactions(records):
+    """Normalizes backup records into transaction dicts; a malformed one aborts the restore."""
+    for number, t in enumerate(records, start=1):
+        try:
+            yield {
+                "timestamp": float(t['timestamp']),
+                "type": str(t['type']),
+                "category": str(t['category']),
+                "description": str(t['description']),
+                "amount_paisa": int(t['amount_paisa'])
+            }
+        except (KeyError, ValueError, TypeError) as e:
+            raise ValueError(f"transaction {number} is malformed: {e!r}") from e
 
-        # Restore transactions
-        with open(TRANSACTIONS_FILE, 'w') as f:
-            for t in backup_data.get("transactions", []):
-                 f.write(
-                    f"{t['timestamp']},{t['type']},{t['category']},{t['description']},{t['amount_paisa']}\n"
-                )
+def _budget_rows(monthly_budgets, budgets):
+    """
+    (month, category, amount_paisa) rows to restore. Backups without monthly_budgets
+    only know the current month's budgets, which are restored into the current month.
+    """
+    if monthly_budgets is None:
+        current_month_year = datetime.now().strftime("%Y-%m")
+        monthly_budgets = {current_month_year: budgets or {}}
+    return [
+        (month_year, category, int(amount))
+        for month_year, month_budgets in monthly_budgets.items()
+        for category, amount in month_budgets.items()
+    ]
 
-        # Restore budgets
-        with open(BUDGETS_FILE, 'w') as f:
-            current_month_year = datetime.now().strftime("%Y-%m")
-            for category, amount in backup_data.get("budgets", {}).items():
-                f.write(f"{current_month_year},{category},{amount}\n")
+def _write_budgets_replacement(rows):
+    with open(BUDGETS_FILE + ".tmp", 'w') as f:
+        for month_year, category, amount in rows:
+            f.write(f"{month_year},{category},{amount}\n")
+        f.flush()
+        os.fsync(f.fileno())
 
-        console.print(f"[green]Successfully restored data from {file_path}[/green]")
+def _peak_memory_mb():
+    """Peak resident memory of this process in MB, where the platform reports it."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
 
+def restore_from_backup(file_path):
+    """
+    Restores transactions and budgets from a backup file, overwriting existing data.
+
+    The backup is streamed: each transaction is validated and written to a replacement
+    ledger next to the live one, so memory stays flat however large the backup is.
+    Only once the whole file has been read are the replacements renamed over the live
+    files, so a crash or a bad record leaves the existing data untouched. Budgets keep
+    their months, and the sidecar files are rebuilt.
+    """
+    started = time.perf_counter()
+    fmt = None if storage_format() == "sqlite" else get_ledger_format()
+    transaction_count = None
+    monthly_budgets = None
+    budgets = {}
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            stream = JsonStream(f)
+            for key in stream.iter_object():
+                if key == "transactions":
+                    records = _validated_transactions(stream.iter_array())
+                    if fmt is None:
+                        transaction_count = sqlite_store.write_replacement(records)
+                    else:
+                        transaction_count = fmt.write_replacement(records)
+                elif key == "monthly_budgets":
+                    monthly_budgets = stream.value()
+                elif key == "budgets":
+                    budgets = stream.value()
+                else:
+                    stream.value()
+        if transaction_count is None:
+            # A backup without transactions restores an empty ledger.
+            transaction_count = sqlite_store.write_replacement([]) if fmt is None else fmt.write_replacement([])
+        budget_rows = _budget_rows(monthly_budgets, budgets)
+        if fmt is None:
+            sqlite_store.add_replacement_budgets(budget_rows)
+        else:
+            _write_budgets_replacement(budget_rows)
     except FileNotFoundError:
         console.print(f"[red]Backup file not found: {file_path}[/red]")
-    except (json.JSONDecodeError, KeyError) as e:
+        return
+    except (json.JSONDecodeError, KeyError, ValueError, TypeError, AttributeError) as e:
+        _discard_replacements(fmt)
         console.print(f"[red]Invalid backup file format: {e}[/red]")
+        return
     except Exception as e:
+        _discard_replacements(fmt)
         console.print(f"[red]An unexpected error occurred during restore: {e}[/red]")
+        return
+
+    # The whole backup is on disk and valid: swap it in.
+    if fmt is None:
+        sqlite_store.install_replacement()
+    else:
+        # The writer's in-memory sidecars describe the old ledger.
+        close_writer()
+        fmt.install_replacement()
+        os.replace(BUDGETS_FILE + ".tmp", BUDGETS_FILE)
+        invalidate_caches(fmt.path)
+        rebuild_sidecars()
+
+    elapsed = time.perf_counter() - started
+    peak = _peak_memory_mb()
+    console.print(f"[green]Successfully restored data from {file_path}[/green]")
+    console.print(
+        f"  • {transaction_count} transactions and {len(budget_rows)} budgets restored in {elapsed:.2f}s"
+        + (f" (peak memory {peak:,.0f} MB)" if peak is not None else "")
+    )
+
+def _discard_replacements(fmt):
+    if fmt is None:
+        sqlite_store.discard_replacement()
+    else:
+        fmt.discard_replacement()
+        if os.path.exists(BUDGETS_FILE + ".tmp"):
+            os.remove(BUDGETS_FILE + ".tmp")
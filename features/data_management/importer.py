@@ -0,0 +1,291 @@
+import csv
+import io
+import json
+import os
+import re
+import time
+from itertools import islice
+
+from rich.console import Console
+from rich.progress import (
+    BarColumn,
+    DownloadColumn,
+    Progress,
+    TextColumn,
+    TimeRemainingColumn,
+    TransferSpeedColumn
+)
+
+from database.ledger import append_transactions
+from database.signature_index import load_signature_index
+
+console = Console()
+
+# Records validated, deduplicated and appended together. Together with READ_SIZE this
+# bounds the memory an import needs, however large the input file is.
+IMPORT_CHUNK_SIZE = 10000
+READ_SIZE = 1 << 20
+
+# Matches when everything left in the buffer could still continue a JSON number.
+_NUMBER_TAIL = re.compile(r"[0-9.eE+\- \t\r\n]*\Z")
+
+
+class _CountingReader(io.RawIOBase):
+    """Wraps a binary file and counts the bytes read through it, for progress reporting."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self.raw.readinto(buffer)
+        self.bytes_read += count or 0
+        return count
+
+    def seekable(self):
+        return self.raw.seekable()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        # Progress is the position in the file, so a rewind is not counted twice.
+        self.bytes_read = self.raw.seek(offset, whence)
+        return self.bytes_read
+
+    def tell(self):
+        return self.raw.tell()
+
+
+def iter_csv_records(text_file):
+    """Yields each row of a CSV file with a header line as a dict, one row at a time."""
+    yield from csv.DictReader(text_file)
+
+
+class JsonStream:
+    """
+    Pull parser over one large JSON document in a text file. Containers are walked with
+    iter_array() and iter_object(), and any value inside them is decoded whole with
+    value(), so only the value being decoded (plus one read) is ever held in memory.
+    """
+
+    def __init__(self, text_file, read_size=READ_SIZE):
+        self.text_file = text_file
+        self.read_size = read_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def _fill(self):
+        chunk = self.text_file.read(self.read_size)
+        if not chunk:
+            self.eof = True
+        # Drop what has been decoded already, so the buffer never grows with the file.
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+
+    def _peek(self):
+        """Skips whitespace and returns the next character ("" at the end of the file)."""
+        while True:
+            buffer = self.buffer
+            position = self.position
+            while position < len(buffer) and buffer[position] in " \t\r\n":
+                position += 1
+            self.position = position
+            if position < len(buffer):
+                return buffer[position]
+            if self.eof:
+                return ""
+            self._fill()
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buffer, self.position)
+        self.position += 1
+
+    def value(self):
+        """Decodes the next complete value."""
+        while True:
+            self._peek()
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self._fill()
+                continue
+            if not self.eof and _NUMBER_TAIL.match(self.buffer, end):
+                # A number cut off by the end of the buffer ("12" of "12.5e3") decodes as a
+                # shorter one; only trust a value once a character that cannot continue it is read.
+                self._fill()
+                continue
+            self.position = end
+            return value
+
+    def iter_array(self):
+        """Yields the elements of the array that comes next, one at a time."""
+        self._expect("[")
+        if self._peek() == "]":
+            self.position += 1
+            return
+        while True:
+            yield self.value()
+            if self._peek() == "]":
+                self.position += 1
+                return
+            self._expect(",")
+
+    def iter_object(self):
+        """
+        Yields the keys of the object that comes next. The caller must consume each
+        key's value (with value() or iter_array()) before asking for the next key.
+        """
+        self._expect("{")
+        if self._peek() == "}":
+            self.position += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise json.JSONDecodeError("Expecting property name", self.buffer, self.position)
+            self._expect(":")
+            yield key
+            if self._peek() == "}":
+                self.position += 1
+                return
+            self._expect(",")
+
+
+def iter_json_array(text_file, read_size=READ_SIZE):
+    """
+    Yields the elements of a top-level JSON array one at a time.
+    Only the text of the element being decoded (plus one read) is held in memory.
+    """
+    return JsonStream(text_file, read_size).iter_array()
+
+
+def iter_ndjson_records(text_file):
+    """Yields one value per non-empty line of a newline-delimited JSON (NDJSON) file."""
+    for number, line in enumerate(text_file, start=1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                console.print(f"[yellow]Skipping malformed line {number}: {e}[/yellow]")
+
+
+def iter_json_records(text_file):
+    """Yields the records of a JSON array file, or of an NDJSON file if it is not an array."""
+    start = text_file.read(1)
+    while start and start.isspace():
+        start = text_file.read(1)
+    text_file.seek(0)
+    if start == "[":
+        return iter_json_array(text_file)
+    return iter_ndjson_records(text_file)
+
+
+def _validate_chunk(records, index):
+    """
+    Validates and deduplicates one chunk of imported records.
+    A duplicate is a transaction with the same timestamp and amount as one already in the
+    ledger or earlier in the import; index (see database.signature_index) answers both,
+    as the chunk's new signatures are added to it. Returns (transactions_to_add, skipped_count).
+    """
+    candidates = []
+    skipped_count = 0
+    for t in records:
+        try:
+            # Ensure values are in the correct format
+            candidates.append({
+                "timestamp": float(t['timestamp']),
+                "type": t['type'],
+                "category": t['category'],
+                "description": t['description'],
+                "amount_paisa": int(t['amount_paisa'])
+            })
+        except (KeyError, ValueError, TypeError) as e:
+            console.print(f"[yellow]Skipping malformed record: {t} - {e}[/yellow]")
+            skipped_count += 1
+
+    signatures = [(t['timestamp'], t['amount_paisa']) for t in candidates]
+    present = index.contains_many(signatures)
+    transactions = []
+    new_signatures = set()
+    for t, signature, is_present in zip(candidates, signatures, present):
+        if is_present or signature in new_signatures:
+            skipped_count += 1
+            continue
+        transactions.append(t)
+        new_signatures.add(signature)
+    index.add_signatures(new_signatures)
+    return transactions, skipped_count
+
+
+def import_records(records, on_chunk=None, chunk_size=IMPORT_CHUNK_SIZE, index=None):
+    """
+    Streams records (dicts with timestamp, type, category, description, amount_paisa)
+    into the ledger in chunks of chunk_size: each chunk is validated, checked against the
+    duplicate index and written with one batched append. on_chunk(imported_count,
+    skipped_count) is called after every chunk. Returns (imported_count, skipped_count).
+    """
+    if index is None:
+        index = load_signature_index()
+    imported_count = 0
+    skipped_count = 0
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+        transactions, skipped = _validate_chunk(chunk, index)
+        append_transactions(transactions)
+        imported_count += len(transactions)
+        skipped_count += skipped
+        if on_chunk is not None:
+            on_chunk(imported_count, skipped_count)
+    return imported_count, skipped_count
+
+
+def import_file(file_path, parse):
+    """
+    Imports the records that parse(text_file) yields from file_path, showing live progress
+    (bytes read, rows imported, throughput). Returns (imported_count, skipped_count).
+    """
+    total_size = os.path.getsize(file_path)
+    with open(file_path, "rb", buffering=0) as raw:
+        counter = _CountingReader(raw)
+        text_file = io.TextIOWrapper(io.BufferedReader(counter, READ_SIZE), encoding="utf-8", newline="")
+        started = time.perf_counter()
+        with Progress(
+            TextColumn("[bold blue]Importing"),
+            BarColumn(),
+            DownloadColumn(),
+            TransferSpeedColumn(),
+            TextColumn("{task.fields[rows]:,} rows"),
+            TimeRemainingColumn(),
+            console=console
+        ) as progress:
+            task = progress.add_task("import", total=total_size, rows=0)
+
+            def on_chunk(imported_count, skipped_count):
+                progress.update(task, completed=counter.bytes_read, rows=imported_count + skipped_count)
+
+            index = load_signature_index()
+            imported_count, skipped_count = import_records(parse(text_file), on_chunk, index=index)
+            progress.update(task, completed=total_size, rows=imported_count + skipped_count)
+        elapsed = time.perf_counter() - started
+
+    rows = imported_count + skipped_count
+    if elapsed > 0 and rows:
+        console.print(
+            f"[cyan]Read {rows:,} rows ({total_size / 1e6:,.1f} MB) in {elapsed:.1f}s: "
+            f"{rows / elapsed:,.0f} rows/s, {total_size / 1e6 / elapsed:,.1f} MB/s[/cyan]"
+        )
+        stats = index.stats()
+        console.print(
+            f"[cyan]Duplicate checks: {stats['lookups']:,} lookups, {stats['hits']:,} duplicates, "
+            f"{stats['bloom_rejections']:,} ruled out by the Bloom filter[/cyan]"
+        )
+    return imported_count, skipped_count
@@ -1,8 +1,8 @@
 from rich.console import Console
 from rich.panel import Panel
 from rich.text import Text
-from datetime import datetime, date
-from database.utils import load_all_transactions, load_budgets
+from datetime import date
+from features.analytics.report import build_report_context
 
 console = Console()
 
@@ -18,21 +18,19 @@ def daily_financial_check():
         )
     )
 
+    # Every figure below comes from one shared report context instead of rescanning the ledger.
+    context = build_report_context()
+
     # --- 1. Today's Spending ---
-    transactions = load_all_transactions()
     today = date.today()
     
-    todays_expenses_paisa = sum(
-        t['amount_paisa']
-        for t in transactions
-        if t['type'] == 'expense' and datetime.fromtimestamp(t['timestamp']).date() == today
-    )
+    todays_expenses_paisa = context.today_expense
 
     console.print(f"Today's Spending: [bold red]Rs {todays_expenses_paisa / 100:.2f}[/bold red]")
 
     # --- 2. Remaining Daily Budget ---
-    budgets = load_budgets()
-    total_monthly_budget_paisa = sum(budgets.values())
+    budgets = context.budgets
+    total_monthly_budget_paisa = context.total_budget
     
     if total_monthly_budget_paisa > 0:
         days_in_month = (date(today.year, today.month + 1, 1) - date(today.year, today.month, 1)).days if today.month < 12 else 31
@@ -50,13 +48,7 @@ def daily_financial_check():
     
     # Budget Alerts
     if budgets:
-        current_month_expenses = {cat: 0 for cat in budgets.keys()}
-        current_month_str = today.strftime("%Y-%m")
-
-        for t in transactions:
-            if t['type'] == 'expense' and t['category'] in current_month_expenses:
-                if datetime.fromtimestamp(t['timestamp']).strftime("%Y-%m") == current_month_str:
-                    current_month_expenses[t['category']] += t['amount_paisa']
+        current_month_expenses = context.budget_spent
 
         alert_found = False
         for category, spent in current_month_expenses.items():
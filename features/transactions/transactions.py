@@ -1,13 +1,45 @@
+import csv
+import json
+import sys
 import questionary
+from itertools import islice
 from rich.console import Console
 from rich.table import Table
 from rich.text import Text
-from datetime import datetime, timedelta
-from database.utils import load_all_transactions, EXPENSE_CATEGORIES, INCOME_CATEGORIES, TRANSACTIONS_FILE
+from datetime import datetime
+from prompt_toolkit import prompt
+from prompt_toolkit.key_binding import KeyBindings
+from database.utils import EXPENSE_CATEGORIES, INCOME_CATEGORIES, LEDGER_FIELDS
+from database.ledger import append_transactions, has_transactions
+from database.query import parse_query, QueryError, QUERY_HELP
+from database.description_index import search_transactions, SearchError, SEARCH_HELP
+from database.timebuckets import DAYS
+from database.rollups import load_rollups
 
 # Initialize Rich Console
 console = Console()
 
+# Terminal lines taken by everything on a page but the rows: table title, borders,
+# header, caption and the key prompt.
+PAGE_CHROME_LINES = 8
+MIN_PAGE_ROWS = 5
+
+# The fixed filters of list_transactions, as queries.
+FILTER_QUERIES = {
+    "All": "",
+    "Last 7 Days": "date:7d",
+    "Only Expenses": "type:expense",
+    "Only Income": "type:income"
+}
+
+# Keys of the transaction browser (prompt_toolkit key names).
+PAGE_KEYS = {
+    "next": ["n", " ", "j", "right", "down", "pagedown", "enter"],
+    "previous": ["p", "b", "k", "left", "up", "pageup"],
+    "first": ["g", "home"],
+    "quit": ["q", "c-c", "c-d"]
+}
+
 def add_expense():
     """Adds a new expense transaction."""
     amount_str = questionary.text("Enter the expense amount:").ask()
@@ -45,8 +77,13 @@ def add_expense():
             return
 
     # Save the transaction
-    with open(TRANSACTIONS_FILE, "a") as f:
-        f.write(f"{timestamp},expense,{category},{description},{amount}\n")
+    append_transactions([{
+        "timestamp": timestamp,
+        "type": "expense",
+        "category": category,
+        "description": description,
+        "amount_paisa": amount
+    }])
 
     console.print("[green]Expense added successfully![/green]")
 
@@ -84,80 +121,209 @@ def add_income():
             console.print("[red]Invalid date format. Please use YYYY-MM-DD.[/red]")
             return
 
-    with open(TRANSACTIONS_FILE, "a") as f:
-        f.write(f"{timestamp},income,{category},{description},{amount}\n")
+    append_transactions([{
+        "timestamp": timestamp,
+        "type": "income",
+        "category": category,
+        "description": description,
+        "amount_paisa": amount
+    }])
 
     console.print("[green]Income added successfully![/green]")
 
+def _page_size():
+    """Rows that fit on one screen, leaving room for the table frame and the key prompt."""
+    return max(MIN_PAGE_ROWS, console.size.height - PAGE_CHROME_LINES)
+
+def _page_table(rows, title, first_row, has_more):
+    """Builds the table for one page. Only the rows on screen are ever formatted."""
+    last_row = first_row + len(rows) - 1
+    caption = f"Rows {first_row:,}-{last_row:,}" + (" (more below)" if has_more else " (end)")
+    table = Table(title=title, caption=caption)
+    table.add_column("Date", style="cyan", justify="left", no_wrap=True)
+    table.add_column("Type", justify="left", no_wrap=True)
+    table.add_column("Category", style="magenta", justify="left", no_wrap=True)
+    # One line per row, so a page always fits the terminal.
+    table.add_column("Description", style="white", justify="left", no_wrap=True, overflow="ellipsis")
+    table.add_column("Amount (Rs)", justify="right", no_wrap=True)
+
+    for t in rows:
+        amount_display = f"{t['amount_paisa'] / 100:.2f}"
+        style = "green" if t['type'].lower() == "income" else "red"
+
+        table.add_row(
+            DAYS.key_of(t['timestamp']),
+            Text(t['type'].capitalize(), style=style),
+            t['category'],
+            t['description'],
+            Text(amount_display, style=style)
+        )
+    return table
+
+def _read_page_key():
+    """
+    Waits for one paging key and returns "next", "previous", "first" or "quit".
+    Keys act immediately, without Enter.
+    """
+    bindings = KeyBindings()
+    # Any other key is ignored. Added first, so the specific keys below take precedence.
+    bindings.add("<any>")(lambda event: None)
+    for action, keys in PAGE_KEYS.items():
+        for key in keys:
+            bindings.add(key)(lambda event, action=action: event.app.exit(result=action))
+    try:
+        return prompt("[n/space] next  [p/b] previous  [g] first  [q] quit ", key_bindings=bindings)
+    except (EOFError, KeyboardInterrupt):
+        return "quit"
+
+def browse_transactions(transactions, title="Transaction History"):
+    """
+    Pages through transaction dicts (an iterable, already in display order) in the
+    terminal, one screenful at a time. Rows are only pulled from the iterable when a page
+    needs them, and kept so earlier pages can be shown again.
+    """
+    source = iter(transactions)
+    fetched = []
+    exhausted = False
+    first = 0
+
+    while True:
+        page_size = _page_size()
+        # One row beyond the page tells whether there is a next page.
+        while not exhausted and len(fetched) < first + page_size + 1:
+            try:
+                fetched.append(next(source))
+            except StopIteration:
+                exhausted = True
+        rows = fetched[first:first + page_size]
+        if not rows:
+            console.print("[yellow]No transactions found matching your filter criteria.[/yellow]")
+            return
+        has_more = len(fetched) > first + page_size
+
+        console.print(_page_table(rows, title, first + 1, has_more))
+        if first == 0 and not has_more:
+            return
+
+        action = _read_page_key()
+        if action == "quit":
+            return
+        if action == "next" and has_more:
+            first += page_size
+        elif action == "previous":
+            first = max(0, first - page_size)
+        elif action == "first":
+            first = 0
+
+def ask_query(message="Enter a query (blank for all transactions):"):
+    """
+    Prompts for a transaction query (see QUERY_HELP) until it parses.
+    Returns the Query, or None if the prompt was cancelled.
+    """
+    console.print(f"[dim]{QUERY_HELP}[/dim]")
+    while True:
+        text = questionary.text(message).ask()
+        if text is None:
+            return None
+        try:
+            return parse_query(text)
+        except QueryError as e:
+            console.print(f"[red]{e}[/red]")
+
 def list_transactions():
-    """Lists all transactions, with optional filters."""
+    """Browses transactions, newest first, with optional filters."""
     console.print(Text("\n--- Your Transactions ---", style="bold blue"))
 
-    transactions = load_all_transactions()
-    if not transactions:
+    if not has_transactions():
         console.print("[yellow]No transactions recorded yet.[/yellow]")
         return
 
-    # Sort by date, newest first
-    transactions.sort(key=lambda x: x['timestamp'], reverse=True)
-
     filter_choice = questionary.select(
         "Filter transactions:",
-        choices=[
-            "All",
-            "Last 7 Days",
-            "Only Expenses",
-            "Only Income"
-        ]
+        choices=list(FILTER_QUERIES) + ["Custom Query"]
     ).ask()
 
-    filtered_transactions = []
-    today = datetime.now()
-    seven_days_ago = today - timedelta(days=7)
-
-    for t in transactions:
-        include = False
-        transaction_date_obj = datetime.fromtimestamp(t['timestamp'])
-
-        if filter_choice == "All":
-            include = True
-        elif filter_choice == "Last 7 Days":
-            if transaction_date_obj >= seven_days_ago:
-                include = True
-        elif filter_choice == "Only Expenses":
-            if t['type'].lower() == "expense":
-                include = True
-        elif filter_choice == "Only Income":
-            if t['type'].lower() == "income":
-                include = True
-        
-        if include:
-            filtered_transactions.append(t)
-
-    if not filtered_transactions:
-        console.print("[yellow]No transactions found matching your filter criteria.[/yellow]")
+    # Every filter is a query: its date range, types and categories are pushed down into
+    # the read, and rows are read newest first only as far as the pages shown need.
+    if filter_choice == "Custom Query":
+        query = ask_query()
+    elif filter_choice in FILTER_QUERIES:
+        query = parse_query(FILTER_QUERIES[filter_choice])
+    else:
+        return
+    if query is None:
         return
 
-    table = Table(title="Transaction History")
-    table.add_column("Date", style="cyan", justify="left")
-    table.add_column("Type", justify="left")
-    table.add_column("Category", style="magenta", justify="left")
-    table.add_column("Description", style="white", justify="left")
-    table.add_column("Amount (Rs)", justify="right")
+    browse_transactions(query.iter_transactions(newest_first=True))
 
-    for t in filtered_transactions:
-        amount_display = f"{t['amount_paisa'] / 100:.2f}"
-        style = "green" if t['type'].lower() == "income" else "red"
-        
-        table.add_row(
-            datetime.fromtimestamp(t['timestamp']).strftime("%Y-%m-%d"),
-            Text(t['type'].capitalize(), style=style),
-            t['category'],
-            t['description'],
-            Text(amount_display, style=style)
-        )
-    
-    console.print(table)
+def _write_transactions(transactions, output_format, title, errors):
+    """Writes transaction dicts to stdout as a table, CSV or NDJSON."""
+    if output_format == "csv":
+        writer = csv.writer(sys.stdout)
+        writer.writerow(LEDGER_FIELDS)
+        for t in transactions:
+            writer.writerow([t[field] for field in LEDGER_FIELDS])
+    elif output_format == "ndjson":
+        for t in transactions:
+            sys.stdout.write(json.dumps(t, ensure_ascii=False, separators=(",", ":")) + "\n")
+    else:
+        rows = list(transactions)
+        if not rows:
+            errors.print("[yellow]No matching transactions found.[/yellow]")
+            return
+        console.print(_page_table(rows, title, 1, False))
+
+def query_transactions(text, output_format="table", limit=None, newest_first=True, explain=False):
+    """
+    Runs a query non-interactively and writes the matching transactions to stdout as a
+    table, CSV or NDJSON. Returns a process exit code: 0 on success, 2 for a bad query.
+    """
+    errors = Console(stderr=True)
+    try:
+        query = parse_query(text)
+    except QueryError as e:
+        errors.print(f"[red]{e}[/red]")
+        return 2
+
+    if explain:
+        for line in query.explain():
+            errors.print(line)
+
+    transactions = islice(query.iter_transactions(newest_first=newest_first), limit)
+    _write_transactions(transactions, output_format, f"Transactions matching: {query.text or '(all)'}", errors)
+    return 0
+
+def search_descriptions():
+    """Searches transaction descriptions through the full-text index and browses the matches."""
+    console.print(Text("\n--- Search Transactions ---", style="bold blue"))
+    console.print(f"[dim]{SEARCH_HELP}[/dim]")
+    text = questionary.text("Search descriptions for:").ask()
+    if text is None:
+        return
+    try:
+        count, transactions = search_transactions(text)
+    except SearchError as e:
+        console.print(f"[red]{e}[/red]")
+        return
+
+    console.print(f"{count:,} matching transactions, newest first.")
+    browse_transactions(transactions, title=f"Search: {text.strip()}")
+
+def search_command(text, output_format="table", limit=None):
+    """
+    Searches descriptions non-interactively and writes the matches, newest first, to stdout
+    as a table, CSV or NDJSON. Returns a process exit code: 0 on success, 2 for an empty search.
+    """
+    errors = Console(stderr=True)
+    try:
+        count, transactions = search_transactions(text)
+    except SearchError as e:
+        errors.print(f"[red]{e}[/red]")
+        return 2
+
+    errors.print(f"{count:,} matching transactions.")
+    _write_transactions(islice(transactions, limit), output_format, f"Search: {text.strip()}", errors)
+    return 0
 
 def view_balance():
     """
@@ -165,23 +331,16 @@ def view_balance():
     """
     console.print(Text("\n--- Current Month's Balance ---", style="bold green"))
 
-    transactions = load_all_transactions()
-    if not transactions:
+    rollups = load_rollups()
+    if not rollups.has_transactions():
         console.print("[yellow]No transactions recorded yet.[/yellow]")
         return
 
     current_month_year = datetime.now().strftime("%Y-%m")
     
-    total_income_paisa = 0
-    total_expense_paisa = 0
-
-    for t in transactions:
-        transaction_date_obj = datetime.fromtimestamp(t['timestamp'])
-        if transaction_date_obj.strftime("%Y-%m") == current_month_year:
-            if t['type'].lower() == "income":
-                total_income_paisa += t['amount_paisa']
-            elif t['type'].lower() == "expense":
-                total_expense_paisa += t['amount_paisa']
+    # Answered from the monthly rollups, without scanning the ledger.
+    total_income_paisa = rollups.total(current_month_year, "income")
+    total_expense_paisa = rollups.total(current_month_year, "expense")
     
     current_balance_paisa = total_income_paisa - total_expense_paisa
 
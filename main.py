@@ -1,3 +1,4 @@
+import argparse
 import questionary
 import subprocess
 import sys
@@ -5,11 +6,21 @@ from rich.console import Console
 from rich.panel import Panel
 from rich.text import Text
 
-from features.transactions.transactions import add_expense, add_income, list_transactions, view_balance
+from features.transactions.transactions import (
+    add_expense,
+    add_income,
+    list_transactions,
+    query_transactions,
+    search_command,
+    search_descriptions,
+    view_balance
+)
 from features.budgets.budgets import set_budget, view_budgets
 from features.analytics.analytics import show_analytics_menu
 from features.smart_assistance.assistance import daily_financial_check
 from features.data_management.cli import show_data_management_menu
+from database.query import QUERY_HELP
+from database.description_index import SEARCH_HELP
 
 console = Console()
 
@@ -43,6 +54,7 @@ def main():
                 "Add Expense",
                 "Add Income",
                 "List Transactions",
+                "Search Transactions",
                 "View Current Balance",
                 "Set Budget",
                 "View Budgets",
@@ -60,6 +72,8 @@ def main():
             add_income()
         elif choice == "List Transactions":
             list_transactions()
+        elif choice == "Search Transactions":
+            search_descriptions()
         elif choice == "View Current Balance":
             view_balance()
         elif choice == "Set Budget":
@@ -83,5 +97,65 @@ def main():
         console.print("\n") # Add a newline for better readability between actions
 
 
+def _limit(text):
+    """argparse type of --limit: a count of transactions, so 0 or more."""
+    try:
+        limit = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid limit: '{text}'") from None
+    if limit < 0:
+        raise argparse.ArgumentTypeError(f"the limit cannot be negative: {limit}")
+    return limit
+
+def run_command(argv):
+    """
+    Runs one command without the interactive menu, e.g.
+    python main.py query 'category:Food amount>500 date:2026-01..2026-03' --format csv
+    Returns the process exit code.
+    """
+    parser = argparse.ArgumentParser(prog="main.py", description="Personal Finance Tracker commands.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    query = commands.add_parser(
+        "query",
+        help="Print the transactions matching a query.",
+        description=QUERY_HELP,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    query.add_argument(
+        "query", nargs="*",
+        help="The query, quoted as one argument (put -- before it if it starts with -)."
+    )
+    query.add_argument("--format", choices=["table", "csv", "ndjson"], default="table", help="Output format (default: table).")
+    query.add_argument("--limit", type=_limit, help="Print at most this many transactions.")
+    query.add_argument("--oldest-first", action="store_true", help="Print in ledger order instead of newest first.")
+    query.add_argument("--explain", action="store_true", help="Describe the query plan on stderr.")
+
+    search = commands.add_parser(
+        "search",
+        help="Print the transactions whose descriptions match a search, newest first.",
+        description=SEARCH_HELP,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    search.add_argument("words", nargs="+", help="The words to search for.")
+    search.add_argument("--format", choices=["table", "csv", "ndjson"], default="table", help="Output format (default: table).")
+    search.add_argument("--limit", type=_limit, help="Print at most this many transactions.")
+
+    args = parser.parse_args(argv)
+    if args.command == "search":
+        return search_command(" ".join(args.words), output_format=args.format, limit=args.limit)
+    if args.command == "query":
+        return query_transactions(
+            " ".join(args.query),
+            output_format=args.format,
+            limit=args.limit,
+            newest_first=not args.oldest_first,
+            explain=args.explain
+        )
+    return 0
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_command(sys.argv[1:]))
     main()
\ No newline at end of file
@@ -0,0 +1,143 @@
+import os
+import random
+from datetime import datetime
+
+import pytest
+
+import database.utils
+from database import cache, description_index, sqlite_store, writer
+from features.dashboard import data as dashboard_data, watcher
+
+FORMATS = ("text", "binary", "sqlite")
+
+DESCRIPTIONS = [
+    "Swiggy order", "Uber ride to airport", "uber-eats dinner", "Netflix subscription",
+    "Rent for the flat", "Electricity bill", "Salary credit", "Café Coffee Day",
+    "Freelance invoice 42", "Gift from Amma", "Pharmacy", "Movie tickets", "Petrol"
+]
+CATEGORIES = {
+    "expense": ["Food", "Transport", "Shopping", "Bills", "Entertainment", "Health", "Other", "Pets"],
+    "income": ["Salary", "Freelance", "Business", "Investment", "Gift", "Other"]
+}
+
+
+def reset_process_state():
+    """Forgets everything the storage layer keeps in memory between calls."""
+    writer.close_writer()
+    writer._writer = None
+    sqlite_store.close()
+    description_index._index = None
+    if watcher._watcher is not None:
+        watcher._watcher.stop()
+        watcher._watcher = None
+    dashboard_data._dashboard_cache._reset()
+    for file_cache in cache._caches:
+        file_cache.invalidate()
+
+
+def use_format(monkeypatch, name):
+    """Switches STORAGE_FORMAT in database/utils.py, which every module reads it from."""
+    monkeypatch.setattr(database.utils, "STORAGE_FORMAT", name)
+
+
+def sample_transactions(count, seed=0, start=datetime(2025, 1, 1).timestamp(), days=400):
+    """count reproducible transactions spread over days from start, with some equal timestamps."""
+    rng = random.Random(seed)
+    transactions = []
+    for number in range(count):
+        trans_type = "income" if rng.random() < 0.2 else "expense"
+        if transactions and rng.random() < 0.05:
+            timestamp = transactions[-1]["timestamp"]
+        else:
+            timestamp = round(start + rng.random() * days * 86400, 3)
+        transactions.append({
+            "timestamp": timestamp,
+            "type": trans_type,
+            "category": rng.choice(CATEGORIES[trans_type]),
+            "description": f"{rng.choice(DESCRIPTIONS)} #{number}",
+            "amount_paisa": rng.randint(1, 5_000_000)
+        })
+    return transactions
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Runs each test in an empty directory, since every data path is relative."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "database").mkdir()
+    reset_process_state()
+    yield tmp_path
+    reset_process_state()
+
+
+@pytest.fixture(params=FORMATS)
+def storage_format(request, monkeypatch):
+    """The storage format under test; tests using it run once per format."""
+    use_format(monkeypatch, request.param)
+    return request.param
+
+
+@pytest.fixture
+def switch_format(monkeypatch):
+    """Returns a function switching the storage format in the middle of a test."""
+    def switch(name):
+        reset_process_state()
+        use_format(monkeypatch, name)
+    return switch
+
+
+# Ways the ledger changes under a sidecar: the sidecar must catch up with each of them.
+LEDGER_CHANGES = ("writer appends", "external append", "rewrite", "truncation")
+
+
+def change_ledger(change):
+    """Writes a ledger through the writer, then changes it as named in LEDGER_CHANGES."""
+    # Imported here: the writer pulls in every sidecar module.
+    from database.formats import get_ledger_format
+    from database.ledger import append_transactions
+
+    append_transactions(sample_transactions(300))
+    writer.close_writer()
+    if change == "writer appends":
+        for seed in (1, 2):
+            append_transactions(sample_transactions(100, seed=seed))
+        writer.close_writer()
+    elif change == "external append":
+        # Written straight to the ledger, as another process or an older version would.
+        get_ledger_format().append(sample_transactions(150, seed=1))
+    elif change == "rewrite":
+        get_ledger_format().replace(sample_transactions(300, seed=1))
+    else:
+        get_ledger_format().replace(sample_transactions(40))
+
+
+def assert_caught_up(sidecar_class, state=lambda sidecar: sidecar.data_to_json()):
+    """A sidecar loaded from disk and caught up equals one rebuilt from scratch."""
+    caught_up = sidecar_class.load_current()
+    caught_up = (caught_up.offset, caught_up.fingerprint, state(caught_up))
+    rebuilt = sidecar_class.rebuild()
+    assert caught_up == (rebuilt.offset, rebuilt.fingerprint, state(rebuilt))
+
+
+def live_files():
+    """The bytes of every file under database/, sidecars included."""
+    files = {}
+    for name in sorted(os.listdir("database")):
+        if not name.endswith("-shm"):
+            with open(os.path.join("database", name), "rb") as f:
+                files[name] = f.read()
+    return files
+
+
+@pytest.fixture
+def ledger(storage_format):
+    """A ledger of 400 transactions plus one budget, with every file saved to disk."""
+    from database.budget_store import set_budget
+    from database.ledger import append_transactions
+
+    transactions = sample_transactions(400)
+    append_transactions(transactions)
+    set_budget("2025-01", "Food", 300000)
+    # The writer saves its sidecars now, so a failed restore must leave every file as it is.
+    writer.close_writer()
+    return transactions
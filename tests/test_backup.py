@@ -0,0 +1,41 @@
+from conftest import live_files, sample_transactions
+from database.budget_store import load_all_budgets, set_budget
+from database.ledger import append_transactions
+from database.utils import load_all_transactions
+from database.writer import close_writer
+from features.data_management import backup
+
+
+def test_incremental_backup_round_trip(ledger):
+    first = backup.create_incremental_backup()
+    append_transactions(sample_transactions(50, seed=1))
+    set_budget("2025-02", "Food", 100000)
+    second = backup.create_incremental_backup()
+    assert [manifest["id"] for manifest in backup.list_backups()] == [first["id"], second["id"]]
+
+    assert backup.restore_incremental_backup(first["id"])
+    assert load_all_transactions() == ledger
+    assert load_all_budgets() == {"2025-01": {"Food": 300000}}
+
+    assert backup.restore_incremental_backup(second["id"])
+    assert load_all_transactions() == ledger + sample_transactions(50, seed=1)
+
+
+def test_unchanged_files_share_their_chunks(ledger):
+    first = backup.create_incremental_backup()
+    second = backup.create_incremental_backup()
+    assert second["files"] == first["files"]
+
+
+def test_corrupted_incremental_backup_leaves_live_files_untouched(ledger):
+    manifest = backup.create_incremental_backup()
+    append_transactions(sample_transactions(50, seed=1))
+    close_writer()
+    digest = next(iter(manifest["files"].values()))["chunks"][0]
+    with open(backup._chunk_path(backup.BACKUP_REPOSITORY, digest), "r+b") as f:
+        f.seek(5)
+        f.write(b"\x00\x00\x00")
+
+    before = live_files()
+    assert not backup.restore_incremental_backup(manifest["id"])
+    assert live_files() == before
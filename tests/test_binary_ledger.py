@@ -0,0 +1,45 @@
+import pytest
+
+from conftest import sample_transactions
+from database.formats import convert_binary_to_text, convert_text_to_binary
+from database.ledger import append_transactions, replace_transactions
+from database.utils import load_all_transactions
+
+
+def test_each_format_loads_what_was_written(storage_format):
+    transactions = sample_transactions(500)
+    append_transactions(transactions[:200])
+    append_transactions(transactions[200:])
+    assert load_all_transactions() == transactions
+
+    replaced = sample_transactions(300, seed=1)
+    assert replace_transactions(replaced) == 300
+    assert load_all_transactions() == replaced
+
+
+def test_text_binary_round_trip(switch_format):
+    transactions = sample_transactions(600)
+    switch_format("text")
+    append_transactions(transactions)
+    with open("database/transactions.txt", "rb") as f:
+        text_ledger = f.read()
+
+    assert convert_text_to_binary() == len(transactions)
+    switch_format("binary")
+    assert load_all_transactions() == transactions
+
+    switch_format("text")
+    assert convert_binary_to_text() == len(transactions)
+    with open("database/transactions.txt", "rb") as f:
+        assert f.read() == text_ledger
+
+
+@pytest.mark.parametrize("storage_format", ["text", "binary"], indirect=True)
+def test_malformed_and_torn_records_are_skipped(storage_format):
+    transactions = sample_transactions(50)
+    append_transactions(transactions)
+    reader_path = "database/transactions.txt" if storage_format == "text" else "database/transactions.bin"
+    with open(reader_path, "ab") as f:
+        # A line with a bad amount, then a record cut off by a crash.
+        f.write(b"1735689600.0,expense,Food,bad amount,12x\n" if storage_format == "text" else b"\x01\x02\x03")
+    assert load_all_transactions() == transactions
@@ -0,0 +1,70 @@
+import pytest
+from rich.console import Console
+
+from conftest import sample_transactions
+from features.transactions import transactions as transactions_cli
+
+
+@pytest.fixture
+def browser(monkeypatch):
+    """Runs browse_transactions with 5-row pages and scripted keys; returns the shown pages."""
+    console = Console(record=True, width=200)
+    monkeypatch.setattr(transactions_cli, "console", console)
+    monkeypatch.setattr(transactions_cli, "_page_size", lambda: 5)
+    shown = []
+    monkeypatch.setattr(transactions_cli, "_page_table", lambda rows, title, first_row, has_more: shown.append(
+        ([t["description"] for t in rows], first_row, has_more)
+    ) or "")
+
+    def browse(transactions, keys):
+        keys = iter(keys)
+        monkeypatch.setattr(transactions_cli, "_read_page_key", lambda: next(keys))
+        transactions_cli.browse_transactions(transactions)
+        return shown, console.export_text()
+    return browse
+
+
+def counting(transactions, pulled):
+    for t in transactions:
+        pulled.append(t)
+        yield t
+
+
+def test_rows_are_pulled_only_as_pages_need_them(browser):
+    transactions = sample_transactions(100)
+    pulled = []
+    shown, _ = browser(counting(transactions, pulled), ["next", "next", "previous", "first", "quit"])
+    descriptions = [t["description"] for t in transactions]
+    assert shown == [
+        (descriptions[0:5], 1, True),
+        (descriptions[5:10], 6, True),
+        (descriptions[10:15], 11, True),
+        (descriptions[5:10], 6, True),
+        (descriptions[0:5], 1, True),
+    ]
+    # One row beyond the furthest page, to know there is more.
+    assert len(pulled) == 16
+
+
+def test_last_page_and_single_page(browser):
+    transactions = sample_transactions(7)
+    shown, _ = browser(iter(transactions), ["next", "next", "quit"])
+    assert [(first_row, has_more) for _, first_row, has_more in shown] == [(1, True), (6, False), (6, False)]
+
+    shown.clear()
+    # A single page is shown without waiting for a key.
+    shown, _ = browser(iter(transactions[:3]), [])
+    assert [(first_row, has_more) for _, first_row, has_more in shown] == [(1, False)]
+
+
+def test_no_rows(browser):
+    shown, text = browser(iter([]), [])
+    assert shown == []
+    assert "No transactions found" in text
+
+
+def test_page_table_formats_only_its_rows():
+    rows = sample_transactions(3)
+    table = transactions_cli._page_table(rows, "History", 11, True)
+    assert table.row_count == 3
+    assert table.caption == "Rows 11-13 (more below)"
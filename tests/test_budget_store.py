@@ -0,0 +1,53 @@
+import pytest
+
+from database import budget_store
+from database.budget_store import (
+    compact_budgets,
+    load_all_budgets,
+    load_budget_range,
+    load_budgets,
+    set_budget
+)
+from database.utils import BUDGETS_FILE
+
+
+def test_last_budget_wins_and_months_stay_apart(storage_format):
+    set_budget("2025-01", "Food", 100000)
+    set_budget("2025-01", "Bills", 50000)
+    set_budget("2025-02", "Food", 120000)
+    set_budget("2025-01", "Food", 110000)
+    assert load_budgets("2025-01") == {"Food": 110000, "Bills": 50000}
+    assert load_budgets("2025-03") == {}
+    assert load_all_budgets() == {"2025-01": {"Food": 110000, "Bills": 50000}, "2025-02": {"Food": 120000}}
+
+
+def test_budget_range(storage_format):
+    for month in ("2024-12", "2025-01", "2025-03", "2025-05"):
+        set_budget(month, "Food", int(month[-2:]) * 1000)
+    assert load_budget_range("2025-01", "2025-04") == {"2025-01": {"Food": 1000}, "2025-03": {"Food": 3000}}
+    assert list(load_budget_range("2024-01", "2030-12")) == ["2024-12", "2025-01", "2025-03", "2025-05"]
+
+
+@pytest.mark.parametrize("storage_format", ["text", "binary"], indirect=True)
+def test_compaction_keeps_only_live_budgets(storage_format, monkeypatch):
+    monkeypatch.setattr(budget_store, "BUDGET_COMPACTION_MIN_LINES", 20)
+    for amount in range(30):
+        set_budget("2025-01", "Food", amount)
+        set_budget("2025-02", "Bills", amount * 2)
+    with open(BUDGETS_FILE) as f:
+        assert len(f.readlines()) < 30
+    assert load_all_budgets() == {"2025-01": {"Food": 29}, "2025-02": {"Bills": 58}}
+
+    assert compact_budgets() == 2
+    with open(BUDGETS_FILE) as f:
+        assert f.read() == "2025-01,Food,29\n2025-02,Bills,58\n"
+    assert load_all_budgets() == {"2025-01": {"Food": 29}, "2025-02": {"Bills": 58}}
+
+
+@pytest.mark.parametrize("storage_format", ["text"], indirect=True)
+def test_lines_appended_by_another_process(storage_format):
+    set_budget("2025-01", "Food", 100000)
+    assert load_budgets("2025-01") == {"Food": 100000}
+    with open(BUDGETS_FILE, "a") as f:
+        f.write("2025-01,Food,90000\nnot a budget\n2025-01,Bills,abc\n")
+    assert load_budgets("2025-01") == {"Food": 90000}
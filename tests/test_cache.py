@@ -0,0 +1,75 @@
+import os
+
+from database.cache import IncrementalFileCache, invalidate_caches
+
+PATH = "database/lines.txt"
+
+
+def line_cache():
+    """A cache of the lines of PATH that also records every line it parsed."""
+    parsed = []
+
+    def consume(lines, line):
+        parsed.append(line)
+        lines.append(line)
+
+    return IncrementalFileCache(PATH, new_state=list, consume=consume, build=list), parsed
+
+
+def write(text, mode="w"):
+    with open(PATH, mode) as f:
+        f.write(text)
+
+
+def test_only_appended_lines_are_parsed():
+    cache, parsed = line_cache()
+    write("a\nb\n")
+    assert cache.get() == ["a", "b"]
+    write("c\n", "a")
+    assert cache.get() == ["a", "b", "c"]
+    assert parsed == ["a", "b", "c"]
+    # Unchanged file: the built value is reused without reading.
+    assert cache.get() is cache.get()
+    assert len(parsed) == 3
+
+
+def test_rewrites_and_truncations_reload():
+    cache, _ = line_cache()
+    write("a\nb\nc\n")
+    cache.get()
+    # Same size, different content.
+    write("x\ny\nz\n")
+    os.utime(PATH, ns=(1, 1))
+    assert cache.get() == ["x", "y", "z"]
+    write("q\n")
+    assert cache.get() == ["q"]
+
+
+def test_replaced_file_with_longer_content_reloads():
+    cache, _ = line_cache()
+    write("a\nb\n")
+    cache.get()
+    with open(PATH + ".tmp", "w") as f:
+        f.write("c\nd\ne\n")
+    os.replace(PATH + ".tmp", PATH)
+    assert cache.get() == ["c", "d", "e"]
+
+
+def test_torn_last_line_is_parsed_again_once_complete():
+    cache, _ = line_cache()
+    write("a\nb")
+    assert cache.get() == ["a", "b"]
+    write("c\n", "a")
+    assert cache.get() == ["a", "bc"]
+
+
+def test_missing_file_and_invalidation():
+    cache, parsed = line_cache()
+    assert cache.get() == []
+    write("a\n")
+    assert cache.get() == ["a"]
+    invalidate_caches(PATH)
+    assert cache.get() == ["a"]
+    assert parsed == ["a", "a"]
+    os.remove(PATH)
+    assert cache.get() == []
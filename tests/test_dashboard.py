@@ -0,0 +1,127 @@
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from conftest import sample_transactions
+from database.budget_store import set_budget
+from database.formats import get_ledger_format
+from database.ledger import append_transactions, ledger_files, replace_transactions
+from database.utils import month_bounds, LEDGER_FIELDS
+from features.dashboard import dashboard
+from features.dashboard.data import load_dashboard_data, load_ledger_frame
+from features.data_management import backup
+from features.data_management.data_management import restore_from_backup
+
+
+def rows(frame):
+    return frame[list(LEDGER_FIELDS)].astype(object).values.tolist()
+
+
+def assert_dashboard_current():
+    """The cached dashboard frame equals a fresh read of the whole ledger."""
+    cached = load_dashboard_data().frame
+    assert rows(cached) == rows(load_ledger_frame())
+    assert cached["date"].tolist() == load_ledger_frame()["date"].tolist()
+
+
+def test_dashboard_follows_appends(storage_format):
+    assert load_dashboard_data().frame.empty
+    append_transactions(sample_transactions(300))
+    assert_dashboard_current()
+    append_transactions(sample_transactions(20, seed=1))
+    assert_dashboard_current()
+    assert len(load_dashboard_data().frame) == 320
+
+
+def test_dashboard_after_restore(storage_format):
+    append_transactions(sample_transactions(300))
+    assert_dashboard_current()
+    # As many rows as before, so only the content tells the ledgers apart.
+    with open("backup.json", "w") as f:
+        json.dump({"transactions": sample_transactions(300, seed=1), "monthly_budgets": {}}, f)
+    restore_from_backup("backup.json")
+    assert_dashboard_current()
+    append_transactions(sample_transactions(5, seed=2))
+    assert_dashboard_current()
+
+
+def test_dashboard_after_replace(storage_format):
+    append_transactions(sample_transactions(300))
+    assert_dashboard_current()
+    replace_transactions(sample_transactions(300, seed=1))
+    assert_dashboard_current()
+
+
+def test_dashboard_after_incremental_restore(storage_format):
+    append_transactions(sample_transactions(300))
+    manifest = backup.create_incremental_backup()
+    append_transactions(sample_transactions(30, seed=1))
+    assert_dashboard_current()
+    assert backup.restore_incremental_backup(manifest["id"])
+    assert_dashboard_current()
+
+
+@pytest.mark.parametrize("storage_format", ["text", "binary"], indirect=True)
+def test_dashboard_after_external_append(storage_format):
+    append_transactions(sample_transactions(300))
+    assert_dashboard_current()
+    get_ledger_format().append(sample_transactions(40, seed=1))
+    assert_dashboard_current()
+
+
+def test_unchanged_ledger_shares_one_snapshot(storage_format):
+    append_transactions(sample_transactions(100))
+    snapshot = load_dashboard_data()
+    assert load_dashboard_data() is snapshot
+    assert snapshot.month_frame("2025-03") is snapshot.month_frame("2025-03")
+    append_transactions(sample_transactions(1, seed=1))
+    assert load_dashboard_data() is not snapshot
+
+
+def test_snapshot_aggregates(storage_format):
+    transactions = sample_transactions(600)
+    append_transactions(transactions)
+    snapshot = load_dashboard_data()
+    start, end = month_bounds("2025-03")
+    assert snapshot.month_frame("2025-03")["timestamp"].tolist() == [
+        t["timestamp"] for t in transactions if start <= t["timestamp"] < end
+    ]
+    recent = sorted(transactions, key=lambda t: t["timestamp"], reverse=True)[:10]
+    assert snapshot.recent_transactions()["timestamp"].tolist() == [t["timestamp"] for t in recent]
+
+
+def test_live_panels_read_the_month_from_the_rollups(storage_format, monkeypatch):
+    monkeypatch.setattr(dashboard.st, "session_state", {})
+    month_year = datetime.now().strftime("%Y-%m")
+    start, _ = month_bounds(month_year)
+    transactions = sample_transactions(300, start=start, days=1)
+    append_transactions(transactions)
+    set_budget(month_year, "Food", 500000)
+    set_budget(month_year, "Pets", 100000)
+    state = dashboard._live_panels_state()
+    assert state["totals"] == {
+        trans_type: sum(t["amount_paisa"] for t in transactions if t["type"] == trans_type)
+        for trans_type in ("income", "expense")
+    }
+    spent = {
+        category: sum(t["amount_paisa"] for t in transactions if t["type"] == "expense" and t["category"] == category)
+        for category in ("Food", "Pets")
+    }
+    budget_df = state["budget_df"]
+    assert budget_df["Category"].tolist() == ["Food", "Pets"]
+    assert budget_df["Spent"].tolist() == [spent["Food"] / 100, spent["Pets"] / 100]
+
+
+def test_sqlite_commits_that_leave_the_file_stats_alone(switch_format, monkeypatch):
+    switch_format("sqlite")
+    append_transactions(sample_transactions(100))
+    assert len(load_dashboard_data().frame) == 100
+    # A commit into a checkpointed WAL within one mtime tick changes neither its size nor its mtime.
+    real_stat = os.stat
+    frozen = {path: real_stat(path) for path in ledger_files()}
+    monkeypatch.setattr(os, "stat", lambda path, *args, **kwargs: frozen.get(path) or real_stat(path, *args, **kwargs))
+    append_transactions(sample_transactions(20, seed=1))
+    assert_dashboard_current()
+    assert len(load_dashboard_data().frame) == 120
@@ -0,0 +1,47 @@
+import pytest
+
+from conftest import sample_transactions
+from database.ledger import append_transactions
+from features.dashboard.data import load_dashboard_data, page_of
+
+
+def newest_first(transactions):
+    # Stable, so equal timestamps keep their ledger order.
+    return sorted(transactions, key=lambda t: t["timestamp"], reverse=True)
+
+
+@pytest.mark.parametrize("types, categories, search", [
+    ((), (), ""),
+    (("expense",), (), ""),
+    ((), ("Food", "Pets"), ""),
+    (("income",), ("Salary",), ""),
+    ((), (), "UBER"),
+    (("expense",), ("Transport", "Food"), " uber "),
+    ((), (), "no such description"),
+])
+def test_explore_filters_newest_first(storage_format, types, categories, search):
+    transactions = sample_transactions(500)
+    append_transactions(transactions)
+    found = load_dashboard_data().explore(types, categories, search)
+    term = search.strip().lower()
+    assert found["description"].tolist() == [
+        t["description"] for t in newest_first(transactions)
+        if (not types or t["type"] in types)
+        and (not categories or t["category"] in categories)
+        and term in t["description"].lower()
+    ]
+
+
+def test_explore_is_memoized(storage_format):
+    append_transactions(sample_transactions(100))
+    snapshot = load_dashboard_data()
+    assert snapshot.explore(("expense",), ("Food", "Bills")) is snapshot.explore(("expense",), ("Bills", "Food"))
+
+
+def test_page_of(storage_format):
+    transactions = sample_transactions(95)
+    append_transactions(transactions)
+    frame = load_dashboard_data().newest_first()
+    pages = [page_of(frame, page, 20)["description"].tolist() for page in range(1, 7)]
+    assert [len(page) for page in pages] == [20, 20, 20, 20, 15, 0]
+    assert sum(pages, []) == [t["description"] for t in newest_first(transactions)]
@@ -0,0 +1,61 @@
+import gzip
+import json
+
+import pytest
+
+from conftest import sample_transactions
+from database.utils import iter_transactions, load_all_transactions
+from database.ledger import append_transactions
+from features.data_management.data_management import (
+    available_compressions,
+    export_transactions_csv,
+    export_transactions_json,
+    export_transactions_ndjson,
+    import_transactions_csv,
+    import_transactions_json
+)
+
+
+def decompress(path, compression):
+    if compression == "gzip":
+        with gzip.open(path, "rb") as f:
+            return f.read()
+    try:
+        from compression import zstd
+    except ImportError:
+        import zstandard as zstd
+    with zstd.open(path, "rb") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("export, parse", [
+    (export_transactions_csv, import_transactions_csv),
+    (export_transactions_json, import_transactions_json),
+    (export_transactions_ndjson, import_transactions_json)
+])
+def test_export_then_import_round_trip(storage_format, export, parse):
+    transactions = sample_transactions(200)
+    assert export("export.out", transactions) == 200
+    assert parse("export.out") == (200, 0)
+    assert load_all_transactions() == transactions
+    assert parse("export.out") == (0, 200)
+
+
+@pytest.mark.parametrize("records", [[], sample_transactions(30)])
+def test_json_layouts(records):
+    export_transactions_json("indented.json", iter(records))
+    with open("indented.json") as f:
+        assert f.read() == json.dumps(records, indent=4)
+    export_transactions_json("compact.json", iter(records), compact=True)
+    with open("compact.json") as f:
+        assert f.read() == json.dumps(records, separators=(",", ":"))
+
+
+@pytest.mark.parametrize("compression", available_compressions())
+@pytest.mark.parametrize("export", [export_transactions_csv, export_transactions_json, export_transactions_ndjson])
+def test_compressed_exports_hold_the_plain_export(storage_format, compression, export):
+    append_transactions(sample_transactions(300))
+    export("plain.out", iter_transactions())
+    export("packed.out", iter_transactions(), compression=compression)
+    with open("plain.out", "rb") as f:
+        assert decompress("packed.out", compression) == f.read()
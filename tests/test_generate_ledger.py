@@ -0,0 +1,104 @@
+import argparse
+import calendar
+import time
+
+import pytest
+
+from benchmarks import generate_ledger
+from benchmarks.generate_ledger import generate_transactions, parse_rows, write_ledger, current_month
+from database.budget_store import load_all_budgets
+from database.utils import load_all_transactions, parse_transaction_line, BUDGETS_FILE, TRANSACTIONS_FILE
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def ledger_lines(**options):
+    settings = dict(rows=3000, seed=7, years=2, end_month="2024-06", skew=1.1, income_share=0.06,
+                    backdated_share=0.02, reference_share=0.3)
+    settings.update(options)
+    return "".join(generate_transactions(**settings)).splitlines(keepends=True)
+
+
+@pytest.mark.parametrize("text, rows", [("10000", 10000), ("10K", 10000), ("2.5M", 2500000), ("1_000", 1000), ("50m", 50000000)])
+def test_parse_rows(text, rows):
+    assert parse_rows(text) == rows
+
+
+@pytest.mark.parametrize("text", ["0", "-5K", "lots", "M"])
+def test_parse_rows_rejects_bad_counts(text):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_rows(text)
+
+
+def test_same_settings_write_the_same_bytes(tmp_path):
+    write_ledger(tmp_path / "a", 5000, seed=3, end_month="2024-06")
+    write_ledger(tmp_path / "b", 5000, seed=3, end_month="2024-06")
+    for path in (TRANSACTIONS_FILE, BUDGETS_FILE):
+        assert read(tmp_path / "a" / path) == read(tmp_path / "b" / path)
+    write_ledger(tmp_path / "c", 5000, seed=4, end_month="2024-06")
+    assert read(tmp_path / "a" / TRANSACTIONS_FILE) != read(tmp_path / "c" / TRANSACTIONS_FILE)
+
+
+def test_chunks_continue_the_history(monkeypatch):
+    monkeypatch.setattr(generate_ledger, "CHUNK_ROWS", 1000)
+    chunks = list(generate_transactions(3000, 7, 2, "2024-06", 1.1, 0.06, 0.0, 0.3))
+    assert [chunk.count("\n") for chunk in chunks] == [1000, 1000, 1000]
+    timestamps = [parse_transaction_line(line)[0] for chunk in chunks for line in chunk.splitlines()]
+    # Without backdated rows the ledger grows chronologically, across chunks too.
+    assert timestamps == sorted(timestamps)
+
+
+def test_rows_fit_the_span_and_the_mixes():
+    lines = ledger_lines(backdated_share=0.05)
+    parsed = [parse_transaction_line(line) for line in lines]
+    assert None not in parsed
+    start = calendar.timegm((2022, 7, 1, 0, 0, 0))
+    end = calendar.timegm((2024, 7, 1, 0, 0, 0))
+    assert all(start <= row[0] < end for row in parsed)
+    categories = {"expense": {name for name, *_ in generate_ledger.EXPENSE_MIX},
+                  "income": {name for name, *_ in generate_ledger.INCOME_MIX}}
+    assert all(row[2] in categories[row[1]] for row in parsed)
+    assert all(row[4] >= 100 and row[4] % 100 == 0 for row in parsed)
+    # Entry order: timestamps ascend except for the backdated rows.
+    descending = sum(later[0] < earlier[0] for earlier, later in zip(parsed, parsed[1:]))
+    assert 0 < descending < len(parsed) * 0.1
+    # The mix is skewed: Food is the most common expense category.
+    expenses = [row[2] for row in parsed if row[1] == "expense"]
+    assert max(set(expenses), key=expenses.count) == "Food"
+
+
+def test_current_month_history_stops_now(monkeypatch):
+    monkeypatch.setattr(generate_ledger, "CHUNK_ROWS", 700)
+    before = time.time()
+    settings = write_ledger(".", 2000, years=1)
+    assert settings["end_month"] == current_month()
+    assert before - 1 <= settings["until"] <= time.time()
+    transactions = load_all_transactions()
+    assert len(transactions) == 2000
+    assert max(t["timestamp"] for t in transactions) < settings["until"]
+    assert settings["transactions_bytes"] == len(read(TRANSACTIONS_FILE))
+
+
+def test_budgets_are_readable_by_the_app():
+    settings = write_ledger(".", 4000, years=1, end_month="2024-12")
+    assert settings["until"] is None
+    budgets = load_all_budgets()
+    assert set(budgets) <= {f"2024-{month:02d}" for month in range(1, 13)}
+    assert len(budgets) >= 10
+    expense_names = {name for name, *_ in generate_ledger.EXPENSE_MIX}
+    for month_budgets in budgets.values():
+        assert set(month_budgets) <= expense_names
+        assert all(amount >= 50000 and amount % 50000 == 0 for amount in month_budgets.values())
+
+
+@pytest.mark.parametrize("hour", [3, 12])
+def test_history_cut_short_stays_before_until(monkeypatch, hour):
+    monkeypatch.setattr(generate_ledger, "CHUNK_ROWS", 500)
+    until = calendar.timegm((2024, 6, 10, hour, 0, 0))
+    lines = ledger_lines(rows=2000, backdated_share=0.0, until=until)
+    timestamps = [parse_transaction_line(line)[0] for line in lines]
+    assert len(timestamps) == 2000 and timestamps == sorted(timestamps)
+    assert until - 2 * 86400 < timestamps[-1] < until
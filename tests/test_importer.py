@@ -0,0 +1,63 @@
+import csv
+import io
+import json
+
+import pytest
+
+from conftest import sample_transactions
+from database.ledger import append_transactions
+from database.utils import load_all_transactions
+from features.data_management.importer import import_file, import_records, iter_csv_records, iter_json_records, JsonStream
+
+DOCUMENT = {
+    "transactions": [{"amount": 12.5e3, "text": "a \"quoted\" , [bracket] {brace}"}, [], {}, -0.25, 1e-7],
+    "skipped": {"nested": [1, [2, [3]], {"k": None}], "flag": True},
+    "budgets": {"2025-01": {"Food": 100}}
+}
+
+
+@pytest.mark.parametrize("read_size", [1, 2, 3, 7, 64, 1 << 16])
+@pytest.mark.parametrize("indent", [None, 4])
+def test_json_stream_reads_values_across_reads(read_size, indent):
+    stream = JsonStream(io.StringIO(json.dumps(DOCUMENT, indent=indent)), read_size)
+    found = {}
+    for key in stream.iter_object():
+        found[key] = list(stream.iter_array()) if key == "transactions" else stream.value()
+    assert found == DOCUMENT
+
+
+@pytest.mark.parametrize("text", ['{"transactions": [1, 2', '{"transactions": [1 2]}', '{1: 2}', '[1, 2]'])
+def test_json_stream_rejects_malformed_documents(text):
+    stream = JsonStream(io.StringIO(text), 2)
+    with pytest.raises(json.JSONDecodeError):
+        for _ in stream.iter_object():
+            list(stream.iter_array())
+
+
+def test_json_records_accepts_arrays_and_ndjson():
+    records = [{"n": number} for number in range(5)]
+    assert list(iter_json_records(io.StringIO("  " + json.dumps(records)))) == records
+    ndjson = "\n".join(json.dumps(record) for record in records) + "\n\nnot json\n"
+    assert list(iter_json_records(io.StringIO(ndjson))) == records
+
+
+def test_import_skips_duplicates_and_malformed_records(storage_format):
+    existing = sample_transactions(100)
+    append_transactions(existing)
+    new = sample_transactions(50, seed=1)
+    records = existing[:10] + new + new[:5] + [{"timestamp": "soon", "amount_paisa": 1}]
+    chunks = []
+    imported, skipped = import_records(records, on_chunk=lambda *counts: chunks.append(counts), chunk_size=16)
+    assert (imported, skipped) == (50, 16)
+    assert chunks[-1] == (50, 16)
+    assert load_all_transactions() == existing + new
+
+
+def test_import_csv_file(storage_format):
+    transactions = sample_transactions(40)
+    with open("import.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["timestamp", "type", "category", "description", "amount_paisa"])
+        writer.writeheader()
+        writer.writerows(transactions)
+    assert import_file("import.csv", iter_csv_records) == (40, 0)
+    assert load_all_transactions() == transactions
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import pytest
+
+from conftest import sample_transactions
+from database.ledger import append_transactions
+from database.utils import iter_transactions, month_bounds
+
+
+def test_filtered_reads_match_across_formats(storage_format):
+    transactions = sample_transactions(800)
+    append_transactions(transactions)
+    start, end = month_bounds("2025-06")
+    found = list(iter_transactions(start, end, types={"Expense"}, categories={"Food", "Pets"}))
+    assert found == [
+        t for t in transactions
+        if start <= t["timestamp"] < end and t["type"] == "expense" and t["category"] in ("Food", "Pets")
+    ]
+
+
+@pytest.mark.parametrize("start, end", [
+    (None, None),
+    (datetime(2025, 3, 10, 12).timestamp(), None),
+    (None, datetime(2025, 2, 1).timestamp()),
+    (datetime(2025, 5, 31, 23, 59).timestamp(), datetime(2025, 7, 1, 0, 1).timestamp()),
+    (datetime(2030, 1, 1).timestamp(), None),
+])
+def test_open_and_partial_month_ranges(storage_format, start, end):
+    transactions = sample_transactions(800)
+    append_transactions(transactions)
+    assert list(iter_transactions(start, end)) == [
+        t for t in transactions
+        if (start is None or start <= t["timestamp"]) and (end is None or t["timestamp"] < end)
+    ]
+
+
+def test_fields_picks_the_keys(storage_format):
+    transactions = sample_transactions(300)
+    append_transactions(transactions)
+    found = list(iter_transactions(types={"income"}, fields=("amount_paisa", "description")))
+    assert found == [
+        {"amount_paisa": t["amount_paisa"], "description": t["description"]}
+        for t in transactions if t["type"] == "income"
+    ]
+
+
+def test_empty_ledger(storage_format):
+    assert list(iter_transactions()) == []
+    assert list(iter_transactions(0, 1, types={"expense"})) == []
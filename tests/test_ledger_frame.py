@@ -0,0 +1,66 @@
+import sys
+
+import pytest
+
+from conftest import sample_transactions
+from database.ledger import append_transactions
+from database.utils import load_all_transactions, LEDGER_FIELDS, TRANSACTIONS_FILE
+from features.dashboard.data import load_ledger_frame
+
+
+def rows(frame):
+    return [dict(zip(LEDGER_FIELDS, row)) for row in frame[list(LEDGER_FIELDS)].astype(object).values.tolist()]
+
+
+@pytest.fixture(params=["pyarrow", "pandas"])
+def csv_reader(request, monkeypatch):
+    """Reads the text ledger with pyarrow when installed, and with the pandas C parser."""
+    if request.param == "pyarrow":
+        pytest.importorskip("pyarrow")
+    else:
+        monkeypatch.setitem(sys.modules, "pyarrow", None)
+    return request.param
+
+
+def test_frame_matches_the_ledger(storage_format):
+    transactions = sample_transactions(700)
+    append_transactions(transactions)
+    frame = load_ledger_frame()
+    assert rows(frame) == load_all_transactions() == transactions
+    assert str(frame["timestamp"].dtype) == "float64" and str(frame["amount_paisa"].dtype) == "int64"
+    assert str(frame["type"].dtype) == "category" and str(frame["category"].dtype) == "category"
+    assert str(frame["date"].dtype).startswith("datetime64")
+    assert frame["amount"].tolist() == [t["amount_paisa"] / 100 for t in transactions]
+
+
+def test_empty_ledger(storage_format):
+    assert load_ledger_frame().empty
+
+
+@pytest.mark.parametrize("storage_format", ["text"], indirect=True)
+@pytest.mark.parametrize("bad_lines", [
+    "1735700001.0,expense,Food,bad amount,12x\n",
+    "soon,expense,Food,bad timestamp,100\n",
+    "1735700002.0,expense,Food,too,many,fields,5\n",
+    "1735700003.0,expense,Food,no amount,\n",
+    "1735700004.0,expense,Food,float amount,1.5\n",
+    "1735700006.0,expense,Food,underscored amount,1_000\n",
+    "nan,expense,Food,nan timestamp,100\n",
+    "1_735_700_007,expense,Food,underscored timestamp,100\n",
+])
+def test_frame_skips_the_lines_the_cli_skips(storage_format, csv_reader, bad_lines):
+    transactions = sample_transactions(50)
+    append_transactions(transactions)
+    with open(TRANSACTIONS_FILE, "a") as f:
+        f.write(bad_lines + " 1735700005.25 ,income,Salary,padded, 700 \n")
+    # Compared as text, since a nan timestamp the CLI keeps is not equal to itself.
+    assert repr(rows(load_ledger_frame())) == repr(load_all_transactions())
+
+
+@pytest.mark.parametrize("storage_format", ["text"], indirect=True)
+def test_frame_skips_amounts_too_large_for_int64(storage_format, csv_reader):
+    transactions = sample_transactions(50)
+    append_transactions(transactions)
+    with open(TRANSACTIONS_FILE, "a") as f:
+        f.write("1735700008.0,expense,Food,huge amount,99999999999999999999\n")
+    assert rows(load_ledger_frame()) == transactions
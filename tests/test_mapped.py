@@ -0,0 +1,34 @@
+import pytest
+
+from database.mapped import iter_line_spans, map_file
+
+PATH = "database/lines.txt"
+
+
+def lines_of(buffer, start=0, end=None):
+    return [bytes(buffer[a:b]) for a, b in iter_line_spans(buffer, start, end)]
+
+
+@pytest.mark.parametrize("text", [b"", b"a\n", b"a\nbb\n\nccc", b"\n\n", "Café\nx\n".encode()])
+def test_line_spans_match_splitlines(text):
+    expected = text.split(b"\n")
+    if expected[-1] == b"":
+        expected.pop()
+    assert lines_of(text) == expected
+    with open(PATH, "wb") as f:
+        f.write(text)
+    with map_file(PATH) as mapped:
+        assert lines_of(mapped) == expected
+
+
+def test_line_spans_of_a_slice():
+    text = b"aa\nbb\ncc\ndd\n"
+    assert lines_of(text, 3, 9) == [b"bb", b"cc"]
+    # An end inside a line ends that line there.
+    assert lines_of(text, 3, 7) == [b"bb", b"c"]
+
+
+def test_map_file_of_a_missing_file():
+    with pytest.raises(FileNotFoundError):
+        with map_file(PATH):
+            pass
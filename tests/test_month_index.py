@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import pytest
+
+from conftest import assert_caught_up, change_ledger, sample_transactions, LEDGER_CHANGES
+from database.formats import get_ledger_format
+from database.ledger import append_transactions
+from database.month_index import load_month_index, MonthIndex
+from database.utils import LEDGER_FIELDS
+
+pytestmark = pytest.mark.parametrize("storage_format", ["text", "binary"], indirect=True)
+
+
+@pytest.mark.parametrize("change", LEDGER_CHANGES)
+def test_month_index_catches_up(storage_format, change):
+    change_ledger(change)
+    assert_caught_up(MonthIndex)
+
+
+def test_month_ranges_hold_exactly_the_month(storage_format):
+    transactions = sample_transactions(1000)
+    append_transactions(transactions)
+    index = load_month_index()
+    months = {datetime.fromtimestamp(t["timestamp"]).strftime("%Y-%m") for t in transactions}
+    assert set(index.months) == months
+    fmt = get_ledger_format()
+    for month in months:
+        found = [
+            dict(zip(LEDGER_FIELDS, record))
+            for record in fmt.iter_range_records(index.month_ranges(month))
+        ]
+        assert found == [t for t in transactions if datetime.fromtimestamp(t["timestamp"]).strftime("%Y-%m") == month]
+
+
+def test_ranges_between_cover_the_overlapping_months(storage_format):
+    transactions = sample_transactions(600)
+    append_transactions(transactions)
+    index = load_month_index()
+    start = datetime(2025, 3, 15).timestamp()
+    end = datetime(2025, 5, 2).timestamp()
+    found = [record[0] for record in get_ledger_format().iter_range_records(index.ranges_between(start, end))]
+    assert sorted(found) == sorted(
+        t["timestamp"] for t in transactions if "2025-03" <= datetime.fromtimestamp(t["timestamp"]).strftime("%Y-%m") <= "2025-05"
+    )
+    assert index.ranges_between() == index.ranges_of(index.months)
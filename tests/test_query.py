@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import sample_transactions
+from database.ledger import append_transactions
+from database.query import parse_query, QueryError
+from features.transactions.transactions import FILTER_QUERIES
+
+
+def month_of(t):
+    return datetime.fromtimestamp(t["timestamp"]).strftime("%Y-%m")
+
+
+# Each query with the same filter written as plain Python.
+QUERIES = {
+    "": lambda t: True,
+    "type:expense": lambda t: t["type"] == "expense",
+    "type:income": lambda t: t["type"] == "income",
+    "date:7d": lambda t: t["timestamp"] >= (datetime.now() - timedelta(days=7)).timestamp(),
+    "type:income,expense": lambda t: True,
+    "category:food,Pets": lambda t: t["category"] in ("Food", "Pets"),
+    "-category:Food": lambda t: t["category"] != "Food",
+    "category~sal": lambda t: "sal" in t["category"].lower(),
+    "date:2025-03": lambda t: month_of(t) == "2025-03",
+    "date:2025-03..2025-05": lambda t: "2025-03" <= month_of(t) <= "2025-05",
+    "-date:2025": lambda t: month_of(t)[:4] != "2025",
+    "date>=2025-11 type:income": lambda t: month_of(t) >= "2025-11" and t["type"] == "income",
+    "date<2025-02-10": lambda t: datetime.fromtimestamp(t["timestamp"]).strftime("%Y-%m-%d") < "2025-02-10",
+    "amount>20000": lambda t: t["amount_paisa"] > 2_000_000,
+    "amount:100..2500.50": lambda t: 10_000 <= t["amount_paisa"] <= 250_050,
+    "-amount:100..": lambda t: t["amount_paisa"] < 10_000,
+    "amount<=10 amount>=1": lambda t: 100 <= t["amount_paisa"] <= 1_000,
+    "desc~uber": lambda t: "uber" in t["description"].lower(),
+    "desc~CAFÉ": lambda t: "café" in t["description"].lower(),
+    "-desc~uber": lambda t: "uber" not in t["description"].lower(),
+    "netflix type:expense": lambda t: "netflix" in t["description"].lower() and t["type"] == "expense",
+    "amount>100 -category:Food uber -desc~eats": lambda t: (
+        t["amount_paisa"] > 10_000 and t["category"] != "Food"
+        and "uber" in t["description"].lower() and "eats" not in t["description"].lower()
+    ),
+    'desc="pharmacy #7"': lambda t: t["description"].lower() == "pharmacy #7",
+    "date:2026..2025": lambda t: False,
+    "category:Food category:Bills": lambda t: False,
+}
+
+
+def newest_first(transactions):
+    """Sorts by time, newest first; of equal times the last written comes first."""
+    return [t for _, t in sorted(enumerate(transactions), key=lambda item: (item[1]["timestamp"], item[0]), reverse=True)]
+
+
+@pytest.fixture
+def transactions(storage_format):
+    transactions = sample_transactions(2000)
+    append_transactions(transactions)
+    return transactions
+
+
+@pytest.mark.parametrize("text", list(QUERIES))
+def test_query_matches_naive_filter(transactions, text):
+    expected = [t for t in transactions if QUERIES[text](t)]
+    query = parse_query(text)
+    assert list(query.iter_transactions()) == expected
+    assert list(query.iter_transactions(newest_first=True)) == newest_first(expected)
+
+
+def test_filter_menu_queries_are_covered():
+    assert set(FILTER_QUERIES.values()) <= set(QUERIES)
+
+
+@pytest.mark.parametrize("text", [
+    "date:2025-13", "amount>ten", "type>expense", "where:home", '"unclosed',
+    "amount>nan", "amount>inf", "-amount<-Infinity", "amount>1e400", "amount:..92233720368547758.08",
+    "date:1000000d", "date:99999999999999999999d"
+])
+def test_malformed_queries_are_rejected(text):
+    with pytest.raises(QueryError):
+        parse_query(text)
+
+
+@pytest.mark.parametrize("text", ["amount>92233720368547758.07", "amount>=-92233720368547758.08"])
+def test_amounts_at_the_int64_limits(transactions, text):
+    # Nothing is above the largest amount, and everything is at or above the smallest.
+    expected = transactions if ">=" in text else []
+    assert list(parse_query(text).iter_transactions()) == expected
+
+
+@pytest.mark.parametrize("command", ["query", "search"])
+def test_command_limit(transactions, capsys, command):
+    from main import run_command
+
+    argv = [command, "--format", "ndjson", "--", "uber"]
+    assert run_command(argv[:3] + ["--limit", "3"] + argv[3:]) == 0
+    assert len(capsys.readouterr().out.splitlines()) == 3
+    assert run_command(argv[:3] + ["--limit", "0"] + argv[3:]) == 0
+    assert capsys.readouterr().out == ""
+    for limit in ("-1", "ten"):
+        with pytest.raises(SystemExit) as exit_info:
+            run_command(argv[:3] + ["--limit", limit] + argv[3:])
+        assert exit_info.value.code == 2
@@ -0,0 +1,68 @@
+from datetime import datetime
+
+from conftest import sample_transactions
+from database.budget_store import set_budget
+from database.ledger import append_transactions
+from database.utils import EXPENSE_CATEGORIES, INCOME_CATEGORIES
+from features.analytics.report import build_report_context
+
+
+def in_month(transactions, month_year, trans_type):
+    return [
+        t for t in transactions
+        if datetime.fromtimestamp(t["timestamp"]).strftime("%Y-%m") == month_year and t["type"] == trans_type
+    ]
+
+
+def test_report_context_matches_the_ledger(storage_format):
+    transactions = sample_transactions(1200)
+    append_transactions(transactions)
+    set_budget("2025-04", "Food", 500000)
+    set_budget("2025-04", "Travel", 0)
+
+    context = build_report_context("2025-04")
+    expenses = in_month(transactions, "2025-04", "expense")
+    income = in_month(transactions, "2025-04", "income")
+    assert context.has_transactions
+    assert context.expense_count == len(expenses)
+    assert context.total_expense == sum(t["amount_paisa"] for t in expenses)
+    assert context.spending_by_category == {
+        category: sum(t["amount_paisa"] for t in expenses if t["category"] == category)
+        for category in EXPENSE_CATEGORIES
+    }
+    assert context.income_count == len(income)
+    assert context.total_income == sum(t["amount_paisa"] for t in income)
+    assert context.income_by_source == {
+        category: sum(t["amount_paisa"] for t in income if t["category"] == category)
+        for category in INCOME_CATEGORIES
+    }
+    assert context.savings == context.total_income - context.total_expense
+
+    food = sum(t["amount_paisa"] for t in expenses if t["category"] == "Food")
+    assert context.budgets == {"Food": 500000, "Travel": 0}
+    assert context.total_budget == 500000
+    assert context.budget_spent["Food"] == food
+    assert context.budget_utilization == {"Food": food / 500000 * 100, "Travel": 0}
+    # Not the current month, so nothing was spent "today".
+    assert context.today_expense == 0
+
+
+def test_report_context_of_an_empty_month(storage_format):
+    context = build_report_context("2025-04")
+    assert not context.has_transactions
+    assert context.total_expense == context.total_income == 0
+    assert context.savings_rate == 0 and context.total_utilization == 0
+    assert context.today_expense == 0
+
+
+def test_today_expense_counts_only_today(storage_format):
+    now = datetime.now().timestamp()
+    append_transactions([
+        {"timestamp": now, "type": "expense", "category": "Food",
+         "description": "Lunch", "amount_paisa": 25000},
+        {"timestamp": now, "type": "income", "category": "Salary",
+         "description": "Pay", "amount_paisa": 900000},
+    ])
+    context = build_report_context()
+    assert context.month_year == datetime.now().strftime("%Y-%m")
+    assert context.today_expense == 25000
@@ -0,0 +1,65 @@
+import json
+import os
+
+import pytest
+
+from conftest import live_files, sample_transactions
+from database.budget_store import load_all_budgets
+from database.ledger import append_transactions
+from database.utils import load_all_transactions
+from features.data_management.data_management import restore_from_backup
+
+BUDGETS = {"2025-03": {"Food": 500000, "Bills": 250000}, "2025-04": {"Food": 450000}}
+
+
+def write_backup(path, transactions, monthly_budgets=BUDGETS):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"transactions": transactions, "budgets": {}, "monthly_budgets": monthly_budgets}, f, indent=4)
+
+
+def test_restore_replaces_transactions_and_budgets(ledger):
+    restored = sample_transactions(700, seed=1)
+    write_backup("backup.json", restored)
+    restore_from_backup("backup.json")
+    assert load_all_transactions() == restored
+    assert load_all_budgets() == BUDGETS
+
+
+def test_restored_ledger_takes_appends(ledger):
+    restored = sample_transactions(100, seed=1)
+    write_backup("backup.json", restored)
+    restore_from_backup("backup.json")
+    appended = sample_transactions(10, seed=2)
+    append_transactions(appended)
+    assert load_all_transactions() == restored + appended
+
+
+@pytest.mark.parametrize("damage", ["truncated", "malformed record", "not json", "wrong shape"])
+def test_bad_backup_leaves_live_files_untouched(ledger, damage):
+    write_backup("backup.json", sample_transactions(700, seed=1))
+    with open("backup.json", "r", encoding="utf-8") as f:
+        text = f.read()
+    if damage == "truncated":
+        text = text[:len(text) * 2 // 3]
+    elif damage == "malformed record":
+        # Still valid JSON, but the last record's amount is not a number.
+        head, key, tail = text.rpartition('"amount_paisa": ')
+        text = head + key + '"x", "extra": ' + tail
+    elif damage == "not json":
+        text = "this is not a backup"
+    else:
+        text = json.dumps({"transactions": {"not": "a list"}})
+    with open("backup.json", "w", encoding="utf-8") as f:
+        f.write(text)
+
+    before = live_files()
+    restore_from_backup("backup.json")
+    assert live_files() == before
+    assert load_all_transactions() == ledger
+    assert not any(name.endswith(".tmp") for name in os.listdir("database"))
+
+
+def test_missing_backup_leaves_live_files_untouched(ledger):
+    before = live_files()
+    restore_from_backup("missing.json")
+    assert live_files() == before
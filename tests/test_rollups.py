@@ -0,0 +1,62 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from conftest import assert_caught_up, change_ledger, sample_transactions, LEDGER_CHANGES
+from database.ledger import append_transactions
+from database.rollups import load_rollups, verify_rollups, MonthlyRollups
+from database.utils import EXPENSE_CATEGORIES, ROLLUPS_FILE
+
+
+def month_of(t):
+    return datetime.fromtimestamp(t["timestamp"]).strftime("%Y-%m")
+
+
+@pytest.mark.parametrize("storage_format", ["text", "binary"], indirect=True)
+@pytest.mark.parametrize("change", LEDGER_CHANGES)
+def test_rollups_catch_up(storage_format, change):
+    change_ledger(change)
+    assert_caught_up(MonthlyRollups)
+
+
+def test_rollups_match_the_ledger(storage_format):
+    transactions = sample_transactions(1500)
+    append_transactions(transactions[:700])
+    append_transactions(transactions[700:])
+    rollups = load_rollups()
+    assert rollups.has_transactions()
+    for month in sorted({month_of(t) for t in transactions}):
+        for trans_type in ("expense", "income"):
+            rows = [t for t in transactions if month_of(t) == month and t["type"] == trans_type]
+            assert rollups.total(month, trans_type) == sum(t["amount_paisa"] for t in rows)
+            assert rollups.count(month, trans_type) == len(rows)
+        expenses = [t for t in transactions if month_of(t) == month and t["type"] == "expense"]
+        categories = EXPENSE_CATEGORIES + ["Pets"]
+        assert rollups.category_totals(month, "expense", categories) == {
+            category: sum(t["amount_paisa"] for t in expenses if t["category"] == category) for category in categories
+        }
+    day = datetime.fromtimestamp(transactions[0]["timestamp"]).strftime("%Y-%m-%d")
+    assert rollups.day_total(day, transactions[0]["type"]) == sum(
+        t["amount_paisa"] for t in transactions
+        if datetime.fromtimestamp(t["timestamp"]).strftime("%Y-%m-%d") == day and t["type"] == transactions[0]["type"]
+    )
+    assert rollups.total("1999-01", "expense") == 0
+
+
+@pytest.mark.parametrize("storage_format", ["text", "binary"], indirect=True)
+def test_verify_rollups_reports_and_repairs_drift(storage_format):
+    transactions = sample_transactions(300)
+    append_transactions(transactions)
+    load_rollups()
+    assert verify_rollups() == []
+
+    with open(ROLLUPS_FILE) as f:
+        saved = json.load(f)
+    month = month_of(transactions[0])
+    saved["data"][month]["expense"]["total"] += 1
+    with open(ROLLUPS_FILE, "w") as f:
+        json.dump(saved, f)
+    drift = verify_rollups()
+    assert (month, "expense", "total") in [entry[:3] for entry in drift]
+    assert verify_rollups() == []
@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import pytest
+
+from conftest import assert_caught_up, change_ledger, sample_transactions, LEDGER_CHANGES
+from database.description_index import parse_search, search_transactions, tokenize, DescriptionIndex, SearchError
+from database.ledger import append_transactions
+from features.dashboard.data import search_frame
+
+SEARCHES = ["uber", "UBER", "net*", "uber OR netflix", "ride airport", "uber-eats", "uber-ea*", "café", "p*", "invoice 42"]
+
+
+def newest_first(transactions):
+    """Sorts by time, newest first; of equal times the last written comes first."""
+    return [t for _, t in sorted(enumerate(transactions), key=lambda item: (item[1]["timestamp"], item[0]), reverse=True)]
+
+
+def matches_search(t, text):
+    words = tokenize(t["description"])
+    return any(
+        all(any(w.startswith(word) for w in words) if prefix else word in words for word, prefix in group)
+        for group in parse_search(text)
+    )
+
+
+@pytest.fixture
+def transactions(storage_format):
+    transactions = sample_transactions(2000)
+    append_transactions(transactions)
+    return transactions
+
+
+@pytest.mark.parametrize("text", SEARCHES)
+def test_search_matches_naive_filter(transactions, text):
+    expected = newest_first([t for t in transactions if matches_search(t, text)])
+    count, found = search_transactions(text)
+    assert count == len(expected)
+    assert list(found) == expected
+
+
+def test_search_follows_appends(transactions):
+    count, _ = search_transactions("uber")
+    append_transactions([{
+        "timestamp": datetime(2026, 3, 1).timestamp(), "type": "expense", "category": "Transport",
+        "description": "Uber to the station", "amount_paisa": 25000
+    }])
+    new_count, found = search_transactions("uber")
+    assert new_count == count + 1
+    assert next(found)["description"] == "Uber to the station"
+
+
+@pytest.mark.parametrize("text", ["", "  ", "OR", "- *"])
+def test_empty_searches_are_rejected(text):
+    with pytest.raises(SearchError):
+        search_transactions(text)
+
+
+@pytest.mark.parametrize("storage_format", ["text", "binary"], indirect=True)
+@pytest.mark.parametrize("change", LEDGER_CHANGES)
+def test_description_index_catches_up(storage_format, change):
+    change_ledger(change)
+    # Postings merge differently depending on how the index grew, so searches are compared.
+    assert_caught_up(DescriptionIndex, state=lambda index: [
+        index.search(parse_search(text)).tolist() for text in SEARCHES
+    ])
+
+
+def test_search_frame(transactions):
+    count, frame = search_frame("uber", 10)
+    assert count == sum("uber" in tokenize(t["description"]) for t in transactions)
+    assert len(frame) == min(count, 10)
+    assert frame["description"].tolist() == [t["description"] for t in search_transactions("uber")[1]][:10]
@@ -0,0 +1,31 @@
+import pytest
+
+from conftest import assert_caught_up, change_ledger, sample_transactions, LEDGER_CHANGES
+from database.ledger import append_transactions
+from database.signature_index import load_signature_index, SignatureIndex
+
+
+@pytest.mark.parametrize("storage_format", ["text", "binary"], indirect=True)
+@pytest.mark.parametrize("change", LEDGER_CHANGES)
+def test_signature_index_catches_up(storage_format, change):
+    change_ledger(change)
+    # The Bloom filter's size depends on how the index grew, so only the hashes are compared.
+    assert_caught_up(SignatureIndex, state=lambda sidecar: sidecar.data_to_json()["hashes"])
+
+
+def test_contains_many_matches_the_ledger(storage_format):
+    stored = sample_transactions(2000)
+    append_transactions(stored)
+    others = sample_transactions(500, seed=1)
+    signatures = [(t["timestamp"], t["amount_paisa"]) for t in stored[::7] + others]
+    expected = {(t["timestamp"], t["amount_paisa"]) for t in stored}
+
+    index = load_signature_index()
+    assert list(index.contains_many(signatures)) == [signature in expected for signature in signatures]
+
+    index.add_signatures([(t["timestamp"], t["amount_paisa"]) for t in others[:10]])
+    assert all(index.contains_many([(t["timestamp"], t["amount_paisa"]) for t in others[:10]]))
+
+
+def test_empty_index(storage_format):
+    assert not any(load_signature_index().contains_many([(1.0, 100), (2.5, 0)]))
@@ -0,0 +1,40 @@
+from conftest import sample_transactions
+from database import sqlite_store
+from database.budget_store import load_all_budgets, set_budget
+from database.ledger import append_transactions, replace_transactions
+from database.utils import load_all_transactions, month_bounds
+
+
+def test_migrate_from_text(switch_format):
+    transactions = sample_transactions(600)
+    switch_format("text")
+    append_transactions(transactions)
+    set_budget("2025-02", "Food", 100000)
+    set_budget("2025-03", "Food", 120000)
+    set_budget("2025-02", "Food", 150000)
+
+    assert sqlite_store.migrate_from_text() == (600, 2)
+    switch_format("sqlite")
+    assert load_all_transactions() == transactions
+    assert load_all_budgets() == {"2025-02": {"Food": 150000}, "2025-03": {"Food": 120000}}
+
+
+def test_indexed_range_reads(switch_format):
+    switch_format("sqlite")
+    transactions = sample_transactions(800)
+    append_transactions(transactions)
+    start, end = month_bounds("2025-06")
+    assert [
+        dict(zip(("timestamp", "type", "category", "description", "amount_paisa"), row))
+        for row in sqlite_store.iter_transaction_rows(start, end, "Expense")
+    ] == [t for t in transactions if start <= t["timestamp"] < end and t["type"] == "expense"]
+
+
+def test_store_generation_changes_only_on_rewrites(switch_format):
+    switch_format("sqlite")
+    append_transactions(sample_transactions(100))
+    generation = sqlite_store.store_generation()
+    append_transactions(sample_transactions(100, seed=1))
+    assert sqlite_store.store_generation() == generation
+    replace_transactions(sample_transactions(100, seed=2))
+    assert sqlite_store.store_generation() != generation
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from conftest import sample_transactions
+from database.ledger import append_transactions, replace_transactions
+from database.table import load_transaction_table
+from database.utils import load_all_transactions, month_bounds, EXPENSE_CATEGORIES, TRANSACTIONS_FILE
+
+
+def test_table_holds_what_was_written(storage_format):
+    transactions = sample_transactions(500)
+    append_transactions(transactions[:200])
+    append_transactions(transactions[200:])
+    table = load_transaction_table()
+    assert len(table) == 500
+    assert table.timestamps.dtype == np.float64 and table.amounts.dtype == np.int64
+    assert table.type_codes.dtype == np.int16 and table.category_codes.dtype == np.int16
+    assert table.rows() == transactions
+    assert table.row(123) == transactions[123]
+    assert load_all_transactions() == transactions
+
+
+def test_unknown_categories_get_their_own_codes(storage_format):
+    transactions = sample_transactions(200)
+    append_transactions(transactions)
+    table = load_transaction_table()
+    assert "Pets" in table.category_names
+    pets = table.category_codes == table.category_names.index("Pets")
+    assert int(pets.sum()) == sum(t["category"] == "Pets" for t in transactions)
+
+
+def test_masks_and_totals_match_the_rows(storage_format):
+    transactions = sample_transactions(1000)
+    append_transactions(transactions)
+    table = load_transaction_table()
+    mask = table.month_mask("2025-06") & table.type_mask("expense")
+    start, end = month_bounds("2025-06")
+    expenses = [t for t in transactions if start <= t["timestamp"] < end and t["type"] == "expense"]
+    assert table.total(mask) == sum(t["amount_paisa"] for t in expenses)
+    totals = table.category_totals(mask, EXPENSE_CATEGORIES + ["Pets", "Unused"])
+    for category, amount in totals.items():
+        assert amount == sum(t["amount_paisa"] for t in expenses if t["category"] == category)
+
+
+def test_empty_ledger(storage_format):
+    assert len(load_transaction_table()) == 0
+    assert load_all_transactions() == []
+
+
+@pytest.mark.parametrize("storage_format", ["text"], indirect=True)
+def test_text_table_reads_appended_lines_and_rewrites(storage_format):
+    transactions = sample_transactions(300)
+    append_transactions(transactions)
+    assert load_all_transactions() == transactions
+    with open(TRANSACTIONS_FILE, "a") as f:
+        # Another process appends a line, and a malformed one that is skipped.
+        f.write("1735700000.5,expense,Food,Late lunch,12000\n1735700001.0,expense,Food,bad,12x\n")
+    late = {"timestamp": 1735700000.5, "type": "expense", "category": "Food",
+            "description": "Late lunch", "amount_paisa": 12000}
+    assert load_all_transactions() == transactions + [late]
+
+    replaced = sample_transactions(300, seed=1)
+    replace_transactions(replaced)
+    assert load_all_transactions() == replaced
@@ -0,0 +1,53 @@
+import random
+import time
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from database.timebuckets import TimeBuckets
+
+
+@pytest.fixture(params=["UTC", "America/Los_Angeles", "Asia/Kolkata", "Europe/London"])
+def timezone(request, monkeypatch):
+    monkeypatch.setenv("TZ", request.param)
+    time.tzset()
+    yield request.param
+    monkeypatch.undo()
+    time.tzset()
+
+
+def timestamps_around_dst():
+    rng = random.Random(0)
+    start = datetime(2024, 1, 1).timestamp()
+    found = [start + rng.uniform(0, 3 * 366 * 86400) for _ in range(2000)]
+    # Every hour across the 2025 spring-forward and fall-back weekends, both sides of the Atlantic.
+    for day in (datetime(2025, 3, 8), datetime(2025, 3, 29), datetime(2025, 10, 25), datetime(2025, 11, 1)):
+        found += [day.timestamp() + hour * 3600 + 0.5 for hour in range(72)]
+    return found
+
+
+@pytest.mark.parametrize("unit", ["day", "month", "year"])
+def test_keys_match_strftime(timezone, unit):
+    buckets = TimeBuckets(unit)
+    timestamps = timestamps_around_dst()
+    expected = [datetime.fromtimestamp(t).strftime(TimeBuckets.FORMATS[unit]) for t in timestamps]
+    assert [buckets.key_of(t) for t in timestamps] == expected
+    assert list(TimeBuckets(unit).keys_of(np.array(timestamps))) == expected
+
+
+@pytest.mark.parametrize("unit", ["day", "month", "year"])
+def test_key_bounds_hold_the_key(timezone, unit):
+    buckets = TimeBuckets(unit)
+    for t in timestamps_around_dst()[::50]:
+        key = buckets.key_of(t)
+        start, end = buckets.key_bounds(key)
+        assert start <= t < end
+        assert buckets.key_of(start) == key
+        assert buckets.key_of(start - 1) != key
+        assert buckets.key_of(end) != key
+        assert buckets.bucket(t) == (start, end, key)
+
+
+def test_empty_array():
+    assert len(TimeBuckets("month").keys_of(np.array([]))) == 0
@@ -0,0 +1,55 @@
+import threading
+import time
+
+from conftest import sample_transactions
+from database.budget_store import set_budget
+from database.ledger import append_transactions
+from features.dashboard import data as dashboard_data
+from features.dashboard.watcher import get_ledger_watcher, LedgerWatcher
+
+
+def test_get_ledger_watcher_does_not_wait_for_the_first_check(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(LedgerWatcher, "_check", lambda self: release.wait(10))
+    started = time.monotonic()
+    watcher = get_ledger_watcher()
+    try:
+        assert time.monotonic() - started < 1
+        assert watcher.generation == 0
+        assert get_ledger_watcher() is watcher
+    finally:
+        release.set()
+
+
+def wait_for(watcher, generation, condition):
+    """
+    Waits, through generation changes, until condition() holds. A write can span several
+    files (the binary ledger and its strings heap), so one change may take two checks.
+    """
+    deadline = time.monotonic() + 5
+    while True:
+        generation = watcher.wait_for_change(generation, timeout=0.1)
+        if condition():
+            return generation
+        assert time.monotonic() < deadline
+
+
+def test_generation_moves_on_ledger_and_budget_changes(storage_format):
+    append_transactions(sample_transactions(100))
+    watcher = LedgerWatcher(interval=0.01)
+    try:
+        generation = watcher.wait_for_change(0, timeout=5)
+        assert generation == 1
+        # Nothing changed, so nothing moves.
+        assert watcher.wait_for_change(generation, timeout=0.1) == generation
+
+        append_transactions(sample_transactions(20, seed=1))
+        # The watcher catches the shared dashboard cache up by itself.
+        generation = wait_for(watcher, generation, lambda: len(dashboard_data._dashboard_cache.snapshot.frame) == 120)
+        assert generation >= 2
+
+        set_budget("2025-01", "Food", 100000)
+        assert watcher.wait_for_change(generation, timeout=5) > generation
+    finally:
+        watcher.stop()
+    assert not watcher._thread.is_alive()
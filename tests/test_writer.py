@@ -0,0 +1,72 @@
+import threading
+
+import pytest
+
+import database.utils
+from conftest import assert_caught_up, sample_transactions
+from database.ledger import append_transactions
+from database.utils import load_all_transactions
+from database import sqlite_store
+from database.writer import get_writer, LedgerWriter, SIDECARS
+
+
+@pytest.mark.parametrize("durability", ["always", "batch", "interval_ms", "never"])
+def test_concurrent_appends_are_all_written(storage_format, durability):
+    writer = LedgerWriter(durability=durability, interval_ms=5)
+    batches = [sample_transactions(40, seed=seed) for seed in range(12)]
+    threads = [threading.Thread(target=writer.append_many, args=(batch,)) for batch in batches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.close()
+
+    found = load_all_transactions()
+    assert len(found) == 480
+    # Each call's records stay together and in order.
+    for batch in batches:
+        start = found.index(batch[0])
+        assert found[start:start + len(batch)] == batch
+    assert writer.stats()["records"] == 480
+    if storage_format != "sqlite":
+        for sidecar_class in SIDECARS[:2]:
+            assert_caught_up(sidecar_class)
+
+
+@pytest.mark.parametrize("storage_format", ["text", "binary"], indirect=True)
+def test_durability_policies_fsync(storage_format):
+    always = LedgerWriter(durability="always")
+    for seed in range(3):
+        always.append_many(sample_transactions(5, seed=seed))
+    assert always.stats()["fsyncs"] == 3
+    always.close()
+
+    never = LedgerWriter(durability="never")
+    never.append_many(sample_transactions(5, seed=4))
+    never.close()
+    assert never.stats()["fsyncs"] == 0
+    assert len(load_all_transactions()) == 20
+
+
+def test_ledger_appends_go_through_the_writer(storage_format):
+    transactions = sample_transactions(100)
+    append_transactions(transactions)
+    assert load_all_transactions() == transactions
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        LedgerWriter(durability="sometimes")
+
+
+@pytest.mark.parametrize("storage_format", ["text", "sqlite"], indirect=True)
+def test_durability_is_read_when_used(storage_format, monkeypatch):
+    monkeypatch.setattr(database.utils, "DURABILITY", "never")
+    monkeypatch.setattr(database.utils, "DURABILITY_INTERVAL_MS", 250)
+    writer = get_writer()
+    assert (writer.durability, writer.interval) == ("never", 0.25)
+    append_transactions(sample_transactions(10))
+    writer.close()
+    assert writer.stats()["fsyncs"] == 0
+    if storage_format == "sqlite":
+        assert sqlite_store.connect().execute("PRAGMA synchronous").fetchone()[0] == 0